@@ -0,0 +1,46 @@
+"""
+儀表圖繪製的基準測試：比較 matplotlib 與 pyecharts + Selenium 兩種方式每秒可產生的圖表數量
+（pyecharts 另測試同一頁面一次截取所有圖表的方式；瀏覽器啟動時間計入第一個測試）。
+
+pyecharts 方式需要 Chrome 與 chromedriver，環境中無法啟動瀏覽器時只測試 matplotlib。
+
+執行方式（於專案根目錄）：
+    python -m benchmarks.bench_gauge_chart
+"""
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+
+from utils.chart_generator_gauge import build_pyecharts_gauge, render_gauge_matplotlib, render_gauge_pyecharts
+from utils.remove_image_whitespace import trim_image
+from utils.snapshot_service import snapshot_charts
+
+
+def render_each(render):
+    return lambda values: [render(value) for value in values]
+
+
+def render_pyecharts_page(values):
+    return snapshot_charts([build_pyecharts_gauge(value) for value in values])
+
+
+def bench(backend: str, render_all, count: int) -> None:
+    values = [round(100 * i / max(1, count - 1), 1) for i in range(count)]
+
+    start = time.perf_counter()
+    try:
+        for image in render_all(values):
+            trim_image(image)
+    except Exception as error:
+        print(f"{backend:>16} | unavailable: {type(error).__name__}: {str(error).splitlines()[0] if str(error) else ''}")
+        return
+    elapsed = time.perf_counter() - start
+
+    print(f"{backend:>16} | {count:>3} charts in {elapsed:7.2f} s | {count / elapsed:6.2f} charts/s | {elapsed / count * 1000:8.1f} ms/chart")
+
+
+if __name__ == "__main__":
+    bench("matplotlib", render_each(render_gauge_matplotlib), 20)
+    bench("pyecharts", render_each(render_gauge_pyecharts), 10)
+    bench("pyecharts (page)", render_pyecharts_page, 10)
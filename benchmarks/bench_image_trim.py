@@ -0,0 +1,75 @@
+"""
+圖片空白裁剪的微基準測試：比較原本逐像素掃描 alpha 通道的實作
+與以 alpha 通道 getbbox 計算範圍的 trim_image 每張圖片的處理時間。
+
+執行方式（於專案根目錄）：
+    python -m benchmarks.bench_image_trim
+"""
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from utils.remove_image_whitespace import trim_image
+
+
+def legacy_trim_image(image: Image.Image) -> Image.Image:
+    """原本 remove_image_whitespace 的逐像素掃描（不含讀寫檔案）。"""
+    image_array = np.array(image)
+    row = image_array.shape[0]
+    col = image_array.shape[1]
+    x_left = row
+    x_top = col
+    x_right = 0
+    x_bottom = 0
+    for r in range(row):
+        for c in range(col):
+            if image_array[r][c][3] > 0:
+                if x_top > r:
+                    x_top = r
+                if x_bottom < r:
+                    x_bottom = r
+                if x_left > c:
+                    x_left = c
+                if x_right < c:
+                    x_right = c
+    return image.crop((x_left - 5, x_top - 5, x_right + 5, x_bottom + 5))
+
+
+def synthetic_chart(size: int) -> Image.Image:
+    """產生透明背景、四周留白的圖片，模擬 300 dpi 輸出的徑向圖。"""
+    image = Image.new('RGBA', (size, size), (255, 255, 255, 0))
+    draw = ImageDraw.Draw(image)
+    margin = size // 8
+    draw.pieslice((margin, margin, size - margin, size - margin), 180, 360, fill=(203, 16, 144, 204))
+    draw.text((margin, size - margin), "100%", fill=(0, 0, 0, 255))
+    return image
+
+
+def bench(size: int) -> None:
+    image = synthetic_chart(size)
+
+    start = time.perf_counter()
+    expected = legacy_trim_image(image)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = trim_image(image)
+    trim_time = time.perf_counter() - start
+
+    assert result.size == expected.size and result.tobytes() == expected.tobytes(), "trim_image differs from legacy scan"
+
+    # 已裁剪過的圖片不再處理
+    start = time.perf_counter()
+    assert trim_image(result) is result, "already trimmed image was cropped again"
+    retrim_time = time.perf_counter() - start
+
+    print(f"size={size:>5}x{size:<5} | "
+          f"legacy {legacy_time * 1000:10.2f} ms | "
+          f"getbbox {trim_time * 1000:7.2f} ms (already trimmed {retrim_time * 1000:6.2f} ms) | "
+          f"speedup x{legacy_time / trim_time:.0f}")
+
+
+if __name__ == "__main__":
+    for size in (500, 1000, 2000):
+        bench(size)
@@ -0,0 +1,65 @@
+"""
+合併儲存格查詢的微基準測試：比較逐一掃描（check_cell_merge_status）
+與預先建立索引（build_merge_index + lookup_merge_start）的查詢時間。
+
+執行方式（於專案根目錄）：
+    python -m benchmarks.bench_merge_index
+"""
+import random
+import time
+
+from google_api.google_sheets_merges import build_merge_index, check_cell_merge_status, lookup_merge_start
+
+
+def synthetic_merges(num_rows: int, seed: int = 0) -> list:
+    """
+    產生類似問卷版面的合併範圍：多個欄位中以 2~6 列為一組的縱向合併，
+    以及每隔一段距離出現的橫向標題合併（與 Google Sheets 相同，合併範圍互不重疊）。
+    """
+    rng = random.Random(seed)
+    merges = []
+    for column in (0, 1, 2, 3, 4, 5, 10, 11):
+        row = 1
+        while row < num_rows:
+            height = rng.randint(1, 6)
+            if height > 1:
+                merges.append({
+                    'startRowIndex': row, 'endRowIndex': min(row + height, num_rows),
+                    'startColumnIndex': column, 'endColumnIndex': column + 1
+                })
+            row += height
+    for row in range(1, num_rows, 40):
+        merges.append({
+            'startRowIndex': row, 'endRowIndex': row + 1,
+            'startColumnIndex': 6, 'endColumnIndex': 10
+        })
+    rng.shuffle(merges)
+    return merges
+
+
+def bench(num_rows: int) -> None:
+    merges = synthetic_merges(num_rows)
+    queries = [(row, column) for row in range(1, num_rows) for column in (7, 10)]
+
+    start = time.perf_counter()
+    expected = [check_cell_merge_status(row, column, merges) for row, column in queries]
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    merge_index = build_merge_index(merges)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = [lookup_merge_start(row, column, merge_index) for row, column in queries]
+    lookup_time = time.perf_counter() - start
+
+    assert result == expected, "merge index lookup differs from linear scan"
+    print(f"rows={num_rows:>6} merges={len(merges):>6} | "
+          f"scan {scan_time * 1000:9.2f} ms | "
+          f"index build {build_time * 1000:7.2f} ms + lookup {lookup_time * 1000:7.2f} ms | "
+          f"speedup x{scan_time / (build_time + lookup_time):.1f}")
+
+
+if __name__ == "__main__":
+    for rows in (300, 1000, 3000):
+        bench(rows)
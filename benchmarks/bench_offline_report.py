@@ -0,0 +1,75 @@
+"""
+本地報告輸出的基準測試：以模擬的報告數據（含圖表 PNG）輸出 Markdown、HTML 與 DOCX，
+統計各格式的輸出時間與檔案大小，並確認每個問題與改善建議區段都出現在輸出內容中。
+
+作為對照，同時列出以模擬文件寫入 Google Doc（planned 模式）所需的 batchUpdate 請求數；
+本地輸出不呼叫任何 API。
+
+執行方式（於專案根目錄）：
+    python -m benchmarks.bench_offline_report
+"""
+import io
+import os
+import tempfile
+import time
+import zipfile
+
+from PIL import Image
+
+import google_api.google_docs as google_docs
+from benchmarks.bench_report_builder import make_data, run
+from google_api.google_docs import DocumentBuilder
+from google_api.google_docs_sections import report_questions, report_topics
+from utils.report_renderer import REPORT_RENDERERS, render_report
+
+
+def fake_chart(width: int, height: int, color: tuple) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def add_chart_images(data: dict) -> None:
+    data['chart_images'] = [("gauge", fake_chart(800, 533, (70, 130, 180)))]
+    for topic_cnt, topic in report_topics(data):
+        topic['chart_images'] = [("gauge", fake_chart(520, 347, (60, 179, 113))), ("radial", fake_chart(347, 347, (255, 165, 0)))]
+
+
+def report_text(fmt: str, path: str) -> str:
+    if fmt == "docx":
+        with zipfile.ZipFile(path) as archive:
+            return archive.read("word/document.xml").decode("utf-8")
+    with open(path, encoding="utf-8") as report_file:
+        return report_file.read()
+
+
+if __name__ == "__main__":
+    # 假文件不需要速率限制，圖片連結也不需實際檢查
+    google_docs.image_ready = lambda uri: True
+    google_docs.execute = lambda api, request: request.execute()
+
+    for topics, questions in [(3, 4), (8, 10)]:
+        data = make_data(topics, questions)
+        document, _ = run(DocumentBuilder, data)
+        add_chart_images(data)
+        print(f"{topics} 主題 x {questions} 問題（Google Doc：batchUpdate {document.batch_updates} 次，{document.requests:,} 個請求）")
+
+        expected = [question['question'] for _, topic in report_topics(data) for question in report_questions(topic)]
+        expected.append("Well-Architected 改善建議統整")
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            for fmt, renderer in REPORT_RENDERERS.items():
+                fmt_dir = os.path.join(output_dir, fmt)
+                os.makedirs(fmt_dir)
+                path = os.path.join(fmt_dir, f"report.{renderer.extension}")
+                start = time.perf_counter()
+                render_report(data, fmt, path)
+                elapsed = time.perf_counter() - start
+
+                text = report_text(fmt, path)
+                missing = [title for title in expected if title not in text]
+                assert not missing, f"{fmt} 輸出缺少區段：{missing[:3]}"
+
+                # 檔案大小包含 Markdown 另存的圖檔
+                size = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(fmt_dir) for name in names)
+                print(f"  {fmt:>5} | {elapsed * 1000:7.1f} ms | {size / 1024:8.1f} KB")
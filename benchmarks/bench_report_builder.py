@@ -0,0 +1,324 @@
+"""
+報告寫入的基準測試：以本地模擬的 Google Docs 文件執行 generate_report，比較
+改寫前「每次建立項目符號後重新讀取文件找定位文字」的作法與 DocumentBuilder 的
+sequential（依序產生請求）、planned（單一 insertText + 由後往前套用）兩種模式，
+統計文件讀取（GET）次數、下載的文件內容量、batchUpdate 與請求數量，
+並確認最終文件的文字、段落樣式、項目符號層級、超連結與區段的具名範圍完全相同。
+
+另測試修改資料後重新執行（文件中已無定位文字）時只重寫有變更的區段，
+結果須與以新資料完整寫入的文件相同。
+
+改寫前的作法以 DocumentBuilder 的子類別模擬：每次建立項目符號後送出請求並重新讀取文件，
+同時檢查重新讀取到的定位文字索引與本地追蹤的結果一致。
+
+執行方式（於專案根目錄）：
+    python -m benchmarks.bench_report_builder
+"""
+import contextlib
+import copy
+import functools
+import io
+import random
+import time
+
+import google_api.google_docs as google_docs
+from google_api.google_docs import DocumentBuilder, generate_report, get_content_start, text_length
+from settings import INSERT_POINT, QUESTIONNAIRE_END_MARKER, STAGE_ORDER
+
+IMAGE = '\ufffc'
+TEMPLATE = "Well-Architected 評估報告\n日期：{{REPORT_DATE}}\n" + INSERT_POINT + "\n附錄\n"
+
+
+def to_units(text: str) -> list:
+    """將文字拆成 UTF-16 編碼單位（BMP 以外的字元後方補一個空字串佔位）。"""
+    return [unit for char in text for unit in ([char] if text_length(char) == 1 else [char, ""])]
+
+
+class FakeRequest:
+
+    def __init__(self, func):
+        self.func = func
+
+    def execute(self):
+        return self.func()
+
+
+class FakeDocument:
+    """
+    以 UTF-16 編碼單位保存內文的假文件（圖片以 U+FFFC 佔 1 個索引，索引 0 為分節符），
+    實作 generate_report 使用到的 batchUpdate 請求與 documents().get()，
+    並記錄每個編碼單位所屬段落的樣式、項目符號層級與超連結，用於比對最終文件。
+    """
+
+    def __init__(self, text: str):
+        self.units = to_units(text)
+        self.paragraphs = [("NORMAL_TEXT", None)] * len(self.units)
+        self.links = [None] * len(self.units)
+        self.named_ranges = {}
+        self.next_range_id = 0
+        self.gets = 0
+        self.downloaded = 0
+        self.batch_updates = 0
+        self.requests = 0
+        self.revision = 0
+
+    def documents(self):
+        return self
+
+    def get(self, documentId):
+        return FakeRequest(self._get)
+
+    def batchUpdate(self, documentId, body):
+        return FakeRequest(lambda: self._batch_update(body['requests'], body.get('writeControl')))
+
+    def _check(self, start, end=None):
+        end = start if end is None else end
+        assert 1 <= start <= end <= len(self.units) + 1, f"索引超出範圍: {start}-{end}"
+
+    def _get(self):
+        self.gets += 1
+        self.downloaded += len(self.units)
+        content, start = [], 1
+        for paragraph in "".join(self.units).split("\n")[:-1]:
+            text = paragraph + "\n"
+            first = {'inlineObjectElement': {}} if text.startswith(IMAGE) else {'startIndex': start, 'textRun': {'content': text.split(IMAGE)[0]}}
+            content.append({'startIndex': start, 'paragraph': {'elements': [first]}})
+            start += text_length(text)
+        named_ranges = {}
+        for range_id, (name, start, end) in self.named_ranges.items():
+            named_ranges.setdefault(name, {'name': name, 'namedRanges': []})['namedRanges'].append(
+                {'namedRangeId': range_id, 'name': name, 'ranges': [{'startIndex': start, 'endIndex': end}]})
+        return {'body': {'content': content}, 'namedRanges': named_ranges, 'revisionId': f"rev{self.revision}"}
+
+    def _insert(self, offset, units):
+        # 新插入的內容沿用所在段落的格式；插入於具名範圍起點或終點的內容不屬於該範圍
+        self.units[offset:offset] = units
+        self.paragraphs[offset:offset] = [self.paragraphs[offset]] * len(units)
+        self.links[offset:offset] = [None] * len(units)
+        index = offset + 1
+        for named_range in self.named_ranges.values():
+            named_range[1] += len(units) if named_range[1] >= index else 0
+            named_range[2] += len(units) if named_range[2] > index else 0
+
+    def _delete(self, start, end):
+        del self.units[start:end], self.paragraphs[start:end], self.links[start:end]
+        start, end = start + 1, end + 1
+        for range_id, named_range in list(self.named_ranges.items()):
+            named_range[1:] = [position if position <= start else max(start, position - (end - start)) for position in named_range[1:]]
+            if named_range[1] >= named_range[2]:
+                del self.named_ranges[range_id]
+
+    def _paragraph_spans(self, start, end):
+        """範圍 [start, end)（串列位置）涵蓋的各段落 [段落起點, 段落終點)。"""
+        offset = start
+        while offset > 0 and self.units[offset - 1] != "\n":
+            offset -= 1
+        while offset < end or offset == start:
+            paragraph_end = self.units.index("\n", offset) + 1
+            yield offset, paragraph_end
+            offset = paragraph_end
+
+    def _batch_update(self, requests, write_control=None):
+        # 指定版本時，文件須仍為該版本（與 Google Docs 相同，避免依舊索引重複寫入）
+        if write_control:
+            assert write_control['requiredRevisionId'] == f"rev{self.revision}", "文件版本已改變"
+        self.revision += 1
+        self.batch_updates += 1
+        self.requests += len(requests)
+        for request in requests:
+            (kind, value), = request.items()
+            if kind == 'deleteNamedRange':
+                del self.named_ranges[value['namedRangeId']]
+            elif kind in ('insertText', 'insertInlineImage'):
+                index = value['location']['index']
+                self._check(index)
+                self._insert(index - 1, to_units(value['text']) if kind == 'insertText' else [IMAGE])
+            elif kind == 'replaceNamedRangeContent':
+                # 由後往前替換同名的各範圍，替換後範圍涵蓋新的文字
+                replacement = to_units(value['text'])
+                targets = [(range_id, named_range) for range_id, named_range in self.named_ranges.items() if named_range[0] == value['namedRangeName']]
+                for range_id, (name, start, end) in sorted(targets, key=lambda target: target[1][1], reverse=True):
+                    del self.named_ranges[range_id]
+                    self._insert(start - 1, replacement)
+                    self._delete(start - 1 + len(replacement), end - 1 + len(replacement))
+                    self.named_ranges[range_id] = [name, start, start + len(replacement)]
+            elif kind == 'replaceAllText':
+                target, replacement = to_units(value['containsText']['text']), to_units(value['replaceText'])
+                offset = 0
+                while offset <= len(self.units) - len(target):
+                    if self.units[offset:offset + len(target)] == target:
+                        self._insert(offset, replacement)
+                        self._delete(offset + len(replacement), offset + len(replacement) + len(target))
+                        offset += len(replacement)
+                    else:
+                        offset += 1
+            else:
+                start, end = value['range']['startIndex'], value['range']['endIndex']
+                self._check(start, end)
+                if kind == 'createNamedRange':
+                    self.next_range_id += 1
+                    self.named_ranges[f"kix.{self.next_range_id}"] = [value['name'], start, end]
+                elif kind == 'deleteContentRange':
+                    self._delete(start - 1, end - 1)
+                elif kind == 'updateTextStyle':
+                    self.links[start - 1:end - 1] = [value['textStyle']['link']['url']] * (end - start)
+                elif kind == 'updateParagraphStyle':
+                    for paragraph_start, paragraph_end in list(self._paragraph_spans(start - 1, end - 1)):
+                        for offset in range(paragraph_start, paragraph_end):
+                            self.paragraphs[offset] = (value['paragraphStyle']['namedStyleType'], self.paragraphs[offset][1])
+                elif kind == 'createParagraphBullets':
+                    self._bullets(start - 1, end - 1)
+        return {'writeControl': {'requiredRevisionId': f"rev{self.revision}"}}
+
+    def _bullets(self, start, end):
+        # 移除各段落開頭的制表符，並以制表符數量作為項目符號層級
+        offset = start
+        while offset > 0 and self.units[offset - 1] != "\n":
+            offset -= 1
+        while offset < end:
+            level = 0
+            while offset < end and self.units[offset] == "\t":
+                self._delete(offset, offset + 1)
+                end -= 1
+                level += 1
+            paragraph_end = self.units.index("\n", offset) + 1
+            for position in range(offset, paragraph_end):
+                self.paragraphs[position] = (self.paragraphs[position][0], level)
+            offset = paragraph_end
+
+    def snapshot(self):
+        """最終文件：各段落的 (文字, 樣式, 項目符號層級)、各編碼單位的超連結與具名範圍。"""
+        paragraphs, start = [], 0
+        for end, unit in enumerate(self.units, 1):
+            if unit == "\n":
+                paragraphs.append(("".join(self.units[start:end]), *self.paragraphs[start]))
+                start = end
+        return paragraphs, self.links, sorted(tuple(named_range) for named_range in self.named_ranges.values())
+
+    def reset_counters(self):
+        self.gets = self.downloaded = self.batch_updates = self.requests = 0
+
+
+class ResyncingBuilder(DocumentBuilder):
+    """改寫前的作法：依序產生請求，建立項目符號後送出請求並重新讀取文件找定位文字。"""
+
+    def __init__(self, service):
+        super().__init__(service, mode="sequential")
+
+    def bullet(self, start, end):
+        tracked = super().bullet(start, end)
+        self._send()
+        located, _ = get_content_start([], self.service, INSERT_POINT)
+        self.api_calls += 1
+        assert located == tracked, f"本地追蹤的索引 {tracked} 與文件中的索引 {located} 不一致"
+        return located
+
+
+def make_data(topics: int, questions: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    data = {'total_score': 0, 'total_num': 0, 'topics': [], 'chart_path': ["https://example.com/total.png"],
+            'suggestions': [f"{stage}建議 🚀" if i % 2 == 0 else "" for i, stage in enumerate(STAGE_ORDER)]}
+    for t in range(topics):
+        topic = {'topic': f"主題 {t + 1}", 'not_applicable': False, 'topic_score': 0, 'topic_num': 0,
+                 'chart_path': [f"https://example.com/{t}-gauge.png", f"https://example.com/{t}-radial.png"],
+                 'chart_cat': ['gauge', 'radial'], 'questions': []}
+        for q in range(questions):
+            items = []
+            for i in range(rng.randint(1, 6)):
+                check = rng.random() < 0.5
+                items.append({'item': f"項目 {t}-{q}-{i}", 'note': "", 'refined_note': rng.choice(["", f"現況說明 {i} 😀"]),
+                              'check': check,
+                              'best_practice': [] if check else [f"實務 {i}", "NA"],
+                              'best_practice_ref': [] if check else [f"https://example.com/bp/{i}", f"參考文件 {i}"]})
+            score = sum(item['check'] for item in items)
+            topic['questions'].append({'question': f"問題 {t}-{q}", 'not_applicable': q == 1, 'items': items,
+                                       'stage': rng.choice(["", "短期"]), 'score': score, 'num': len(items),
+                                       'client_condition': f"現況 {q}", 'improvement_plan': rng.choice(["", "改善計畫"])})
+            topic['topic_score'] += score
+            topic['topic_num'] += len(items)
+        data['topics'].append(topic)
+        data['total_score'] += topic['topic_score']
+        data['total_num'] += topic['topic_num']
+    data['topics'].append({'topic': QUESTIONNAIRE_END_MARKER, 'not_applicable': False})
+    return data
+
+
+def edit_condition(data):
+    data['topics'][1]['questions'][0]['client_condition'] = "更新後的現況"
+
+
+def edit_check(data):
+    question = data['topics'][0]['questions'][2]
+    item = question['items'][0]
+    delta = -1 if item['check'] else 1
+    item['check'] = not item['check']
+    question['score'] += delta
+    data['topics'][0]['topic_score'] += delta
+    data['total_score'] += delta
+
+
+def edit_add_topic(data):
+    topic = copy.deepcopy(data['topics'][0])
+    topic['topic'] = "新增的主題"
+    data['topics'].insert(-1, topic)
+    data['total_score'] += topic['topic_score']
+    data['total_num'] += topic['topic_num']
+
+
+def edit_remove_question(data):
+    data['topics'][-2]['questions'][-1]['not_applicable'] = True
+
+
+EDITS = [
+    ("修改 1 個問題的現況", edit_condition),
+    ("1 個項目改為已/未達成", edit_check),
+    ("新增 1 個主題", edit_add_topic),
+    ("移除 1 個問題", edit_remove_question),
+]
+
+
+def run(make_builder, data, document=None):
+    document = FakeDocument(TEMPLATE) if document is None else document
+    google_docs.DocumentBuilder = make_builder
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_report(document, data)
+    finally:
+        google_docs.DocumentBuilder = DocumentBuilder
+    return document, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    # 假文件不需要速率限制，圖片連結也不需實際檢查
+    google_docs.image_ready = lambda uri: True
+    google_docs.execute = lambda api, request: request.execute()
+
+    builders = [
+        ("resync", ResyncingBuilder),
+        ("sequential", functools.partial(DocumentBuilder, mode="sequential")),
+        ("planned", functools.partial(DocumentBuilder, mode="planned")),
+    ]
+    for topics, questions in [(3, 4), (8, 10)]:
+        data = make_data(topics, questions)
+        results = [(name, *run(make_builder, data)) for name, make_builder in builders]
+        expected = results[0][1].snapshot()
+        for name, document, _ in results:
+            assert document.snapshot() == expected, f"{name} 產生的文件內容與改寫前不同"
+            assert INSERT_POINT not in "".join(document.units)
+
+        print(f"{topics} 主題 x {questions} 問題（文件 {len(results[0][1].units):,} 個索引）")
+        for name, document, elapsed in results:
+            print(f"  {name:>10} | GET {document.gets:>4} 次，下載 {document.downloaded:>9,} 個索引"
+                  f" | batchUpdate {document.batch_updates:>4} 次，{document.requests:>5,} 個請求 | {elapsed * 1000:7.1f} ms")
+
+        # 重新執行：只重寫有變更的區段，結果須與以新資料完整寫入相同
+        for label, edit in EDITS:
+            edited = copy.deepcopy(data)
+            edit(edited)
+            document = copy.deepcopy(results[-1][1])
+            document.reset_counters()
+            document, elapsed = run(DocumentBuilder, edited, document)
+            assert document.snapshot() == run(DocumentBuilder, edited)[0].snapshot(), f"{label}：增量更新的結果與完整寫入不同"
+            print(f"  {label:<12} | GET {document.gets:>4} 次，下載 {document.downloaded:>9,} 個索引"
+                  f" | batchUpdate {document.batch_updates:>4} 次，{document.requests:>5,} 個請求 | {elapsed * 1000:7.1f} ms")
@@ -0,0 +1,334 @@
+"""
+問卷解析引擎的基準測試：比較改寫前的 df.iterrows 狀態機與
+向量化的 parse_questionnaire（經由 process_sheet_data），並確認兩者輸出的
+data 字典與寫回試算表的內容完全相同。
+
+AI 呼叫以固定輸出的假函式取代並依序執行，只量測解析本身的 CPU 時間。
+
+執行方式（於專案根目錄）：
+    python -m benchmarks.bench_sheet_parser
+"""
+import contextlib
+import gc
+import io
+import random
+import time
+
+import google_api.google_sheets as google_sheets
+from google_api.google_sheets import SHEET_COLUMNS, clean_sheet_data, process_best_practice, process_sheet_data, summarize_condition_and_improvement
+from google_api.google_sheets_merges import check_cell_merge_status
+from settings import QUESTIONNAIRE_END_MARKER, STAGE_ORDER
+
+ENABLE_AI_GENERATION = True
+SLEEP = 0  # 假工作表不需等待 API 速率限制
+
+
+def llm(llm_name, task, topic, content):
+    """固定輸出的假 LLM，讓兩個版本的結果可以直接比對。"""
+    return f"[{task}] {topic} {len(content)}\n"
+
+
+class RecordingWorksheet:
+    """記錄最後寫入值的假工作表。"""
+
+    def __init__(self):
+        self.cells = {}
+
+    def update_cell(self, row, col, value):
+        self.cells[(row, col)] = value
+
+
+# 改寫前的逐列處理版本（df.iterrows 狀態機），原樣保留作為效能與輸出比對的基準
+def legacy_process_sheet_data(df, worksheet, merges):
+    """
+    根據 DataFrame 中的資料，依主題與問題進行分類、計分與資料統整，
+    並利用 Google Sheet API 更新相關欄位。
+
+    :param df: 清理後的 DataFrame
+    :param worksheet: Google Sheet 工作表對象
+    :param merges: 合併儲存格範圍列表
+    :return: 處理後的資料字典
+    """
+    data = {
+        'total_score': 0,
+        'total_num': 0,
+        'topics': []
+    }
+
+    num_topic, is_new_topic = -1, True 
+    num_area, current_area = -1, ""
+    num_question, idx_question, idx_question_prev = -1, 0, 0
+
+    temp_score, temp_num = 0, 0
+
+    # 依照 settings.py 中 STAGE_ORDER 順序初始化，用於蒐集改善建議所須數據
+    suggestion_collection = {}
+    for stage in STAGE_ORDER:
+        suggestion_collection[stage] = []
+
+    for idx, row in df.iterrows():
+        # 若項目為空則略過
+        if row['item'] == "":
+            continue
+
+        # 遇到新主題時更新主題資料
+        if row['topic'] != "":
+            if num_topic != -1:
+                # 判斷該主題下所有問題是否皆標記為不適用
+                topic_not_applicable = all(q['not_applicable'] for q in data['topics'][num_topic]['questions'])
+                data['topics'][num_topic]['not_applicable'] = topic_not_applicable
+
+            is_new_topic = True
+            num_topic += 1
+            data['topics'].append({
+                'topic': row['topic'],
+                'topic_score': 0,
+                'topic_num': 0,
+                'questions': [],
+                'not_applicable': False
+            })
+        
+        # 更新當前區域資訊
+        if row['area'] != "":
+            if is_new_topic:
+                num_area = -1
+            current_area = row['area']
+            num_area += 1
+
+        # 當遇到新問題時，先更新上一問題的分數及統整資訊
+        if row['question'] != "":
+            idx_question_prev = idx_question
+            idx_question = idx
+            if idx != 0:
+                nt, nq = num_topic, num_question
+                if is_new_topic:
+                    nt -= 1
+                    nq = len(data['topics'][nt]['questions']) - 1
+                    num_question = -1
+
+                data['topics'][nt]['questions'][nq]['score'] = temp_score
+                data['topics'][nt]['questions'][nq]['num'] = temp_num
+
+                if not data['topics'][nt]['questions'][nq]['not_applicable']:
+                    data['topics'][nt]['topic_score'] += temp_score
+                    data['topics'][nt]['topic_num'] += temp_num
+                    data['total_num'] += temp_num
+                    data['total_score'] += temp_score
+
+                temp_score, temp_num = 0, 0
+
+                # 統整客戶現況與改善建議
+                nt, nq = num_topic, num_question
+                if is_new_topic:
+                    nt -= 1
+                    nq = len(data['topics'][nt]['questions']) - 1
+                
+                if not data['topics'][nt]['questions'][nq]['not_applicable']:
+                    client_condition, improvement_plan = summarize_condition_and_improvement(
+                        data['topics'][nt]['questions'][nq]['items']
+                    )
+                    if not client_condition:
+                        client_condition = data['topics'][nt]['questions'][nq]['client_condition']
+                    if not improvement_plan:
+                        improvement_plan = data['topics'][nt]['questions'][nq]['improvement_plan']
+                    
+                    worksheet.update_cell(idx_question_prev + 2, df.columns.get_loc('client_condition') + 1, client_condition)
+                    time.sleep(SLEEP)
+                    worksheet.update_cell(idx_question_prev + 2, df.columns.get_loc('improvement_plan') + 1, improvement_plan)
+                    time.sleep(SLEEP)
+                    data['topics'][nt]['questions'][nq]['client_condition'] = client_condition
+                    data['topics'][nt]['questions'][nq]['improvement_plan'] = improvement_plan
+
+                    # 蒐集改善建議所須數據
+                    stage = data['topics'][nt]['questions'][nq]['stage'] if data['topics'][nt]['questions'][nq]['stage'] else "其他"
+                    suggestion_collection[stage].append({
+                        'topic': data['topics'][nt]['topic'],
+                        'client_condition': client_condition,
+                        'improvement_plan': improvement_plan,
+                    })
+                
+                # else:
+                #     worksheet.update_cell(idx_question_prev + 2, df.columns.get_loc('improvement_plan') + 1, "SKIPPED")
+                #     time.sleep(SLEEP)
+
+                print(f"\n  ❏ Topic 「{data['topics'][nt]['topic']}」 問題 {nq + 1} 讀取完成")
+
+            # 新增該問題的初始資料
+            data['topics'][num_topic]['questions'].append({
+                'score': 0,
+                'num': 0,
+                'client_condition': row['client_condition'],
+                'improvement_plan': row['improvement_plan'],
+                'area': current_area,
+                'question': row['question'],
+                'stage': row['stage'],
+                'items': [],
+                'not_applicable': False
+            })
+            num_question += 1
+
+        # 判斷該項目的狀態
+        check = True if row['check'] == 'TRUE' else False
+
+        # 若項目為 "以上皆非"，且未勾選且暫時分數為 0，則標記此問題不適用
+        if row['item'] == "以上皆非":
+            if (not check) and (temp_score == 0):
+                data['topics'][num_topic]['questions'][num_question]['not_applicable'] = True
+            continue
+
+        # 處理 Best Practice 與其 Reference
+        bp, bpr = row['best_practice'], row['best_practice_ref']
+        if row['best_practice'] == "":
+            # 若本行資料為空，嘗試從合併儲存格取得資料
+            row_idx_bp = check_cell_merge_status(idx + 1, df.columns.get_loc('best_practice'), merges) - 1
+            if row_idx_bp != -1:
+                bp = df.iloc[row_idx_bp, df.columns.get_loc('best_practice')]
+                bpr = df.iloc[row_idx_bp, df.columns.get_loc('best_practice_ref')]
+        
+        best_practice, best_practice_ref = process_best_practice(row['item'], bp, bpr)
+
+        # 處理客戶現況備註，並在啟用 AI 生成時進行修正
+        refined_note = row['refined_note']
+        if ENABLE_AI_GENERATION:
+            refined_note = llm("gemini", "refine_client_status_notes", row['item'], row['note'])
+            worksheet.update_cell(idx + 2, df.columns.get_loc('refined_note') + 1, refined_note)
+            time.sleep(SLEEP)
+        refined_note = refined_note.replace("\n", "")
+
+        best_practice_content = row['best_practice_content'] if row['best_practice_content'] else ""
+
+        # if row['best_practice'] != "":
+        #     best_practice_content = row['best_practice_content'] if row['best_practice_content'] else best_practice_content_scraper(best_practice_ref, best_practice)
+        #     worksheet.update_cell(idx + 2, df.columns.get_loc('best_practice_content') + 1, best_practice_content)
+        #     time.sleep(SLEEP)
+        
+        data['topics'][num_topic]['questions'][num_question]['items'].append({
+            'check': check,
+            'item': row['item'],
+            'note': row['note'],
+            'refined_note': refined_note,
+            'best_practice': best_practice,
+            'best_practice_ref': best_practice_ref,
+            'best_practice_content': best_practice_content
+        })
+        best_practice, best_practice_ref = "", ""
+        
+        if check:
+            temp_score += 1
+
+        temp_num += 1
+        is_new_topic = False
+
+    # 將蒐集到的數據統整為改善建議
+    suggestions = [df.iloc[_, df.columns.get_loc('suggestion')] for _ in range(len(STAGE_ORDER))]
+    for i, stage in enumerate(STAGE_ORDER):
+        if ENABLE_AI_GENERATION and suggestion_collection[stage]:
+            suggestions[i] = llm("gemini", "summarize_suggestion", stage, str(suggestion_collection[stage]))
+            worksheet.update_cell(2 + i, df.columns.get_loc('suggestion') + 1, suggestions[i])
+            time.sleep(SLEEP)
+    data['suggestions'] = suggestions
+
+    return data
+
+
+def synthetic_questionnaire(num_topics: int, questions_per_topic: int, seed: int = 0):
+    """
+    產生與問卷相同欄位的假資料與對應的合併範圍（Best Practice 欄位跨多個項目合併）。
+
+    :return: (columns, merges)，columns 與 fetch_sheet_data 的回傳格式相同
+    """
+    rng = random.Random(seed)
+    headers = [
+        'Topics', 'Best Practice Areas', 'Questions', 'Suggested Development Stages',
+        'Client Conditions', 'Suggested Improvements', 'Checklist', 'Items',
+        'Client Status Notes', 'Refined Notes', 'GCP Best Practices',
+        'GCP Best Practice References', 'GCP Best Practice Content', 'Suggestion'
+    ]
+    bp_col = headers.index('GCP Best Practices')
+    bpr_col = headers.index('GCP Best Practice References')
+    records, merges = [], []
+
+    def add_row(**values):
+        row = {header: "" for header in headers}
+        row.update(values)
+        records.append(row)
+
+    for t in range(num_topics):
+        for q in range(questions_per_topic):
+            first = True
+            num_items = rng.randint(2, 6)
+            for i in range(num_items):
+                row_idx = len(records) + 1  # 合併範圍的列索引（第 0 列為標題列）
+                values = {
+                    'Checklist': rng.choice(['TRUE', 'FALSE']),
+                    'Items': f"item {t}-{q}-{i}",
+                    'Client Status Notes': f"note {t}-{q}-{i}" if rng.random() < 0.7 else "",
+                    'Refined Notes': f"refined\nnote {i}",
+                }
+                if first:
+                    values.update({
+                        'Topics': f"Topic {t}" if q == 0 else "",
+                        'Best Practice Areas': f"Area {t}-{q // 3}" if q % 3 == 0 else "",
+                        'Questions': f"Q{t}-{q}. How do you handle aspect {q}?",
+                        'Suggested Development Stages': rng.choice(STAGE_ORDER + [""]),
+                        'Client Conditions': f"condition {t}-{q}",
+                        'Suggested Improvements': f"improvement {t}-{q}",
+                    })
+                    first = False
+                if i % 2 == 0 or i == num_items - 1:
+                    values['GCP Best Practices'] = f"bp {t}-{q}-{i}\nbp extra"
+                    values['GCP Best Practice References'] = f"https://example.com/{t}/{q}/{i}"
+                elif rng.random() < 0.8:
+                    merges.append({
+                        'startRowIndex': row_idx - 1, 'endRowIndex': row_idx + 1,
+                        'startColumnIndex': bp_col, 'endColumnIndex': bp_col + 1
+                    })
+                    merges.append({
+                        'startRowIndex': row_idx - 1, 'endRowIndex': row_idx + 1,
+                        'startColumnIndex': bpr_col, 'endColumnIndex': bpr_col + 1
+                    })
+                add_row(**values)
+            add_row(**{'Items': "以上皆非", 'Checklist': rng.choice(['TRUE', 'FALSE', 'FALSE'])})
+            if rng.random() < 0.1:
+                add_row()  # 空白列
+
+    add_row(**{'Topics': QUESTIONNAIRE_END_MARKER, 'Questions': QUESTIONNAIRE_END_MARKER, 'Items': QUESTIONNAIRE_END_MARKER})
+    for i in range(len(STAGE_ORDER)):
+        records[i]['Suggestion'] = f"suggestion {i}"
+    return {header: [row[header] for row in records] for header in headers}, merges
+
+
+def run(engine, *args):
+    worksheet = RecordingWorksheet()
+    gc.collect()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        data = engine(args[0], worksheet, *args[1:])
+        elapsed = time.perf_counter() - start
+    return data, worksheet.cells, elapsed
+
+
+def bench(num_topics: int, questions_per_topic: int) -> None:
+    columns, merges = synthetic_questionnaire(num_topics, questions_per_topic)
+    df = clean_sheet_data(columns)
+    sheet_columns = {SHEET_COLUMNS[name]: i for i, name in enumerate(columns)}
+
+    legacy_data, legacy_cells, legacy_time = run(legacy_process_sheet_data, df, merges)
+    data, cells, elapsed = run(process_sheet_data, df, merges, sheet_columns)
+
+    assert data == legacy_data, "parsed data differs from the iterrows engine"
+    assert cells == legacy_cells, "sheet write-back differs from the iterrows engine"
+    print(f"rows={len(df):>6} | iterrows {legacy_time * 1000:9.2f} ms | "
+          f"columnar {elapsed * 1000:9.2f} ms | speedup x{legacy_time / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    google_sheets.llm = llm
+    google_sheets.llm_map = lambda func, args_list: [func(*args) for args in args_list]  # 只量測解析本身，不含執行緒池
+    google_sheets.llm_imap = lambda func, args_list: (func(*args) for args in args_list)
+    google_sheets.refine_client_status_notes = lambda llm_name, groups, on_group=None: [
+        [llm(llm_name, "refine_client_status_notes", item, note) for item, note in group] for group in groups
+    ]
+    google_sheets.ENABLE_AI_GENERATION = ENABLE_AI_GENERATION
+    for topics, questions in ((6, 10), (6, 60), (12, 150)):
+        bench(topics, questions)
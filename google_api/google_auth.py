@@ -2,7 +2,6 @@ import os
 import pickle
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-import gspread
 from googleapiclient.discovery import build
 from settings import *
 
@@ -12,8 +11,7 @@ def authenticate_services():
       - 嘗試從檔案載入憑證；如果不存在或無效，則透過 OAuth 流程進行授權，
         並將新的憑證保存至檔案中。
       - 初始化並回傳以下服務對象：
-          • sheets_service: 透過 gspread 操作 Google Sheets
-          • sheets_service_for_merged_range: 用於取得合併儲存格範圍的 Sheets API (v4)
+          • sheets_service: 用於讀寫 Google Sheets 的 API (v4)
           • docs_service: 用於操作 Google Docs 的 API (v1)
           • drives_service: 用於上傳檔案至 Google Drive 的 API (v3)
     """
@@ -36,9 +34,8 @@ def authenticate_services():
             pickle.dump(creds, token_file)
 
     # 初始化各 Google API 服務
-    sheets_service = gspread.authorize(creds)
-    sheets_service_for_merged_range = build('sheets', 'v4', credentials=creds)
+    sheets_service = build('sheets', 'v4', credentials=creds)
     docs_service = build('docs', 'v1', credentials=creds)
     drives_service = build('drive', 'v3', credentials=creds)
 
-    return sheets_service, sheets_service_for_merged_range, docs_service, drives_service
\ No newline at end of file
+    return sheets_service, docs_service, drives_service
\ No newline at end of file
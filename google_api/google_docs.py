@@ -1,5 +1,39 @@
+import json
+import re
 import time
+
+import requests as http_requests
+from googleapiclient.errors import HttpError
+
+from google_api.google_docs_sections import REPORT_DATE_RANGE, existing_sections, maturity, plan_section_updates, question_content, report_sections
 from settings import *
+from utils.rate_limiter import execute
+
+# 圖片無法取得時插入的佔位符（與圖片同樣佔 1 個索引，不影響其他請求的索引）
+IMAGE_PLACEHOLDER = '\u25a1'
+
+def text_length(text: str) -> int:
+    """
+    計算文字在 Google Docs 中佔用的索引長度（以 UTF-16 編碼單位計算，emoji 等字元佔 2 個索引）。
+
+    :param text: 文字
+    :return: 索引長度
+    """
+    return len(text.encode('utf-16-le')) // 2
+
+def paragraph_text(text: str, indent: int = 0) -> str:
+    """
+    insert_text 實際插入的文字：縮排層級為 2 時在前方加入制表符，並以換行結尾。
+
+    :param text: 要插入的文字
+    :param indent: 縮排層級
+    :return: 實際插入的文字（text 為空字串時回傳空字串）
+    """
+    if text == "":
+        return ""
+    if indent == 2:
+        text = '\t' + text
+    return f"{text}\n"
 
 def update_doc(service, requests: list) -> list:
     """
@@ -10,35 +44,89 @@ def update_doc(service, requests: list) -> list:
     :return: 清空後的請求列表
     """
     if requests:
-        service.documents().batchUpdate(documentId=GOOGLE_DOC_ID, body={"requests": requests}).execute()
-        time.sleep(SLEEP)
+        batch_update(service, requests)
     return []
 
-def get_content_start(requests: list, service, target_text: str) -> (int, list):
+def batch_update(service, requests: list, revision_id: str = None) -> str:
     """
-    尋找文件中指定的定位文字，並回傳其起始索引。
+    發送批次更新請求到 Google Docs。
+
+    指定 revision_id 時以 writeControl.requiredRevisionId 限定請求只能套用於該版本的文件：
+    索引依該版本計算，伺服器已套用但回應逾時或 5xx 而重送時，文件版本已改變，重送的請求會被拒絕，不會重複寫入。
 
-    :param requests: 當前請求列表
     :param service: Google Docs API 服務對象
-    :param target_text: 定位用的文字（必須存在於文件中）
-    :return: (找到的起始索引, 更新後的請求列表)；若未找到則回傳 0
+    :param requests: 請求列表
+    :param revision_id: 請求所依據的文件版本 ID，None 時不限定版本
+    :return: 套用後的文件版本 ID（供下一次批次更新使用）
     """
-    requests = update_doc(service, requests)
-    doc = service.documents().get(documentId=GOOGLE_DOC_ID).execute()
-    time.sleep(SLEEP)
-    content = doc.get('body').get('content')
+    body = {"requests": requests}
+    if revision_id:
+        body["writeControl"] = {"requiredRevisionId": revision_id}
+    response = execute("docs", service.documents().batchUpdate(documentId=GOOGLE_DOC_ID, body=body))
+    return (response or {}).get('writeControl', {}).get('requiredRevisionId')
+
+def get_document(service) -> dict:
+    """
+    讀取整份 Google Docs 文件。
+
+    :param service: Google Docs API 服務對象
+    :return: 文件內容（含具名範圍）
+    """
+    return execute("docs", service.documents().get(documentId=GOOGLE_DOC_ID))
 
-    for element in content:
+def find_text_start(doc: dict, target_text: str) -> int:
+    """
+    在文件內容中尋找指定文字所在段落的起始索引。
+
+    :param doc: documents().get() 回傳的文件內容
+    :param target_text: 要尋找的文字
+    :return: 段落的起始索引；若未找到則回傳 0
+    """
+    for element in doc.get('body').get('content'):
         if 'paragraph' in element:
             paragraph = element['paragraph']
             start_index = element.get('startIndex', 0)
             if paragraph['elements'] and 'textRun' in paragraph['elements'][0]:
                 text = paragraph['elements'][0]['textRun']['content']
                 if target_text in text:
-                    return start_index, requests
+                    return start_index
+    return 0
 
-    print(f"\n  \033[31m[ERROR]: 未找到定位文字，請於文件模板中加入定位文字: 「{target_text}」\033[0m\n")
-    return 0, requests
+def find_text_ranges(doc: dict, target_text: str) -> list:
+    """
+    在文件內文中尋找指定文字出現的所有位置（文字須位於同一個文字段落元素內）。
+
+    :param doc: documents().get() 回傳的文件內容
+    :param target_text: 要尋找的文字
+    :return: [(起始索引, 結束索引)]
+    """
+    ranges = []
+    for element in doc.get('body').get('content'):
+        for run in element.get('paragraph', {}).get('elements', []):
+            if 'textRun' not in run:
+                continue
+            text = run['textRun']['content']
+            offset = text.find(target_text)
+            while offset != -1:
+                start = run.get('startIndex', 0) + text_length(text[:offset])
+                ranges.append((start, start + text_length(target_text)))
+                offset = text.find(target_text, offset + len(target_text))
+    return ranges
+
+def get_content_start(requests: list, service, target_text: str) -> (int, list):
+    """
+    尋找文件中指定的定位文字，並回傳其起始索引。
+
+    :param requests: 當前請求列表
+    :param service: Google Docs API 服務對象
+    :param target_text: 定位用的文字（必須存在於文件中）
+    :return: (找到的起始索引, 更新後的請求列表)；若未找到則回傳 0
+    """
+    requests = update_doc(service, requests)
+    start_index = find_text_start(get_document(service), target_text)
+    if start_index == 0:
+        print(f"\n  \033[31m[ERROR]: 未找到定位文字，請於文件模板中加入定位文字: 「{target_text}」\033[0m\n")
+    return start_index, requests
 
 def insert_text(requests: list, text: str, style: str = "NORMAL_TEXT", startIndex: int = 1, indent: int = 0) -> (int, list):
     """
@@ -51,14 +139,11 @@ def insert_text(requests: list, text: str, style: str = "NORMAL_TEXT", startInde
     :param indent: 縮排層級（若為 2，則在文字前加入制表符）
     :return: (更新後的插入位置索引, 更新後的請求列表)
     """
+    text = paragraph_text(text, indent)
     if text == "":
-        return startIndex + len(text), requests
+        return startIndex, requests
 
-    if indent == 2:
-        text = '\t' + text
-
-    text = f"{text}\n"
-    text_length = len(text)
+    length = text_length(text)
 
     insert_request = {
         "insertText": {
@@ -70,7 +155,7 @@ def insert_text(requests: list, text: str, style: str = "NORMAL_TEXT", startInde
         'updateParagraphStyle': {
             'range': {
                 'startIndex': startIndex,
-                'endIndex': startIndex + text_length,
+                'endIndex': startIndex + length,
             },
             'paragraphStyle': {
                 'namedStyleType': style,
@@ -79,19 +164,17 @@ def insert_text(requests: list, text: str, style: str = "NORMAL_TEXT", startInde
         }
     }
     requests.extend([insert_request, style_request])
-    return startIndex + text_length, requests
+    return startIndex + length, requests
 
-def insert_bullet(requests: list, service, startIndex: int, endIndex: int) -> (int, list):
+def insert_bullet(requests: list, startIndex: int, endIndex: int) -> list:
     """
-    為指定範圍內的段落創建項目符號。
+    為指定範圍內的段落創建項目符號（Google Docs 會移除各段落開頭用來表示層級的制表符）。
 
     :param requests: 當前請求列表
-    :param service: Google Docs API 服務對象
     :param startIndex: 範圍起始索引
     :param endIndex: 範圍結束索引
-    :return: (定位符所在索引, 更新後的請求列表)
+    :return: 更新後的請求列表
     """
-    requests = update_doc(service, requests)
     requests.append({
         'createParagraphBullets': {
             'range': {
@@ -101,8 +184,7 @@ def insert_bullet(requests: list, service, startIndex: int, endIndex: int) -> (i
             'bulletPreset': 'BULLET_DISC_CIRCLE_SQUARE',
         }
     })
-    text_here, requests = get_content_start(requests, service, INSERT_POINT)
-    return text_here, requests
+    return requests
 
 def insert_link(requests: list, startIndex: int, endIndex: int, url: str) -> list:
     """
@@ -130,54 +212,103 @@ def insert_link(requests: list, startIndex: int, endIndex: int, url: str) -> lis
     })
     return requests
 
-def insert_image(requests: list, insertIndex: int, path: str, img_serial_num: int, img_num: int, img_cat='gauge') -> (int, list):
+def insert_image(requests: list, insertIndex: int, path: str, img_cat='gauge') -> list:
     """
-    在指定位置插入圖片，並根據是否為最後一張圖片決定換行格式。
+    在指定位置插入圖片（圖片在文件中佔 1 個索引）。
 
     :param requests: 當前請求列表
-    :param insertIndex: 插入位置的起始索引
+    :param insertIndex: 插入位置索引
     :param path: 圖片的 URL
-    :param img_serial_num: 當前圖片序號
-    :param img_num: 圖片總數
-    :param img_cat: 圖片類型（例如 'gauge' 或 'radial'）
-    :return: (更新後的插入位置索引, 更新後的請求列表)
+    :param img_cat: 圖片類型（'gauge'、'radial'、'combined' 或 'total'）
+    :return: 更新後的請求列表
     """
-    if img_serial_num != 0:
-        insertIndex -= len("\n")
-
-    img_height = {'gauge': 130, 'radial': 130, 'total': 200}
-
     requests.append({
         'insertInlineImage': {
             'location': {'index': insertIndex},
             'uri': path,
             'objectSize': {
-                'height': {'magnitude': img_height[img_cat], 'unit': 'PT'},
+                'height': {'magnitude': DOC_IMAGE_HEIGHTS_PT[img_cat], 'unit': 'PT'},
                 # 'width': {'magnitude': img_width[img_cat], 'unit': 'PT'}
             }
         }
     })
-    time.sleep(SLEEP_IMAGE_PROCESSING)
+    return requests
 
-    # 插入換行或空白以確保定位符正確換行
-    if img_serial_num == img_num - 1:
-        insertIndex, requests = insert_text(requests, " ", "NORMAL_TEXT", insertIndex + 1)
-    else:
-        insertIndex, requests = insert_text(requests, "          ", "NORMAL_TEXT", insertIndex + 1)
+def image_ready(uri: str) -> bool:
+    """
+    確認圖片連結可公開取得：以 HEAD 請求（伺服器不支援時改以只讀取 1 byte 的 GET）檢查回應內容為圖片。
+
+    :param uri: 圖片的 URL
+    :return: 是否可取得
+    """
+    try:
+        response = http_requests.head(uri, allow_redirects=True, timeout=10)
+        if response.status_code == 405:
+            response = http_requests.get(uri, headers={'Range': 'bytes=0-0'}, allow_redirects=True, stream=True, timeout=10)
+            response.close()
+    except http_requests.RequestException:
+        return False
+    return response.ok and response.headers.get('Content-Type', '').startswith('image/')
+
+def wait_images_ready(uris, timeout: float = DOC_IMAGE_READY_TIMEOUT) -> set:
+    """
+    輪詢圖片連結直到全部可取得或逾時（間隔由 0.5 秒起逐次加倍，最多 5 秒）。
+
+    :param uris: 圖片 URL 列表
+    :param timeout: 等待秒數上限
+    :return: 逾時後仍無法取得的圖片 URL
+    """
+    pending = set(uris)
+    deadline = time.monotonic() + timeout
+    delay = 0.5
+    while True:
+        pending = {uri for uri in pending if not image_ready(uri)}
+        if not pending or time.monotonic() + delay > deadline:
+            return pending
+        time.sleep(delay)
+        delay = min(delay * 2, 5)
+
+def failed_image_request(error: HttpError):
+    """
+    從 batchUpdate 的錯誤訊息找出無法取得圖片的請求位置（例如 "Invalid requests[12].insertInlineImage"）。
 
-    return insertIndex, requests
+    :param error: batchUpdate 回傳的 HttpError
+    :return: 該請求在請求列表中的位置；非圖片造成的錯誤回傳 None
+    """
+    message = (error.content or b"").decode('utf-8', 'ignore') + str(error)
+    match = re.search(r"requests\[(\d+)\]\.insertInlineImage", message)
+    return int(match.group(1)) if match else None
+
+def image_placeholder(request: dict) -> dict:
+    """
+    將插入圖片的請求改為在同一位置插入佔位符文字。
+
+    :param request: insertInlineImage 請求
+    :return: insertText 請求
+    """
+    print(f"\n  \033[33m[WARNING]: 無法取得圖片，已以佔位符取代: {request['insertInlineImage']['uri']}\033[0m")
+    return {"insertText": {"location": request['insertInlineImage']['location'], "text": IMAGE_PLACEHOLDER}}
 
-def delete_text(requests: list, service, text: str) -> list:
+def delete_text(requests: list, startIndex: int, text: str) -> list:
     """
-    刪除文件中指定的文字範圍。
+    刪除文件中從指定位置開始的文字。
 
     :param requests: 當前請求列表
-    :param service: Google Docs API 服務對象
+    :param startIndex: 文字的起始索引
     :param text: 要刪除的文字
     :return: 更新後的請求列表
     """
-    startIndex, requests = get_content_start(requests, service, text)
-    endIndex = startIndex + len(text)
+    return delete_range(requests, startIndex, startIndex + text_length(text))
+
+def delete_range(requests: list, startIndex: int, endIndex: int) -> list:
+    """
+    刪除文件中指定範圍的內容。
+
+    :param requests: 當前請求列表
+    :param startIndex: 範圍起始索引
+    :param endIndex: 範圍結束索引
+    :return: 更新後的請求列表
+    """
     requests.append({
         'deleteContentRange': {
             'range': {'startIndex': startIndex, 'endIndex': endIndex}
@@ -185,6 +316,34 @@ def delete_text(requests: list, service, text: str) -> list:
     })
     return requests
 
+def create_named_range(requests: list, name: str, startIndex: int, endIndex: int) -> list:
+    """
+    以具名範圍標記文件中的一段內容（範圍會隨之後的編輯自動調整）。
+
+    :param requests: 當前請求列表
+    :param name: 具名範圍名稱
+    :param startIndex: 範圍起始索引
+    :param endIndex: 範圍結束索引
+    :return: 更新後的請求列表
+    """
+    requests.append({
+        'createNamedRange': {
+            'name': name,
+            'range': {'startIndex': startIndex, 'endIndex': endIndex}
+        }
+    })
+    return requests
+
+def delete_named_range(requests: list, range_id: str) -> list:
+    """
+    移除具名範圍（不影響範圍內的內容）。
+
+    :param requests: 當前請求列表
+    :param range_id: 具名範圍 ID
+    :return: 更新後的請求列表
+    """
+    requests.append({'deleteNamedRange': {'namedRangeId': range_id}})
+    return requests
 
 def merge_data(requests: list, placeholder: str, text: str) -> list:
     """
@@ -207,153 +366,579 @@ def merge_data(requests: list, placeholder: str, text: str) -> list:
     })
     return requests
 
+def replace_named_range_content(requests: list, name: str, text: str) -> list:
+    """
+    將具名範圍（同名的所有範圍）的內容替換為指定文字，具名範圍隨之涵蓋新的文字。
+
+    :param requests: 當前請求列表
+    :param name: 具名範圍名稱
+    :param text: 替換為的文字
+    :return: 更新後的請求列表
+    """
+    requests.append({'replaceNamedRangeContent': {'namedRangeName': name, 'text': text}})
+    return requests
+
+class DocumentBuilder:
+    """
+    報告寫入器：只在開始時查詢一次定位文字的位置，之後在本地追蹤索引，不再於中途重新讀取文件。
+
+      - 以 UTF-16 編碼單位記錄自定位點起插入的內容（圖片佔 1 個索引），定位文字的索引隨插入內容後移
+      - 建立項目符號時，依本地內容扣除 Google Docs 移除的段落開頭制表符
+      - "sequential" 模式：依呼叫順序產生請求，每個請求的索引對應當下的文件內容
+      - "planned" 模式：先記錄整份報告，送出時以一個 insertText 插入全部文字，接著套用樣式與連結，
+        最後由後往前建立項目符號與插入圖片（兩者會改變之後內容的索引），所有索引都以固定的定位點計算
+      - 請求累積超過 DOC_BATCH_MAX_BYTES 或呼叫 flush() 時以一次 batchUpdate 送出
+    """
+
+    IMAGE_UNIT = '\ufffc'.encode('utf-16-le')
+    NEWLINE_UNIT = '\n'.encode('utf-16-le')
+    TAB_UNIT = '\t'.encode('utf-16-le')
+
+    def __init__(self, service, mode: str = DOC_WRITE_MODE, max_bytes: int = DOC_BATCH_MAX_BYTES):
+        """
+        :param service: Google Docs API 服務對象
+        :param mode: 請求產生方式（"planned" 或 "sequential"）
+        :param max_bytes: 單次 batchUpdate 的請求內容大小上限（bytes）
+        """
+        self.service = service
+        self.planned = mode == "planned"
+        self.max_bytes = max_bytes
+        self.requests = []
+        self.request_bytes = 0
+        self.api_calls = 0
+        # 最近一次讀取或寫入後的文件版本 ID，寫入時要求文件仍為此版本
+        self.revision_id = None
+
+        self._reset(0)
+
+    def _reset(self, origin: int) -> None:
+        """
+        清空本地內容，以指定索引作為新的追蹤起點。
+
+        :param origin: 追蹤起點的文件索引
+        """
+        # 本地內容：自定位點起的編碼單位 ID；units[ID] 為該單位的 UTF-16 位元組
+        self.origin = origin
+        self.content = []
+        self.units = []
+        # planned 模式：圖片 ID、被項目符號移除的制表符（依其後的編碼單位 ID 記錄）與待送出的請求
+        self.images = set()
+        self.leading_tabs = {}
+        self.operations = []
+        # 待建立的具名範圍：(名稱, 第一個編碼單位 ID, 最後一個編碼單位 ID)
+        self.named_ranges = []
+
+    @property
+    def anchor(self) -> int:
+        """
+        定位文字（INSERT_POINT）目前所在段落的起始索引。
+        """
+        return self.origin + len(self.content)
+
+    def fetch(self) -> dict:
+        """
+        送出已累積的請求後讀取文件一次。
+
+        :return: 文件內容（含具名範圍）
+        """
+        self.flush()
+        self.api_calls += 1
+        doc = get_document(self.service)
+        self.revision_id = doc.get('revisionId')
+        return doc
+
+    def begin(self, index: int) -> None:
+        """
+        結束目前追蹤的內容，改由指定索引開始寫入（之後的內容插入於該索引之前）。
+
+        :param index: 新的追蹤起點
+        """
+        self.emit()
+        self._reset(index)
+
+    def _unit_id(self, index: int) -> int:
+        """
+        :param index: 文件索引
+        :return: 該索引上的編碼單位 ID
+        """
+        offset = index - self.origin
+        if not 0 <= offset < len(self.content):
+            raise ValueError(f"索引 {index} 不在追蹤範圍 [{self.origin}, {self.anchor}) 內")
+        return self.content[offset]
+
+    def _insert(self, index: int, text) -> list:
+        """
+        在本地內容中記錄插入的文字（UTF-16 編碼單位）。
+
+        :param index: 插入位置索引（須介於定位點與定位文字之間）
+        :param text: 插入的文字，或已編碼的 UTF-16 位元組
+        :return: 插入的編碼單位 ID 列表
+        """
+        offset = index - self.origin
+        if not 0 <= offset <= len(self.content):
+            raise ValueError(f"插入位置 {index} 不在追蹤範圍 [{self.origin}, {self.anchor}] 內")
+        data = text if isinstance(text, bytes) else text.encode('utf-16-le')
+        ids = list(range(len(self.units), len(self.units) + len(data) // 2))
+        self.units.extend(data[i:i + 2] for i in range(0, len(data), 2))
+        self.content[offset:offset] = ids
+        return ids
+
+    def _add(self, *requests) -> None:
+        """
+        累積請求，超過大小上限時先送出已累積的請求。
+        """
+        for request in requests:
+            size = len(json.dumps(request, ensure_ascii=False).encode('utf-8'))
+            if self.requests and self.request_bytes + size > self.max_bytes:
+                self._send()
+            self.requests.append(request)
+            self.request_bytes += size
+
+    def _record(self, request: dict, first: int, last: int = None) -> None:
+        """
+        planned 模式：記錄請求與其作用範圍的編碼單位 ID（索引於送出時計算）。
+
+        :param request: 請求（索引稍後覆寫）
+        :param first: 範圍第一個編碼單位（或圖片）的 ID
+        :param last: 範圍最後一個編碼單位的 ID；圖片為 None
+        """
+        self.operations.append((request, first, last))
+
+    def text(self, text: str, style: str = "NORMAL_TEXT", index: int = None, indent: int = 0) -> int:
+        """
+        插入文字並設置段落樣式（參數同 insert_text）。
+
+        :return: 插入內容之後的索引
+        """
+        index = self.anchor if index is None else index
+        end, requests = insert_text([], text, style, index, indent)
+        if requests:
+            ids = self._insert(index, paragraph_text(text, indent))
+            if self.planned:
+                self._record(requests[1], ids[0], ids[-1])
+            else:
+                self._add(*requests)
+        return end
+
+    def image(self, index: int, uri: str, serial: int, count: int, img_cat: str = 'gauge') -> int:
+        """
+        插入圖片，並根據是否為最後一張圖片決定換行格式（同一列的圖片之間以空白分隔）。
+
+        :param index: 插入位置的起始索引
+        :param uri: 圖片的 URL
+        :param serial: 當前圖片序號
+        :param count: 圖片總數
+        :param img_cat: 圖片類型（'gauge'、'radial'、'combined' 或 'total'）
+        :return: 插入內容之後的索引
+        """
+        if serial != 0:
+            index -= len("\n")
+
+        image_id, = self._insert(index, self.IMAGE_UNIT)
+        request, = insert_image([], index, uri, img_cat)
+        if self.planned:
+            self.images.add(image_id)
+            self._record(request, image_id)
+        else:
+            self._add(request)
+
+        # 插入換行或空白以確保定位符正確換行
+        spacer = " " if serial == count - 1 else "          "
+        return self.text(spacer, "NORMAL_TEXT", index + 1)
+
+    def link(self, start: int, end: int, url: str) -> None:
+        """
+        在指定文字範圍內插入超連結。
+        """
+        request, = insert_link([], start, end, url)
+        if self.planned:
+            self._record(request, self._unit_id(start), self._unit_id(end - 1))
+        else:
+            self._add(request)
+
+    def bullet(self, start: int, end: int) -> int:
+        """
+        為指定範圍內的段落創建項目符號，並扣除各段落開頭被移除的制表符。
+
+        :param start: 範圍起始索引
+        :param end: 範圍結束索引
+        :return: 定位文字所在索引
+        """
+        request, = insert_bullet([], start, end)
+        if self.planned:
+            self._record(request, self._unit_id(start), self._unit_id(end - 1))
+        else:
+            self._add(request)
+
+        # 從範圍起點所在段落的開頭起，逐段移除開頭的制表符
+        offset = start - self.origin
+        while offset > 0 and self.units[self.content[offset - 1]] != self.NEWLINE_UNIT:
+            offset -= 1
+        end_offset = end - self.origin
+        while offset < end_offset:
+            tabs = []
+            while offset < end_offset and self.units[self.content[offset]] == self.TAB_UNIT:
+                tabs.append(self.content.pop(offset))
+                end_offset -= 1
+            if tabs:
+                self.leading_tabs[self.content[offset]] = tabs
+            while offset < end_offset and self.units[self.content[offset]] != self.NEWLINE_UNIT:
+                offset += 1
+            offset += 1
+        return self.anchor
+
+    def name_range(self, name: str, start: int) -> None:
+        """
+        以具名範圍標記從 start 到定位文字之前的內容（於送出時依最終索引建立）。
+
+        :param name: 具名範圍名稱
+        :param start: 範圍起始索引
+        """
+        if start < self.anchor:
+            self.named_ranges.append((name, self._unit_id(start), self._unit_id(self.anchor - 1)))
+
+    def delete_range(self, start: int, end: int) -> None:
+        """
+        刪除追蹤範圍之後的既有內容（須在寫入該位置的內容之前呼叫）。
+        """
+        self._add(*delete_range([], start, end))
+
+    def delete_named_range(self, range_id: str) -> None:
+        """
+        移除具名範圍。
+        """
+        self._add(*delete_named_range([], range_id))
+
+    def add_named_range(self, name: str, start: int, end: int) -> None:
+        """
+        以目前文件的索引建立具名範圍（用於不在追蹤範圍內的既有內容）。
+        """
+        self._add(*create_named_range([], name, start, end))
+
+    def merge(self, placeholder: str, text: str) -> None:
+        """
+        替換文件中的佔位符文字（會改變佔位符之後內容的索引，須在所有依索引的請求之後呼叫）。
+        """
+        self.emit()
+        self._add(*merge_data([], placeholder, text))
+
+    def replace_named_range(self, name: str, text: str) -> None:
+        """
+        替換具名範圍的內容（會改變範圍之後內容的索引，須在所有依索引的請求之後呼叫）。
+        """
+        self.emit()
+        self._add(*replace_named_range_content([], name, text))
+
+    def delete_anchor(self, target_text: str) -> None:
+        """
+        刪除定位文字。
+        """
+        self.emit()
+        self._add(*delete_text([], self.anchor, target_text))
+
+    def _emit_plan(self) -> None:
+        """
+        planned 模式：將記錄的內容轉為以定位點為基準的請求。
+
+        先以一個 insertText 插入所有文字（含之後才由項目符號移除的制表符，不含圖片），
+        依記錄順序套用段落樣式與連結，再依位置由後往前建立項目符號與插入圖片。
+        """
+        if not self.planned or not self.content:
+            return
+
+        # 各編碼單位在插入文字中的位置（圖片為其後第一個文字單位的位置）
+        text_units, position = [], {}
+        for unit_id in self.content:
+            for tab_id in self.leading_tabs.get(unit_id, ()):
+                position[tab_id] = len(text_units)
+                text_units.append(self.units[tab_id])
+            position[unit_id] = len(text_units)
+            if unit_id not in self.images:
+                text_units.append(self.units[unit_id])
+
+        origin = self.origin
+        self._add({"insertText": {"location": {"index": origin}, "text": b"".join(text_units).decode('utf-16-le')}})
+
+        shifting = []
+        for sequence, (request, first, last) in enumerate(self.operations):
+            kind, = request
+            if kind == 'insertInlineImage':
+                request[kind]['location']['index'] = origin + position[first]
+                shifting.append((position[first], 0, sequence, request))
+                continue
+            request[kind]['range'] = {'startIndex': origin + position[first], 'endIndex': origin + position[last] + 1}
+            if kind == 'createParagraphBullets':
+                shifting.append((position[first], 1, sequence, request))
+            else:
+                self._add(request)
+
+        # 由後往前套用，前方內容的索引不受影響；同一位置先建立項目符號再插入圖片
+        self._add(*[request for *_, request in sorted(shifting, key=lambda item: item[:3], reverse=True)])
+
+    def emit(self) -> None:
+        """
+        將目前追蹤的內容轉為請求（planned 模式）並建立具名範圍，之後由定位文字處繼續追蹤。
+        """
+        self._emit_plan()
+        for name, first, last in self.named_ranges:
+            start = self.origin + self.content.index(first)
+            self._add(*create_named_range([], name, start, self.origin + self.content.index(last) + 1))
+        self._reset(self.anchor)
+
+    def _send(self) -> None:
+        """
+        以一次 batchUpdate 送出已累積的請求並清空。
+
+        送出前先等待請求中的圖片連結可取得（逾時仍照常送出，是否可取得以 Google Docs 的結果為準）；
+        Google Docs 無法取得某張圖片而使整批請求失敗時，等待該圖片後重送，超過 DOC_IMAGE_MAX_RETRIES 次才以佔位符取代。
+        """
+        if not self.requests:
+            return
+
+        uris = [request['insertInlineImage']['uri'] for request in self.requests if 'insertInlineImage' in request]
+        unavailable = wait_images_ready(uris)
+        if unavailable:
+            print(f"\n  \033[33m[WARNING]: {len(unavailable)} 張圖片在等待時間內未確認可取得，仍照常插入\033[0m")
+
+        retries = {}
+        while True:
+            try:
+                self.api_calls += 1
+                self.revision_id = batch_update(self.service, self.requests, self.revision_id)
+                self.requests = []
+                break
+            except HttpError as error:
+                i = failed_image_request(error)
+                if i is None or 'insertInlineImage' not in self.requests[i]:
+                    if error.resp.status == 400 and "revision" in str(error).lower():
+                        print(f"\n  \033[31m[ERROR]: 文件在讀取後已被修改（或前一次送出的請求已套用），為避免重複寫入已停止，"
+                              f"請檢查文件內容後重新執行\033[0m")
+                    raise
+                retries[i] = retries.get(i, 0) + 1
+                if retries[i] > DOC_IMAGE_MAX_RETRIES:
+                    self.requests[i] = image_placeholder(self.requests[i])
+                else:
+                    wait_images_ready([self.requests[i]['insertInlineImage']['uri']])
+        self.request_bytes = 0
+
+    def flush(self) -> None:
+        """
+        送出所有記錄與累積的請求。
+        """
+        self.emit()
+        self._send()
+
+def write_overview(builder: DocumentBuilder, total_score: float, total_num: int, chart_paths: list) -> None:
+    """
+    寫入整體成熟度與整體圖表。
+
+    :param builder: 報告寫入器
+    :param total_score: 總分
+    :param total_num: 總項目數
+    :param chart_paths: 整體圖表的 URL 列表
+    """
+    text_here = builder.text(f"Well-Architected Framework 整體成熟度: {maturity(total_score, total_num)}", "HEADING_1", builder.anchor)
+
+    # 插入整體圖表
+    for img_serial_num, uri in enumerate(chart_paths):
+        text_here = builder.image(text_here, uri, img_serial_num, len(chart_paths), 'total')
+
+    builder.text(f" ", "HEADING_1", text_here)
+
+def write_topic(builder: DocumentBuilder, topic_cnt: int, topic: dict) -> None:
+    """
+    寫入主題標題、主題成熟度與主題圖表。
+
+    :param builder: 報告寫入器
+    :param topic_cnt: 主題編號
+    :param topic: 主題資料（topic、topic_score、topic_num、chart_path、chart_cat）
+    """
+    text_here = builder.text(f"\nTopic {topic_cnt}", "HEADING_6", builder.anchor)
+    text_here = builder.text(f"{topic['topic']} ☁️", "HEADING_1", text_here)
+    text_here = builder.text(f"主題成熟度：{maturity(topic['topic_score'], topic['topic_num'])}\n", "NORMAL_TEXT", text_here)
+
+    # 插入主題圖表
+    for img_serial_num, uri in enumerate(topic['chart_path']):
+        text_here = builder.image(text_here, uri, img_serial_num, len(topic['chart_path']), topic['chart_cat'][img_serial_num])
+
+def write_question(builder: DocumentBuilder, question: dict) -> None:
+    """
+    寫入單一問題的項目、建議發展階段、成熟度、現況與最佳實務。
+
+    :param builder: 報告寫入器
+    :param question: 問題資料
+    """
+    content = question_content(question)
+
+    # 插入問題文字
+    text_here = builder.text("\n" + question['question'], "HEADING_2", builder.anchor)
+
+    # 插入項目資訊
+    for title, group in content['groups']:
+        text_here = builder.text(title, "HEADING_3", text_here)
+        bullet_start = text_here
+        bullet_end = bullet_start
+        for item in group:
+            bullet_end = builder.text(item['item'], "NORMAL_TEXT", bullet_end, 1) # 項目內容
+            bullet_end = builder.text(item['refined_note'], "HEADING_5", bullet_end, 2) # 客戶現況
+        if group:
+            text_here = builder.bullet(bullet_start, bullet_end)
+        else:
+            text_here = builder.text("    (無)", "NORMAL_TEXT", text_here, 1)
+
+    # 插入建議發展階段
+    text_here = builder.text("建議發展階段", "HEADING_3", text_here)
+    text_here = builder.text("    " + content['stage'], "NORMAL_TEXT", text_here, 1)
+
+    # 插入現況成熟度
+    text_here = builder.text("現況成熟度", "HEADING_3", text_here)
+    text_here = builder.text(f"    {content['maturity']}", "NORMAL_TEXT", text_here)
+
+    # 插入現況總整理
+    text_here = builder.text("現況總整理", "HEADING_3", text_here)
+    text_here = builder.text("    " + content['condition'], "NORMAL_TEXT", text_here)
+
+    # 插入最佳實務建議
+    text_here = builder.text("最佳實務建議", "HEADING_3", text_here)
+    text_here = builder.text("    " + content['improvement'], "NORMAL_TEXT", text_here)
+
+    # 插入最佳實務參考
+    text_here = builder.text("最佳實務參考", "HEADING_3", text_here)
+    best_practices_start = text_here
+    best_practices_end = best_practices_start
+    for text, url in content['best_practices']:
+        best_practices_end = builder.text(text, "NORMAL_TEXT", best_practices_end, 1)
+        if url:
+            builder.link(best_practices_end - text_length(text) - 1, best_practices_end, url)
+
+    if content['best_practices']:
+        builder.bullet(best_practices_start, best_practices_end)
+    else:
+        builder.text("    (無)", "NORMAL_TEXT", text_here, 1)
+
+def write_suggestions(builder: DocumentBuilder, suggestions: list) -> None:
+    """
+    寫入短中長期改善建議統整。
+
+    :param builder: 報告寫入器
+    :param suggestions: 依 STAGE_ORDER 排列的各階段改善建議
+    """
+    text_here = builder.text(f"Well-Architected 改善建議統整", "HEADING_1", builder.anchor)
+    for i, stage in enumerate(STAGE_ORDER):
+        text_here = builder.text(f"{stage}", "HEADING_3", text_here)
+        if suggestions[i]:
+            text_here = builder.text(f"    {suggestions[i]}", "NORMAL_TEXT", text_here)
+        else:
+            text_here = builder.text("    (無)", "NORMAL_TEXT", text_here, 1)
 
-def generate_report(service, data: dict) -> None:
+SECTION_WRITERS = {
+    'overview': write_overview,
+    'topic': write_topic,
+    'question': write_question,
+    'suggestions': write_suggestions,
+}
+
+def write_sections(builder: DocumentBuilder, sections: list, verbose: bool = False) -> None:
+    """
+    依序寫入區段，並以具名範圍標記各區段。
+
+    :param builder: 報告寫入器
+    :param sections: report_sections() 回傳的區段
+    :param verbose: 是否逐一輸出寫入的區段（否則只輸出主題）
+    """
+    for section in sections:
+        start = builder.anchor
+        SECTION_WRITERS[section['kind']](builder, *section['args'])
+        builder.name_range(section['name'], start)
+        if verbose or section['kind'] == 'topic':
+            print(f"\n  ❏ {section['label']} 寫入完成")
+
+def update_sections(builder: DocumentBuilder, sections: list, existing: list) -> None:
+    """
+    只重寫資料有變更的區段：由後往前刪除舊的區段並寫入新的區段，
+    再依刪除與寫入的長度重新建立相鄰的保留區段的具名範圍（避免範圍邊界隨插入內容延伸）。
+
+    :param builder: 報告寫入器
+    :param sections: report_sections() 回傳的區段
+    :param existing: existing_sections() 回傳的文件區段
+    """
+    runs, kept = plan_section_updates(existing, sections)
+    if not runs:
+        print("\n  ❏ 報告內容沒有變更，略過寫入")
+        return
+
+    shifts = []
+    for run in runs:
+        builder.begin(run['position'])
+        for section in sorted(run['delete'], key=lambda section: section['start'], reverse=True):
+            builder.delete_named_range(section['id'])
+            builder.delete_range(section['start'], section['end'])
+        write_sections(builder, run['write'], verbose=True)
+        deleted = sum(section['end'] - section['start'] for section in run['delete'])
+        shifts.append((run['position'], builder.anchor - run['position'] - deleted))
+    builder.emit()
+
+    positions = {run['position'] for run in runs}
+    for section in kept:
+        if section['start'] in positions or section['end'] in positions:
+            shift = sum(length for position, length in shifts if position <= section['start'])
+            builder.delete_named_range(section['id'])
+            builder.add_named_range(section['name'], section['start'] + shift, section['end'] + shift)
+
+    written = sum(len(run['write']) for run in runs)
+    removed = sum(len(run['delete']) for run in runs)
+    print(f"\n  ❏ 報告共 {len(sections)} 個區段：重寫 {written} 個、移除舊區段 {removed} 個，其餘 {len(kept)} 個保留")
+
+def generate_report(service, data: dict) -> bool:
     """
     根據數據生成報告並寫入 Google Docs 文件中。
 
+    文件中有定位文字時，於定位文字處寫入完整報告；沒有定位文字但有上次寫入的區段時（ENABLE_INCREMENTAL_REPORT），
+    只更新資料有變更的區段。報告日期的佔位符於第一次寫入時以具名範圍標記，之後每次執行都會更新日期。
+
     :param service: Google Docs API 服務對象
     :param data: 包含報告各項數據的字典
+    :return: 是否已寫入報告（文件中沒有定位文字、也沒有可更新的區段時為 False）
     """
     print("\n╔═════════════════════════ GOOGLE DOC 內容寫入進行中 ═════════════════════════╗")
-    requests = []
+    builder = DocumentBuilder(service)
+
+    # 整份報告只讀取一次文件：找出定位文字、上次寫入的區段與報告日期
+    doc = builder.fetch()
+    insert_point = find_text_start(doc, INSERT_POINT)
+    existing = existing_sections(doc)
+    sections = report_sections(data)
+
+    if not insert_point and not (existing and ENABLE_INCREMENTAL_REPORT):
+        print(f"\n  \033[31m[ERROR]: 未找到定位文字，請於文件模板中加入定位文字: 「{INSERT_POINT}」\033[0m\n")
+        return False
+
+    # 以具名範圍標記日期佔位符（最先送出，索引即為讀取時的位置），佔位符替換後仍可依具名範圍更新日期
+    date_ranges = find_text_ranges(doc, "{{REPORT_DATE}}")
+    for start, end in date_ranges:
+        builder.add_named_range(REPORT_DATE_RANGE, start, end)
+    tagged = bool(date_ranges) or REPORT_DATE_RANGE in doc.get('namedRanges', {})
+
+    if insert_point:
+        # 完整寫入，並改為追蹤新寫入的區段
+        builder.begin(insert_point)
+        for section in existing:
+            builder.delete_named_range(section['id'])
+        write_sections(builder, sections)
+
+        # 刪除定位用字串
+        builder.delete_anchor(INSERT_POINT)
+    else:
+        update_sections(builder, sections, existing)
 
+    # 日期替換不依賴索引，放在最後與報告內容一起送出；頁首、頁尾等未標記的佔位符仍以文字替換
     formatted_date = time.strftime("%Y 年 %m 月 %d 日", time.localtime())
     date = formatted_date if not REPORT_DATE else REPORT_DATE
-    requests = merge_data(requests, "REPORT_DATE", date)
-
-    # 定位到插入點並插入總成熟度分數
-    text_here, requests = get_content_start(requests, service, INSERT_POINT)
-    total_score = data['total_score']
-    total_num = data['total_num']
-    total_maturity = f"{round(total_score/total_num * 100, 1)}%"
-    text_here, requests = insert_text(requests, f"Well-Architected Framework 整體成熟度: {total_maturity}", "HEADING_1", text_here)
+    if tagged:
+        builder.replace_named_range(REPORT_DATE_RANGE, date)
+    builder.merge("REPORT_DATE", date)
 
-    # 插入整體圖表
-    for img_serial_num, uri in enumerate(data['chart_path']):
-        text_here, requests = insert_image(requests, text_here, uri, img_serial_num, len(data['chart_path']), 'total')
-    
-    text_here, requests = insert_text(requests, f" ", "HEADING_1", text_here)
-
-    topic_cnt = 0
-
-    # 處理每個主題
-    for topic in data['topics']:
-        if topic['topic'] == QUESTIONNAIRE_END_MARKER:
-            break
-        if topic['not_applicable']:
-            continue
-        
-        topic_cnt += 1
-        text_here, requests = get_content_start(requests, service, INSERT_POINT)
-        text_here, requests = insert_text(requests, f"\nTopic {topic_cnt}", "HEADING_6", text_here)
-        text_here, requests = insert_text(requests, f"{topic['topic']} ☁️", "HEADING_1", text_here)
-        text_here, requests = insert_text(requests, f"主題成熟度：{round(topic['topic_score']/topic['topic_num'] * 100, 1)}%\n", "NORMAL_TEXT", text_here)
-
-        # 插入主題圖表
-        for img_serial_num, uri in enumerate(topic['chart_path']):
-            text_here, requests = insert_image(requests, text_here, uri, img_serial_num, len(topic['chart_path']), topic['chart_cat'][img_serial_num])
-        
-        # 處理每個問題
-        for question in topic['questions']:
-            if question['not_applicable']:
-                continue
-
-            # 插入問題文字
-            text_here, requests = insert_text(requests, "\n" + question['question'], "HEADING_2", text_here)
-            
-            # 整理問題中各項目的資訊
-            grouped_items = [[], []]
-            group_titles = ["已達成項目", "未達成項目"]
-            best_practices = []
-            best_practices_ref = []
-            for item in question['items']:
-                if item['check']:
-                    grouped_items[0].append({
-                        'item': item['item'],
-                        'note': item['note'],
-                        'refined_note': item['refined_note']
-                    })
-                else:
-                    grouped_items[1].append({
-                        'item': item['item'],
-                        'note': item['note'],
-                        'refined_note': item['refined_note']
-                    })
-                    for i, bp in enumerate(item['best_practice']):
-                        if bp not in best_practices:
-                            best_practices.append(bp)
-                            best_practices_ref.append(item['best_practice_ref'][i])
-
-            # 插入項目資訊
-            for idx_group, group in enumerate(grouped_items):
-                text_here, requests = insert_text(requests, group_titles[idx_group], "HEADING_3", text_here)
-                bullet_start = text_here
-                bullet_end = bullet_start
-                for item in group:
-                    bullet_end, requests = insert_text(requests, item['item'], "NORMAL_TEXT", bullet_end, 1) # 項目內容
-                    bullet_end, requests = insert_text(requests, item['refined_note'], "HEADING_5", bullet_end, 2) # 客戶現況
-                if group:
-                    text_here, requests = insert_bullet(requests, service, bullet_start, bullet_end)
-                else:
-                    text_here, requests = insert_text(requests, "    (無)", "NORMAL_TEXT", text_here, 1)
-            
-            # 插入建議發展階段
-            text_here, requests = insert_text(requests, "建議發展階段", "HEADING_3", text_here)
-            stage_text = question['stage'] if question['stage'] else "(無)"
-            text_here, requests = insert_text(requests, "    " + stage_text, "NORMAL_TEXT", text_here, 1)
-        
-            # 插入現況成熟度
-            text_here, requests = insert_text(requests, "現況成熟度", "HEADING_3", text_here)
-            text_here, requests = insert_text(requests, f"    {round(question['score']/question['num'] * 100, 1)}%", "NORMAL_TEXT", text_here)
-            
-            # 插入現況總整理
-            text_here, requests = insert_text(requests, "現況總整理", "HEADING_3", text_here)
-            condition = question['client_condition'] if question['client_condition'] else "(無)"
-            text_here, requests = insert_text(requests, "    " + condition, "NORMAL_TEXT", text_here)
-            
-            # 插入最佳實務建議
-            text_here, requests = insert_text(requests, "最佳實務建議", "HEADING_3", text_here)
-            improvement = question['improvement_plan'] if question['improvement_plan'] else "(無)"
-            text_here, requests = insert_text(requests, "    " + improvement, "NORMAL_TEXT", text_here)
-            
-            # 插入最佳實務參考
-            text_here, requests = insert_text(requests, "最佳實務參考", "HEADING_3", text_here)
-            best_practices_start = text_here
-            best_practices_end = best_practices_start
-            for idx_bp, bp in enumerate(best_practices):
-                link_length = 0
-                if bp == "NA":
-                    best_practices_end, requests = insert_text(requests, best_practices_ref[idx_bp], "NORMAL_TEXT", best_practices_end, 1)
-                    link_length = best_practices_end - len(best_practices_ref[idx_bp]) - 1
-                else:
-                    best_practices_end, requests = insert_text(requests, bp, "NORMAL_TEXT", best_practices_end, 1)
-                    link_length = best_practices_end - len(bp) - 1
-
-                if best_practices_ref[idx_bp] != "NA":
-                    requests = insert_link(requests, link_length, best_practices_end, best_practices_ref[idx_bp])
-            
-            if best_practices:
-                text_here, requests = insert_bullet(requests, service, best_practices_start, best_practices_end)
-            else:
-                text_here, requests = insert_text(requests, "    (無)", "NORMAL_TEXT", text_here, 1)
-
-            requests = update_doc(service, requests)
-
-        print(f"\n  ❏ Topic {topic['topic']} 寫入完成")
-    
-    # 插入短中長期改善建議
-    text_here, requests = insert_text(requests, f"Well-Architected 改善建議統整", "HEADING_1", text_here)
-    for i, stage in enumerate(STAGE_ORDER): 
-        text_here, requests = insert_text(requests, f"{stage}", "HEADING_3", text_here)
-        if data['suggestions'][i]:
-            text_here, requests = insert_text(requests, f"    {data['suggestions'][i]}", "NORMAL_TEXT", text_here)
-        else:
-            text_here, requests = insert_text(requests, "    (無)", "NORMAL_TEXT", text_here, 1)
-    
-    # 刪除定位用字串
-    requests = delete_text(requests, service, INSERT_POINT)
-
-    requests = update_doc(service, requests)
+    builder.flush()
 
-    print("\n╚═════════════════════════ GOOGLE DOC 資料寫入已完成 ═════════════════════════╝")
\ No newline at end of file
+    print("\n╚═════════════════════════ GOOGLE DOC 資料寫入已完成 ═════════════════════════╝")
+    return True
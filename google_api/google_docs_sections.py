@@ -0,0 +1,195 @@
+"""
+Google Docs 報告區段
+
+報告依序分為整體成熟度、各主題標題、各問題與改善建議統整等區段，每個區段寫入後以具名範圍（named range）標記，
+範圍名稱包含區段鍵值與產生該區段的資料雜湊，雜湊隨文件保存。重新執行時比對雜湊，
+只刪除並重寫資料有變更（或新增、移除）的區段，其餘區段保留不動。
+"""
+from collections import Counter
+
+from settings import *
+from utils.hashing import digest
+
+# 具名範圍名稱前綴，用於辨識本程式寫入的區段
+REPORT_SECTION_PREFIX = "waf_section:"
+
+# 報告日期的具名範圍名稱：第一次寫入時標記 {{REPORT_DATE}} 佔位符，之後重新執行時依此更新日期
+REPORT_DATE_RANGE = "waf_report_date"
+
+# 報告版面版本：修改區段寫入方式（文字、樣式、圖片大小等）時遞增，讓既有區段全部重寫
+REPORT_SECTION_VERSION = 1
+
+def maturity(score: float, num: int) -> str:
+    """
+    :param score: 得分
+    :param num: 項目數
+    :return: 成熟度百分比文字，例如 "66.7%"
+    """
+    return f"{round(score/num * 100, 1)}%"
+
+def report_topics(data: dict):
+    """
+    依序列出報告中的主題（略過不適用的主題，遇到問卷結尾標記即停止）。
+
+    :param data: 包含報告各項數據的字典
+    :return: (主題編號, 主題資料) 的產生器
+    """
+    topic_cnt = 0
+    for topic in data['topics']:
+        if topic['topic'] == QUESTIONNAIRE_END_MARKER:
+            break
+        if topic['not_applicable']:
+            continue
+        topic_cnt += 1
+        yield topic_cnt, topic
+
+def report_questions(topic: dict):
+    """
+    :param topic: 主題資料
+    :return: 主題中適用的問題的產生器
+    """
+    return (question for question in topic['questions'] if not question['not_applicable'])
+
+def question_content(question: dict) -> dict:
+    """
+    整理單一問題在報告中呈現的內容（Google Doc 與本地報告共用）。
+
+    :param question: 問題資料
+    :return: {
+        'groups': [(標題, [{'item': 項目內容, 'refined_note': 客戶現況}])]，依序為已達成、未達成項目,
+        'stage': 建議發展階段, 'maturity': 現況成熟度, 'condition': 現況總整理, 'improvement': 最佳實務建議,
+        'best_practices': [(顯示文字, 連結或 None)]
+    }
+    """
+    grouped_items = [[], []]
+    best_practices = []
+    best_practices_ref = []
+    for item in question['items']:
+        grouped_items[0 if item['check'] else 1].append({
+            'item': item['item'],
+            'note': item['note'],
+            'refined_note': item['refined_note']
+        })
+        if not item['check']:
+            for i, bp in enumerate(item['best_practice']):
+                if bp not in best_practices:
+                    best_practices.append(bp)
+                    best_practices_ref.append(item['best_practice_ref'][i])
+
+    return {
+        'groups': list(zip(["已達成項目", "未達成項目"], grouped_items)),
+        'stage': question['stage'] if question['stage'] else "(無)",
+        'maturity': maturity(question['score'], question['num']),
+        'condition': question['client_condition'] if question['client_condition'] else "(無)",
+        'improvement': question['improvement_plan'] if question['improvement_plan'] else "(無)",
+        # 沒有名稱（"NA"）的最佳實務以參考連結作為顯示文字
+        'best_practices': [
+            (ref if bp == "NA" else bp, ref if ref != "NA" else None)
+            for bp, ref in zip(best_practices, best_practices_ref)
+        ],
+    }
+
+def report_sections(data: dict) -> list:
+    """
+    依報告資料列出各區段與其資料雜湊。
+
+    :param data: 包含報告各項數據的字典
+    :return: [{'key': 區段鍵值, 'name': 具名範圍名稱, 'label': 顯示名稱, 'kind': 區段類型, 'args': 寫入參數}]
+    """
+    sections = []
+
+    def add(path: list, label: str, kind: str, *args) -> None:
+        key = digest(path)
+        name = f"{REPORT_SECTION_PREFIX}{key}:{digest([REPORT_SECTION_VERSION, kind, args])}"
+        sections.append({'key': key, 'name': name, 'label': label, 'kind': kind, 'args': args})
+
+    add(["overview"], "整體成熟度", "overview", data['total_score'], data['total_num'], data['chart_path'])
+
+    for topic_cnt, topic in report_topics(data):
+        header = {field: topic[field] for field in ('topic', 'topic_score', 'topic_num', 'chart_path', 'chart_cat')}
+        add(["topic", topic['topic']], f"Topic {topic['topic']}", "topic", topic_cnt, header)
+
+        questions = Counter()
+        for question in report_questions(topic):
+            questions[question['question']] += 1
+            path = ["question", topic['topic'], question['question'], questions[question['question']]]
+            add(path, f"{topic['topic']} / {question['question']}", "question", question)
+
+    add(["suggestions"], "改善建議統整", "suggestions", data['suggestions'])
+    return sections
+
+def existing_sections(doc: dict) -> list:
+    """
+    從文件的具名範圍中找出上次寫入的區段。
+
+    :param doc: documents().get() 回傳的文件內容
+    :return: 依位置排序的 [{'key': 區段鍵值, 'name': 具名範圍名稱, 'id': 具名範圍 ID, 'start': 起始索引, 'end': 結束索引}]
+    """
+    sections = []
+    for name, named_ranges in doc.get('namedRanges', {}).items():
+        if not name.startswith(REPORT_SECTION_PREFIX):
+            continue
+        key = name[len(REPORT_SECTION_PREFIX):].split(":")[0]
+        for named_range in named_ranges.get('namedRanges', []):
+            ranges = named_range.get('ranges', [])
+            if not ranges:
+                continue
+            sections.append({
+                'key': key,
+                'name': name,
+                'id': named_range['namedRangeId'],
+                'start': min(r.get('startIndex', 0) for r in ranges),
+                'end': max(r['endIndex'] for r in ranges),
+            })
+    return sorted(sections, key=lambda section: section['start'])
+
+def plan_section_updates(old: list, new: list) -> (list, list):
+    """
+    比對文件中的區段與新的區段，規劃需要重寫的部分。
+
+    名稱（區段鍵值與資料雜湊）相同、且在文件中只出現一次的區段保留不動；
+    保留的區段將報告切成數段，每段中舊的區段刪除、新的區段依序寫入。
+    保留區段的先後順序與新的報告不同時，全部重寫。
+
+    :param old: existing_sections() 回傳的文件區段
+    :param new: report_sections() 回傳的新區段
+    :return: (由後往前排序的 [{'position': 寫入位置, 'delete': 要刪除的舊區段, 'write': 要寫入的新區段}], 保留的區段)
+    """
+    new_names = {section['name'] for section in new}
+    counts = Counter(section['key'] for section in old)
+    kept = [section for section in old if counts[section['key']] == 1 and section['name'] in new_names]
+
+    kept_names = {section['name'] for section in kept}
+    if [section['name'] for section in kept] != [section['name'] for section in new if section['name'] in kept_names]:
+        kept, kept_names = [], set()
+
+    # 依保留的區段分段：第 i 段位於第 i - 1 與第 i 個保留區段之間
+    deletes = [[] for _ in range(len(kept) + 1)]
+    i = 0
+    for section in old:
+        if i < len(kept) and section is kept[i]:
+            i += 1
+        else:
+            deletes[i].append(section)
+
+    writes = [[] for _ in range(len(kept) + 1)]
+    i = 0
+    for section in new:
+        if section['name'] in kept_names:
+            i += 1
+        else:
+            writes[i].append(section)
+
+    runs = []
+    for i, (delete, write) in enumerate(zip(deletes, writes)):
+        if not delete and not write:
+            continue
+        if delete:
+            position = delete[0]['start']
+        elif i > 0:
+            position = kept[i - 1]['end']
+        else:
+            position = kept[0]['start']
+        runs.append({'position': position, 'delete': delete, 'write': write})
+
+    return sorted(runs, key=lambda run: run['position'], reverse=True), kept
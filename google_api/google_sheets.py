@@ -1,49 +1,106 @@
+import numpy as np
 import pandas as pd
-import time
 
 from settings import *
-from utils.llm_handler import llm
-from google_api.google_sheets_merges import check_cell_merge_status
+from utils.checkpoint import save_topic_checkpoint, topic_checkpoint
+from utils.llm_handler import llm, llm_imap, llm_map, refine_client_status_notes
+from utils.rate_limiter import execute
+from utils.hashing import digest
+from google_api.google_sheets_merges import build_merge_index, lookup_merge_start
+from google_api.google_sheets_writer import SheetWriteBuffer, column_letter
 # from utils.best_practice_scraper import best_practice_content_scraper
 
-def fetch_sheet_data(service):
+# 問卷欄位名稱與程式內使用的簡稱；只有這些欄位會從試算表讀取
+SHEET_COLUMNS = {
+    'Topics': 'topic',
+    'Best Practice Areas': 'area',
+    'Questions': 'question',
+    'Suggested Development Stages': 'stage',
+    'Client Conditions': 'client_condition',
+    'Suggested Improvements': 'improvement_plan',
+    'Checklist': 'check',
+    'Items': 'item',
+    'Client Status Notes': 'note',
+    'Refined Notes': 'refined_note',
+    'GCP Best Practices': 'best_practice',
+    'GCP Best Practice References': 'best_practice_ref',
+    'GCP Best Practice Content': 'best_practice_content',
+    'Suggestion': 'suggestion'
+}
+
+def fetch_sheet_layout(service) -> (list, list):
     """
-    從 Google Sheet 讀取原始資料
+    以單次 spreadsheets.get 同時取得問卷工作表的合併儲存格範圍與標題列
 
-    :param service: Google Sheets API 服務對象
-    :return: (data, worksheet)，其中 data 為所有記錄的列表，worksheet 為工作表對象
+    :param service: Google Sheets API (v4) 服務對象
+    :return: (merges, header)，merges 為合併儲存格範圍列表，header 為標題列的欄位名稱列表
     """
-    sheet = service.open_by_key(GOOGLE_SHEET_ID)
-    worksheet = sheet.worksheet(GOOGLE_WORKSHEET_NAME)
-    data = worksheet.get_all_records()
-    return data, worksheet
+    response = execute("sheets", service.spreadsheets().get(
+        spreadsheetId=GOOGLE_SHEET_ID,
+        ranges=[f"'{GOOGLE_WORKSHEET_NAME}'!1:1"],
+        fields="sheets(merges,data(rowData(values(formattedValue))))"
+    ))
+    sheets_data = response.get('sheets', [])
+
+    if not sheets_data:
+        print("No sheets found or no merges in the sheet.")
+        return [], []
+
+    sheet = sheets_data[0]
+    row_data = sheet.get('data', [{}])[0].get('rowData', [])
+    header = [cell.get('formattedValue', "") for cell in row_data[0].get('values', [])] if row_data else []
+    return sheet.get('merges', []), header
+
+def fetch_sheet_data(service, header: list) -> (dict, dict):
+    """
+    從 Google Sheet 讀取原始資料：依標題列找出 SHEET_COLUMNS 中的欄位，
+    並以單次 values.batchGet（依欄回傳）只讀取這些欄位
 
-def clean_sheet_data(data):
+    :param service: Google Sheets API (v4) 服務對象
+    :param header: 標題列的欄位名稱列表（fetch_sheet_layout 的回傳值）
+    :return: (columns, sheet_columns)，columns 為 {原始欄位名稱: 欄位值列表（不含標題列）}，
+             sheet_columns 為 {欄位簡稱: 在試算表中的欄索引（從 0 開始）}
+    """
+    positions = {name: header.index(name) for name in SHEET_COLUMNS if name in header}
+    if not positions:
+        return {}, {}
+
+    ranges = []
+    for column in positions.values():
+        letter = column_letter(column + 1)
+        ranges.append(f"'{GOOGLE_WORKSHEET_NAME}'!{letter}2:{letter}")
+
+    response = execute("sheets", service.spreadsheets().values().batchGet(
+        spreadsheetId=GOOGLE_SHEET_ID,
+        ranges=ranges,
+        majorDimension='COLUMNS',
+        fields="valueRanges(values)"
+    ))
+
+    columns = {}
+    for name, value_range in zip(positions, response.get('valueRanges', [])):
+        values = value_range.get('values', [])
+        columns[name] = values[0] if values else []
+
+    sheet_columns = {SHEET_COLUMNS[name]: column for name, column in positions.items()}
+    return columns, sheet_columns
+
+def clean_sheet_data(columns: dict):
     """
-    將原始資料轉換為 Pandas DataFrame 並重新命名欄位
+    將各欄原始資料轉換為 Pandas DataFrame 並重新命名欄位
 
-    :param data: 從 Google Sheet 取得的原始資料（列表形式）
-    :return: 清理後的 DataFrame
+    :param columns: 從 Google Sheet 取得的原始資料（{原始欄位名稱: 欄位值列表}）
+    :return: 清理後的 DataFrame；DataFrame 的索引 idx 對應試算表第 idx + 2 列
     """
-    df = pd.DataFrame(data)
+    # 試算表 API 會省略每欄尾端的空白儲存格，補齊為相同長度
+    num_rows = max((len(values) for values in columns.values()), default=0)
+    df = pd.DataFrame({
+        name: values + [""] * (num_rows - len(values))
+        for name, values in columns.items()
+    })
 
     # 重新命名欄位，讓欄位名稱更簡潔一致
-    df.rename(columns={
-        'Topics': 'topic',
-        'Best Practice Areas': 'area',
-        'Questions': 'question',
-        'Suggested Development Stages': 'stage',
-        'Client Conditions': 'client_condition',
-        'Suggested Improvements': 'improvement_plan',
-        'Checklist': 'check',
-        'Items': 'item',
-        'Client Status Notes': 'note',
-        'Refined Notes': 'refined_note',
-        'GCP Best Practices': 'best_practice',
-        'GCP Best Practice References': 'best_practice_ref',
-        'GCP Best Practice Content': 'best_practice_content',
-        'Suggestion': 'suggestion'
-    }, inplace=True)
+    df.rename(columns=SHEET_COLUMNS, inplace=True)
 
     return df
 
@@ -107,208 +164,311 @@ def summarize_condition_and_improvement(items):
 
     return conditions, improvements
 
-def process_sheet_data(df, worksheet, merges):
+def parse_questionnaire(df, merges, sheet_columns):
     """
-    根據 DataFrame 中的資料，依主題與問題進行分類、計分與資料統整，
-    並利用 Google Sheet API 更新相關欄位。
+    以欄位運算（向量化）解析問卷，重建 主題 → 問題 → 項目 的層級結構並計分，不呼叫任何 AI。
+
+      - 主題 / 問題以「該欄非空即為新群組」的累加計數取得群組編號，區域欄位以 forward-fill 補齊
+      - 問題得分、項目數與「以上皆非」判定以 groupby 聚合計算
+      - 最後一次走訪項目列，組出與 process_sheet_data 相同格式的 data 字典
+
+    與逐列處理相同的規則：
+      - 問題的分數只在出現下一個問題時結算，因此最後一個問題（QUESTIONNAIRE_END_MARKER）不計分
+      - 主題的 not_applicable 只在出現下一個主題時判定
 
     :param df: 清理後的 DataFrame
-    :param worksheet: Google Sheet 工作表對象
     :param merges: 合併儲存格範圍列表
-    :return: 處理後的資料字典
+    :param sheet_columns: {欄位簡稱: 在試算表中的欄索引}，用於查詢合併儲存格
+    :return: (data, questions)；questions 為依序排列的問題紀錄列表，每筆包含 topic、question、
+             number（問題在主題中的序號）、row（問題所在列）、finalized（是否已結算）與
+             items（[(item, 項目所在列)]），供後續 AI 統整與寫回試算表使用
     """
     data = {
         'total_score': 0,
         'total_num': 0,
         'topics': []
     }
-
-    num_topic, is_new_topic = -1, True 
-    num_area, current_area = -1, ""
-    num_question, idx_question, idx_question_prev = -1, 0, 0
-
-    temp_score, temp_num = 0, 0
-
-    # 依照 settings.py 中 STAGE_ORDER 順序初始化，用於蒐集改善建議所須數據
-    suggestion_collection = {}
-    for stage in STAGE_ORDER:
-        suggestion_collection[stage] = []
-
-    for idx, row in df.iterrows():
-        # 若項目為空則略過
-        if row['item'] == "":
-            continue
-
-        # 遇到新主題時更新主題資料
-        if row['topic'] != "":
-            if num_topic != -1:
-                # 判斷該主題下所有問題是否皆標記為不適用
-                topic_not_applicable = all(q['not_applicable'] for q in data['topics'][num_topic]['questions'])
-                data['topics'][num_topic]['not_applicable'] = topic_not_applicable
-
-            is_new_topic = True
-            num_topic += 1
-            data['topics'].append({
-                'topic': row['topic'],
+    questions = []
+
+    # 若項目為空則略過
+    rows = df[df['item'] != ""]
+    if rows.empty:
+        return data, questions
+
+    # 以「欄位非空即為新群組」的累加計數建立主題與問題的群組編號
+    question_id = (rows['question'] != "").cumsum().to_numpy() - 1
+    area = rows['area'].where(rows['area'] != "").ffill().fillna("")
+
+    # 項目勾選狀態；"以上皆非" 不列入計分
+    check = rows['check'] == 'TRUE'
+    is_none = rows['item'] == "以上皆非"
+    scored = ~is_none
+    checked = check & scored
+
+    # 問題得分與項目數
+    score = checked.groupby(question_id).sum().to_dict()
+    num = scored.groupby(question_id).sum().to_dict()
+
+    # 若項目為 "以上皆非"，且未勾選且在它之前沒有任何已勾選項目，則標記此問題不適用
+    checked_before = checked.groupby(question_id).cumsum() - checked
+    not_applicable = (is_none & ~check & (checked_before == 0)).groupby(question_id).any().to_dict()
+
+    last_question = question_id[-1]
+
+    # 處理 Best Practice 與其 Reference：本行為空時，嘗試從合併儲存格取得資料
+    bp_col = sheet_columns['best_practice']
+    merge_index = build_merge_index(merges)
+    all_best_practice = df['best_practice'].to_numpy(dtype=object)
+    all_best_practice_ref = df['best_practice_ref'].to_numpy(dtype=object)
+    best_practice = rows['best_practice'].to_numpy(dtype=object).copy()
+    best_practice_ref = rows['best_practice_ref'].to_numpy(dtype=object).copy()
+    for pos in np.flatnonzero(best_practice == ""):
+        merge_start = lookup_merge_start(rows.index[pos] + 1, bp_col, merge_index)
+        if merge_start > 0:
+            best_practice[pos] = all_best_practice[merge_start - 1]
+            best_practice_ref[pos] = all_best_practice_ref[merge_start - 1]
+
+    columns = zip(
+        rows.index, question_id, area, check, is_none,
+        rows['topic'], rows['question'], rows['stage'], rows['client_condition'], rows['improvement_plan'],
+        rows['item'], rows['note'], rows['refined_note'], rows['best_practice_content'],
+        best_practice, best_practice_ref
+    )
+
+    topic, question, item_rows = None, None, None
+    for (idx, qid, area_, check_, is_none_, topic_, question_, stage, client_condition, improvement_plan,
+         item, note, refined_note, best_practice_content, bp, bpr) in columns:
+
+        # 遇到新主題時新增主題資料
+        if topic_ != "":
+            topic = {
+                'topic': topic_,
                 'topic_score': 0,
                 'topic_num': 0,
                 'questions': [],
                 'not_applicable': False
-            })
-        
-        # 更新當前區域資訊
-        if row['area'] != "":
-            if is_new_topic:
-                num_area = -1
-            current_area = row['area']
-            num_area += 1
-
-        # 當遇到新問題時，先更新上一問題的分數及統整資訊
-        if row['question'] != "":
-            idx_question_prev = idx_question
-            idx_question = idx
-            if idx != 0:
-                nt, nq = num_topic, num_question
-                if is_new_topic:
-                    nt -= 1
-                    nq = len(data['topics'][nt]['questions']) - 1
-                    num_question = -1
-
-                data['topics'][nt]['questions'][nq]['score'] = temp_score
-                data['topics'][nt]['questions'][nq]['num'] = temp_num
-
-                if not data['topics'][nt]['questions'][nq]['not_applicable']:
-                    data['topics'][nt]['topic_score'] += temp_score
-                    data['topics'][nt]['topic_num'] += temp_num
-                    data['total_num'] += temp_num
-                    data['total_score'] += temp_score
-
-                temp_score, temp_num = 0, 0
-
-                # 統整客戶現況與改善建議
-                nt, nq = num_topic, num_question
-                if is_new_topic:
-                    nt -= 1
-                    nq = len(data['topics'][nt]['questions']) - 1
-                
-                if not data['topics'][nt]['questions'][nq]['not_applicable']:
-                    client_condition, improvement_plan = summarize_condition_and_improvement(
-                        data['topics'][nt]['questions'][nq]['items']
-                    )
-                    if not client_condition:
-                        client_condition = data['topics'][nt]['questions'][nq]['client_condition']
-                    if not improvement_plan:
-                        improvement_plan = data['topics'][nt]['questions'][nq]['improvement_plan']
-                    
-                    worksheet.update_cell(idx_question_prev + 2, df.columns.get_loc('client_condition') + 1, client_condition)
-                    time.sleep(SLEEP)
-                    worksheet.update_cell(idx_question_prev + 2, df.columns.get_loc('improvement_plan') + 1, improvement_plan)
-                    time.sleep(SLEEP)
-                    data['topics'][nt]['questions'][nq]['client_condition'] = client_condition
-                    data['topics'][nt]['questions'][nq]['improvement_plan'] = improvement_plan
-
-                    # 蒐集改善建議所須數據
-                    stage = data['topics'][nt]['questions'][nq]['stage'] if data['topics'][nt]['questions'][nq]['stage'] else "其他"
-                    suggestion_collection[stage].append({
-                        'topic': data['topics'][nt]['topic'],
-                        'client_condition': client_condition,
-                        'improvement_plan': improvement_plan,
-                    })
-                
-                # else:
-                #     worksheet.update_cell(idx_question_prev + 2, df.columns.get_loc('improvement_plan') + 1, "SKIPPED")
-                #     time.sleep(SLEEP)
-
-                print(f"\n  ❏ Topic 「{data['topics'][nt]['topic']}」 問題 {nq + 1} 讀取完成")
-
-            # 新增該問題的初始資料
-            data['topics'][num_topic]['questions'].append({
-                'score': 0,
-                'num': 0,
-                'client_condition': row['client_condition'],
-                'improvement_plan': row['improvement_plan'],
-                'area': current_area,
-                'question': row['question'],
-                'stage': row['stage'],
+            }
+            data['topics'].append(topic)
+
+        # 遇到新問題時新增問題資料；已結算的問題計入主題與總分
+        if question_ != "":
+            finalized = qid != last_question
+            question = {
+                'score': int(score[qid]) if finalized else 0,
+                'num': int(num[qid]) if finalized else 0,
+                'client_condition': client_condition,
+                'improvement_plan': improvement_plan,
+                'area': area_,
+                'question': question_,
+                'stage': stage,
                 'items': [],
-                'not_applicable': False
+                'not_applicable': bool(not_applicable[qid])
+            }
+            topic['questions'].append(question)
+
+            if finalized and not question['not_applicable']:
+                topic['topic_score'] += question['score']
+                topic['topic_num'] += question['num']
+                data['total_score'] += question['score']
+                data['total_num'] += question['num']
+
+            item_rows = []
+            questions.append({
+                'topic': topic,
+                'question': question,
+                'number': len(topic['questions']),
+                'row': idx,
+                'finalized': finalized,
+                'items': item_rows
             })
-            num_question += 1
 
-        # 判斷該項目的狀態
-        check = True if row['check'] == 'TRUE' else False
-
-        # 若項目為 "以上皆非"，且未勾選且暫時分數為 0，則標記此問題不適用
-        if row['item'] == "以上皆非":
-            if (not check) and (temp_score == 0):
-                data['topics'][num_topic]['questions'][num_question]['not_applicable'] = True
+        if is_none_:
             continue
 
-        # 處理 Best Practice 與其 Reference
-        bp, bpr = row['best_practice'], row['best_practice_ref']
-        if row['best_practice'] == "":
-            # 若本行資料為空，嘗試從合併儲存格取得資料
-            row_idx_bp = check_cell_merge_status(idx + 1, df.columns.get_loc('best_practice'), merges) - 1
-            if row_idx_bp != -1:
-                bp = df.iloc[row_idx_bp, df.columns.get_loc('best_practice')]
-                bpr = df.iloc[row_idx_bp, df.columns.get_loc('best_practice_ref')]
-        
-        best_practice, best_practice_ref = process_best_practice(row['item'], bp, bpr)
-
-        # 處理客戶現況備註，並在啟用 AI 生成時進行修正
-        refined_note = row['refined_note']
-        if ENABLE_AI_GENERATION:
-            refined_note = llm("gemini", "refine_client_status_notes", row['item'], row['note'])
-            worksheet.update_cell(idx + 2, df.columns.get_loc('refined_note') + 1, refined_note)
-            time.sleep(SLEEP)
-        refined_note = refined_note.replace("\n", "")
-
-        best_practice_content = row['best_practice_content'] if row['best_practice_content'] else ""
-
-        # if row['best_practice'] != "":
-        #     best_practice_content = row['best_practice_content'] if row['best_practice_content'] else best_practice_content_scraper(best_practice_ref, best_practice)
-        #     worksheet.update_cell(idx + 2, df.columns.get_loc('best_practice_content') + 1, best_practice_content)
-        #     time.sleep(SLEEP)
-        
-        data['topics'][num_topic]['questions'][num_question]['items'].append({
-            'check': check,
-            'item': row['item'],
-            'note': row['note'],
-            'refined_note': refined_note,
-            'best_practice': best_practice,
-            'best_practice_ref': best_practice_ref,
-            'best_practice_content': best_practice_content
+        best_practice_, best_practice_ref_ = process_best_practice(item, bp, bpr)
+        question['items'].append({
+            'check': bool(check_),
+            'item': item,
+            'note': note,
+            'refined_note': refined_note.replace("\n", ""),
+            'best_practice': best_practice_,
+            'best_practice_ref': best_practice_ref_,
+            'best_practice_content': best_practice_content if best_practice_content else ""
         })
-        best_practice, best_practice_ref = "", ""
-        
-        if check:
-            temp_score += 1
+        item_rows.append((question['items'][-1], idx))
+
+    # 判斷主題下所有問題是否皆標記為不適用（最後一個主題不判定）
+    for topic in data['topics'][:-1]:
+        topic['not_applicable'] = all(q['not_applicable'] for q in topic['questions'])
 
-        temp_num += 1
-        is_new_topic = False
+    return data, questions
+
+def topic_input_digest(topic: dict) -> str:
+    """
+    計算主題輸入資料的雜湊，作為主題進度標記的鍵值。
+
+    只包含試算表中的輸入欄位（項目、勾選、備註、Best Practice、建議發展階段等），不含程式寫回的
+    refined_note、client_condition、improvement_plan：中斷前可能已寫回部分結果，若納入則繼續執行時鍵值不同。
+
+    :param topic: parse_questionnaire 產生的主題資料
+    :return: 十六進位的雜湊字串
+    """
+    return digest([ENABLE_AI_GENERATION, topic['topic'], [
+        [question['area'], question['question'], question['stage'], question['not_applicable'], [
+            [item['item'], item['check'], item['note'], item['best_practice'], item['best_practice_ref'], item['best_practice_content']]
+            for item in question['items']
+        ]]
+        for question in topic['questions']
+    ]])
+
+def process_sheet_data(df, worksheet, merges, sheet_columns):
+    """
+    根據 DataFrame 中的資料，依主題與問題進行分類、計分與資料統整，
+    並利用 Google Sheet API 更新相關欄位。
+
+    先以 parse_questionnaire 建立不含 AI 內容的層級結構，再將彼此獨立的 AI 工作
+    （各項目的備註潤飾 → 各問題的現況與改善統整 → 各階段的改善建議）分批送入
+    llm_map 並行處理，結果依原本順序寫回。
+
+    每個主題的備註潤飾完成後、以及現況 / 改善統整完成後，各保存一次主題進度標記；從檢查點繼續執行時，
+    輸入資料未變更的主題直接沿用保存的結果，只對尚未完成的部分呼叫 LLM。
+
+    :param df: 清理後的 DataFrame
+    :param worksheet: 寫入目標，Google Sheet 工作表對象或 SheetWriteBuffer
+    :param merges: 合併儲存格範圍列表
+    :param sheet_columns: {欄位簡稱: 在試算表中的欄索引}，用於寫回對應欄位
+    :return: 處理後的資料字典
+    """
+    data, questions = parse_questionnaire(df, merges, sheet_columns)
+
+    # 依主題分組，主題鍵值為主題輸入資料的雜湊（於 AI 處理前計算）
+    topic_groups = {}
+    for record in questions:
+        group = topic_groups.setdefault(id(record['topic']), {'topic': record['topic'], 'records': [], 'applicable': []})
+        group['records'].append(record)
+        if record['finalized'] and not record['question']['not_applicable']:
+            group['applicable'].append(record)
+    groups = list(topic_groups.values())
+    for group in groups:
+        group['key'] = topic_input_digest(group['topic'])
+        group['saved'] = topic_checkpoint("sheet", group['key'])
+        group['summarized'] = group['saved'] is not None and group['saved']['summaries'] is not None
+        if group['summarized']:
+            print(f"\n  ❏ Topic 「{group['topic']['topic']}」 沿用檢查點中的 AI 統整結果")
+        elif group['saved'] is not None:
+            print(f"\n  ❏ Topic 「{group['topic']['topic']}」 沿用檢查點中的備註潤飾結果")
+
+    def save_group(group: dict) -> None:
+        # 主題的 AI 結果全部完成時保存主題進度標記
+        save_topic_checkpoint("sheet", group['key'], {
+            'refined_notes': group.get('refined_notes', []),
+            'summaries': [record['summary'] for record in group['applicable']],
+        })
+
+    # 處理客戶現況備註，並在啟用 AI 生成時進行修正（同一主題的備註合併為批次請求）
+    if ENABLE_AI_GENERATION:
+        unrefined = [group for group in groups if group['saved'] is None]
+
+        def save_refined(g: int, refined_notes: list) -> None:
+            # 主題的備註潤飾完成時即保存主題進度標記（現況 / 改善統整尚未完成）
+            save_topic_checkpoint("sheet", unrefined[g]['key'], {'refined_notes': refined_notes, 'summaries': None})
+
+        refined_groups = refine_client_status_notes("gemini", [
+            [(item['item'], item['note']) for record in group['records'] for item, _ in record['items']] for group in unrefined
+        ], on_group=save_refined)
+        for group, refined_notes in zip(unrefined, refined_groups):
+            group['refined_notes'] = refined_notes
+        for group in groups:
+            if group['saved'] is not None:
+                group['refined_notes'] = group['saved']['refined_notes']
+            items = [pair for record in group['records'] for pair in record['items']]
+            for (item, idx), refined_note in zip(items, group['refined_notes']):
+                worksheet.update_cell(idx + 2, sheet_columns['refined_note'] + 1, refined_note)
+                item['refined_note'] = refined_note.replace("\n", "")
+
+    # 統整客戶現況與改善建議（最後一個問題不會結算，同 parse_questionnaire 的規則）
+    finalized = [record for record in questions if record['finalized']]
+    pending = [group for group in groups if not group['summarized']]
+    for group in groups:
+        if group['summarized']:
+            for record, summary in zip(group['applicable'], group['saved']['summaries']):
+                record['summary'] = summary
+        elif not group['applicable']:
+            save_group(group)
+
+    applicable = [record for group in pending for record in group['applicable']]
+    remaining = {id(group['topic']): len(group['applicable']) for group in pending}
+    summaries = llm_imap(summarize_condition_and_improvement, [
+        (record['question']['items'],) for record in applicable
+    ])
+    for record, summary in zip(applicable, summaries):
+        record['summary'] = summary
+        remaining[id(record['topic'])] -= 1
+        if remaining[id(record['topic'])] == 0:
+            save_group(topic_groups[id(record['topic'])])
+
+    # 依照 settings.py 中 STAGE_ORDER 順序初始化，用於蒐集改善建議所須數據
+    suggestion_collection = {}
+    for stage in STAGE_ORDER:
+        suggestion_collection[stage] = []
+
+    for record in finalized:
+        topic, question = record['topic'], record['question']
+
+        if not question['not_applicable']:
+            client_condition, improvement_plan = record['summary']
+            if not client_condition:
+                client_condition = question['client_condition']
+            if not improvement_plan:
+                improvement_plan = question['improvement_plan']
+
+            worksheet.update_cell(record['row'] + 2, sheet_columns['client_condition'] + 1, client_condition)
+            worksheet.update_cell(record['row'] + 2, sheet_columns['improvement_plan'] + 1, improvement_plan)
+            question['client_condition'] = client_condition
+            question['improvement_plan'] = improvement_plan
+
+            # 蒐集改善建議所須數據
+            stage = question['stage'] if question['stage'] else "其他"
+            suggestion_collection[stage].append({
+                'topic': topic['topic'],
+                'client_condition': client_condition,
+                'improvement_plan': improvement_plan,
+            })
+
+        print(f"\n  ❏ Topic 「{topic['topic']}」 問題 {record['number']} 讀取完成")
 
     # 將蒐集到的數據統整為改善建議
     suggestions = [df.iloc[_, df.columns.get_loc('suggestion')] for _ in range(len(STAGE_ORDER))]
-    for i, stage in enumerate(STAGE_ORDER):
-        if ENABLE_AI_GENERATION and suggestion_collection[stage]:
-            suggestions[i] = llm("gemini", "summarize_suggestion", stage, str(suggestion_collection[stage]))
-            worksheet.update_cell(2 + i, df.columns.get_loc('suggestion') + 1, suggestions[i])
-            time.sleep(SLEEP)
+    if ENABLE_AI_GENERATION:
+        stages = [(i, stage) for i, stage in enumerate(STAGE_ORDER) if suggestion_collection[stage]]
+        results = llm_map(llm, [
+            ("gemini", "summarize_suggestion", stage, str(suggestion_collection[stage]))
+            for _, stage in stages
+        ])
+        for (i, _), suggestion in zip(stages, results):
+            suggestions[i] = suggestion
+            worksheet.update_cell(2 + i, sheet_columns['suggestion'] + 1, suggestions[i])
     data['suggestions'] = suggestions
 
     return data
 
-def load_and_process_sheet_data(service, merges):
+def load_and_process_sheet_data(service, merges, header):
     """
     讀取並處理 Google Sheet 資料
 
-    :param service: Google Sheets API 服務對象
+    :param service: Google Sheets API (v4) 服務對象
     :param merges: 合併儲存格範圍列表
+    :param header: 標題列的欄位名稱列表
     :return: 處理後的數據字典
     """
     print("\n╔══════════════════════ GOOGLE SHEET 資料讀取進行中 ═══════════════════════╗")
-    data, worksheet = fetch_sheet_data(service)
-    df = clean_sheet_data(data)
-    data = process_sheet_data(df, worksheet, merges)
+    columns, sheet_columns = fetch_sheet_data(service, header)
+    df = clean_sheet_data(columns)
+
+    # 寫回試算表的更新先暫存於緩衝區，最後以少數幾次 batchUpdate 送出
+    write_buffer = SheetWriteBuffer(service)
+    data = process_sheet_data(df, write_buffer, merges, sheet_columns)
+    write_buffer.flush()
+    write_buffer.report()
     print("\n╚══════════════════════ GOOGLE SHEET 資料讀取已完成 ═══════════════════════╝")
-    return data
\ No newline at end of file
+    return data
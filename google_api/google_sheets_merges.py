@@ -1,32 +1,54 @@
-from googleapiclient.discovery import build
-from settings import GOOGLE_SHEET_ID
+from bisect import bisect_right
 
-def fetch_merged_cells(service) -> list:
+def build_merge_index(merges: list) -> dict:
     """
-    取得試算表的合併儲存格範圍
+    將合併儲存格範圍整理成以欄為單位的區間索引，供 lookup_merge_start 以二分搜尋查詢。
 
-    :param service: Google Sheets API 服務對象
-    :return: 合併儲存格範圍的列表；若無合併範圍則回傳空列表
+    同一工作表中的合併範圍不會互相重疊，因此每一欄內的列區間皆互不相交，
+    只需依起始列排序即可。
+
+    :param merges: 合併儲存格範圍的列表（fetch_sheet_layout 的回傳值）
+    :return: {欄索引: (起始列列表, 結束列列表)}，兩個列表皆依起始列排序
     """
-    request = service.spreadsheets().get(
-        spreadsheetId=GOOGLE_SHEET_ID,
-        fields="sheets(merges)"
-    )
-    response = request.execute()
-    sheets_data = response.get('sheets', [])
-
-    if not sheets_data:
-        print("No sheets found or no merges in the sheet.")
-        return []
-    
-    # 回傳第一個工作表的合併儲存格範圍（若無則為空列表）
-    return sheets_data[0].get('merges', [])
+    columns = {}
+    for merge in merges or []:
+        for column in range(merge['startColumnIndex'], merge['endColumnIndex']):
+            columns.setdefault(column, []).append((merge['startRowIndex'], merge['endRowIndex']))
+
+    index = {}
+    for column, intervals in columns.items():
+        intervals.sort()
+        index[column] = ([start for start, _ in intervals], [end for _, end in intervals])
+    return index
+
+def lookup_merge_start(row: int, column: int, merge_index: dict) -> int:
+    """
+    以 build_merge_index 建立的索引查詢儲存格 (row, column) 所屬的合併範圍，
+    行為與 check_cell_merge_status 相同，但每次查詢僅需 O(log n)。
+
+    :param row: 儲存格所在的列索引（從 0 開始）
+    :param column: 儲存格所在的行索引（從 0 開始）
+    :param merge_index: build_merge_index 回傳的索引
+    :return: 合併範圍的起始列索引，若該儲存格未屬於任何合併範圍則回傳 -1
+    """
+    intervals = merge_index.get(column)
+    if not intervals:
+        return -1
+
+    starts, ends = intervals
+    pos = bisect_right(starts, row) - 1
+    if pos >= 0 and row < ends[pos]:
+        return starts[pos]
+
+    return -1
 
 def check_cell_merge_status(row: int, column: int, merges: list) -> int:
     """
     檢查指定的儲存格 (row, column) 是否屬於任何合併儲存格範圍，
     若是則回傳該合併區塊的起始列索引，否則回傳 -1。
 
+    （逐一掃描所有合併範圍；大量查詢時請改用 build_merge_index + lookup_merge_start）
+
     :param row: 儲存格所在的列索引（從 0 開始）
     :param column: 儲存格所在的行索引（從 0 開始）
     :param merges: 合併儲存格範圍的列表
@@ -40,4 +62,4 @@ def check_cell_merge_status(row: int, column: int, merges: list) -> int:
             merge['startColumnIndex'] <= column < merge['endColumnIndex']):
             return merge['startRowIndex']
     
-    return -1
\ No newline at end of file
+    return -1
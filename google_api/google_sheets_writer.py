@@ -0,0 +1,80 @@
+from settings import *
+from utils.rate_limiter import execute
+
+def column_letter(column: int) -> str:
+    """
+    將欄號轉換為 A1 表示法的欄位字母（例如 1 → A，28 → AB）
+
+    :param column: 欄號（從 1 開始）
+    :return: 欄位字母
+    """
+    letters = ""
+    while column > 0:
+        column, remainder = divmod(column - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+class SheetWriteBuffer:
+    """
+    問卷工作表的寫入緩衝區：
+
+      - 以 (row, column) 為鍵收集儲存格更新，同一儲存格重複寫入時只保留最後一次的值
+      - 累積至 SHEET_WRITE_BATCH_SIZE 筆，或呼叫 flush() 時，以單一次 values.batchUpdate 寫回
+      - 提供與 gspread Worksheet.update_cell 相同的呼叫介面（row, col 從 1 開始）
+    """
+
+    def __init__(self, service, worksheet_name: str = GOOGLE_WORKSHEET_NAME, batch_size: int = SHEET_WRITE_BATCH_SIZE):
+        """
+        :param service: Google Sheets API (v4) 服務對象
+        :param worksheet_name: 寫入的工作表名稱
+        :param batch_size: 累積多少個待寫入儲存格時自動送出
+        """
+        self.service = service
+        self.worksheet_name = worksheet_name
+        self.batch_size = batch_size
+        self.pending = {}
+        self.requested_updates = 0
+        self.api_calls = 0
+
+    def update_cell(self, row: int, col: int, value) -> None:
+        """
+        暫存一筆儲存格更新（row, col 皆從 1 開始，與 gspread 相同）。
+
+        :param row: 列號
+        :param col: 欄號
+        :param value: 要寫入的值
+        """
+        self.pending[(row, col)] = value
+        self.requested_updates += 1
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        以一次 values.batchUpdate 送出所有暫存的儲存格更新並清空緩衝區。
+        """
+        if not self.pending:
+            return
+
+        data = [
+            {
+                'range': f"'{self.worksheet_name}'!{column_letter(col)}{row}",
+                'values': [[value]]
+            }
+            for (row, col), value in sorted(self.pending.items())
+        ]
+        execute("sheets", self.service.spreadsheets().values().batchUpdate(
+            spreadsheetId=GOOGLE_SHEET_ID,
+            body={'valueInputOption': 'USER_ENTERED', 'data': data}
+        ))
+
+        self.api_calls += 1
+        self.pending = {}
+
+    def report(self) -> None:
+        """
+        輸出寫入統計：原本逐格寫入所需的 API 次數與實際送出的次數。
+        """
+        saved = self.requested_updates - self.api_calls
+        print(f"\n  ❏ 試算表寫回完成：{self.requested_updates} 筆儲存格更新，"
+              f"以 {self.api_calls} 次 batchUpdate 送出（節省 {saved} 次 API 呼叫）")
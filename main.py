@@ -1,37 +1,76 @@
+import argparse
+
+from settings import *
 from google_api.google_auth import authenticate_services
-from google_api.google_sheets import load_and_process_sheet_data
-from google_api.google_sheets_merges import fetch_merged_cells
+from google_api.google_sheets import fetch_sheet_layout, load_and_process_sheet_data
 from google_api.google_docs import generate_report
+from utils.chart_cache import display_chart_cache_stats
 from utils.chart_generate_handler import generate_charts
+from utils.checkpoint import PIPELINE_STAGES, run_stage, start_pipeline
 from utils.display_settings import display_settings
+from utils.llm_cache import display_llm_cache_stats
+from utils.llm_handler import display_llm_stats
+from utils.report_renderer import render_local_reports
+
+def output_reports(docs_service, data: dict) -> bool:
+    """
+    輸出報告：生成並更新 Google Docs 報告內容，並輸出本地報告（DOCX / HTML / Markdown）。
+
+    :param docs_service: Google Docs API 服務對象
+    :param data: 包含報告各項數據的字典
+    :return: Google Docs 報告是否已寫入（未輸出 Google Doc 時為 True）
+    """
+    written = True
+    if "google_doc" in REPORT_OUTPUTS:
+        written = generate_report(docs_service, data)
+    render_local_reports(data)
+    return written
 
-def main():
+def main(resume_from: str = None, resume: bool = False):
 
     # 顯示目前的系統與設定資訊
     display_settings()
 
+    # 決定開始的階段；之前的階段沿用檢查點中的結果
+    if not start_pipeline(resume_from, resume):
+        return
+
     # 驗證 Google API 並取得各服務的對象：
-    # - sheets_service: 用於讀取 Google Sheets 數據（透過 gspread）
-    # - metadata_service: 用於取得試算表元資料（如合併儲存格範圍）
+    # - sheets_service: 用於讀寫 Google Sheets 數據與試算表元資料（如合併儲存格範圍）
     # - docs_service: 用於操作 Google Docs 報告
     # - drives_service: 用於上傳圖表圖片到 Google Drive
-    sheets_service, metadata_service, docs_service, drives_service = authenticate_services()
+    sheets_service, docs_service, drives_service = authenticate_services()
     
-    # 取得試算表中所有合併儲存格的範圍資訊
-    merged_ranges = fetch_merged_cells(metadata_service)
+    # 取得問卷工作表中所有合併儲存格的範圍資訊與標題列
+    merged_ranges, header = run_stage("layout", fetch_sheet_layout, sheets_service)
     
     # 讀取問卷數據並處理
-    data = load_and_process_sheet_data(sheets_service, merged_ranges)
+    data = run_stage("sheet", load_and_process_sheet_data, sheets_service, merged_ranges, header)
     
-    # 根據數據生成圖表（例如儀表圖與徑向圖），並上傳至 Google Drive
-    data = generate_charts(drives_service, data)
+    # 根據數據生成圖表（例如儀表圖與徑向圖），輸出 Google Doc 時並上傳至 Google Drive
+    data = run_stage("charts", generate_charts, drives_service if "google_doc" in REPORT_OUTPUTS else None, data)
+
+    # 根據處理後的數據，生成並更新 Google Docs 報告內容，並輸出本地報告
+    report_written = run_stage("report", output_reports, docs_service, data)
+
+    # 顯示本次執行的 LLM 呼叫耗時與快取命中統計
+    display_llm_stats()
+    display_llm_cache_stats()
+    display_chart_cache_stats()
 
-    # 根據處理後的數據，生成並更新 Google Docs 報告內容
-    generate_report(docs_service, data)
+    if not report_written:
+        print(f"\n\033[31m[ERROR] Google Doc 報告未寫入，請依上方訊息修正文件後以 --resume 重新執行\033[0m\n")
+        return
 
     print(f"\n\033[32m╔═══════════════════════════════════════════════╗\033[0m")
     print(f"\033[32m║ TASK COMPLETED! REPORT PROCESSING SUCCESSFUL! ║\033[0m")
     print(f"\033[32m╚═══════════════════════════════════════════════╝\033[0m\n")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="生成 Well-Architected Framework 評估報告")
+    resume_options = parser.add_mutually_exclusive_group()
+    resume_options.add_argument("--resume", action="store_true", help="從上次執行中斷的階段繼續（沿用檢查點中已完成的結果）")
+    resume_options.add_argument("--resume-from", choices=PIPELINE_STAGES, metavar="STAGE",
+                                help=f"從指定的階段開始執行，之前的階段沿用檢查點中的結果（{' / '.join(PIPELINE_STAGES)}）")
+    args = parser.parse_args()
+    main(args.resume_from, args.resume)
\ No newline at end of file
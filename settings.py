@@ -21,6 +21,27 @@ REPORT_DATE = ""
 ENABLE_AI_GENERATION = True
 STAGE_ORDER = ["短期", "中期", "長期", "其他"]
 
+# =========================================================================
+# 報告輸出設定
+#   - REPORT_OUTPUTS: 報告輸出方式，可同時指定多種
+#       - "google_doc": 上傳圖表至 Google Drive 並寫入 GOOGLE_DOC_ID 的 Google Doc
+#       - "docx" / "html" / "md": 輸出本地的 Word / HTML / Markdown 檔案（圖表直接嵌入，不呼叫 Docs / Drive API）
+#     不含 "google_doc" 時不上傳圖表，也不修改 Google Doc，適合快速預覽
+#   - REPORT_OUTPUT_DIR: 本地報告的輸出資料夾
+# =========================================================================
+REPORT_OUTPUTS = ["google_doc"]
+REPORT_OUTPUT_DIR = "output"
+
+# =========================================================================
+# 執行進度檢查點設定
+#   - ENABLE_CHECKPOINT: 是否於各階段（讀取試算表結構、處理問卷、生成圖表、輸出報告）完成後保存結果，
+#                        處理問卷時另於每個主題的 AI 統整完成後保存進度；執行中斷後可以
+#                        python main.py --resume 從中斷處繼續，或 --resume-from <階段> 指定開始的階段
+#   - CHECKPOINT_PATH: 檢查點檔案路徑（未指定 --resume / --resume-from 時，每次執行都會重新建立）
+# =========================================================================
+ENABLE_CHECKPOINT = True
+CHECKPOINT_PATH = "cache/checkpoint.pickle"
+
 # =========================================================================
 # AI 處理 Prompt 設定
 #   - PROMPTS: 各任務對應的系統提示文字，用以引導 LLM 生成內容
@@ -46,8 +67,22 @@ PROMPTS = {
 # ========================================================================
 # Google API 相關設定
 #   - GOOGLE_LOCATION: 根據實際區域設定（例如 "asia-east1"）
-#   - SLEEP: 一般 API 請求的延遲時間（秒）
-#   - SLEEP_IMAGE_PROCESSING: 圖片處理的額外延遲時間（秒）
+#   - API_RATE_LIMITS: 各 Google API 共用的速率上限（per_minute: 每分鐘請求數，burst: 閒置後可連續送出的請求數），
+#                      遇到限流時會自動降速，之後逐步調回上限
+#   - API_MAX_RETRIES: 遇到限流（429）或暫時性伺服器錯誤（5xx）時的最多重試次數
+#   - API_BACKOFF_BASE / API_BACKOFF_MAX: 重試前等待時間的基數與上限（秒），每次重試加倍並加入隨機抖動
+#   - DRIVE_UPLOAD_CONCURRENCY: 同時上傳圖表圖片的數量上限（設為 1 時依序上傳）
+#   - DRIVE_RESUMABLE_THRESHOLD: 圖片超過此大小（bytes）才使用可續傳上傳，較小的圖片以單次請求上傳
+#   - DRIVE_BATCH_SIZE: 設定圖片公開權限時，每個 Drive 批次請求包含的請求數（上限 100）
+#   - SHEET_WRITE_BATCH_SIZE: 寫回問卷的儲存格更新累積到此數量時，合併為一次 batchUpdate 送出
+#   - DOC_WRITE_MODE: 報告寫入請求的產生方式
+#       - "planned": 先在本地規劃整份報告，以一個 insertText 插入全部文字，再由後往前建立項目符號與插入圖片（請求數最少）
+#       - "sequential": 依寫入順序逐段插入文字、樣式與圖片
+#   - DOC_BATCH_MAX_BYTES: 寫入報告時，單次 Google Docs batchUpdate 的請求內容大小上限（bytes），超過時分批送出
+#   - DOC_IMAGE_READY_TIMEOUT: 送出插入圖片的請求前，等待圖片連結可公開取得的秒數上限（逾時仍照常送出）
+#   - DOC_IMAGE_MAX_RETRIES: Google Docs 無法取得某張圖片而使整批請求失敗時，針對該圖片重新確認並重送的次數上限（超過時以佔位符取代）
+#   - ENABLE_INCREMENTAL_REPORT: 文件中沒有定位文字、但有上次寫入的報告區段時，只重寫資料有變更的區段
+#                                （各區段以具名範圍標記並記錄資料雜湊；文件中有定位文字時一律完整寫入），報告日期同樣會更新
 #   - GOOGLE_WORKSHEET_NAME: 問卷工作表名稱
 #   - QUESTIONNAIRE_END_MARKER: 問卷結尾標記字串，系統遇到此標記時停止讀取資料
 #   - INSERT_POINT: Google Doc 插入點標記，寫入後會自動刪除
@@ -58,8 +93,25 @@ PROMPTS = {
 # ========================================================================
 GOOGLE_LOCATION = "asia-east1"
 
-SLEEP = 1
-SLEEP_IMAGE_PROCESSING = 5
+API_RATE_LIMITS = {
+    "sheets": {"per_minute": 60, "burst": 10},
+    "docs": {"per_minute": 60, "burst": 10},
+    "drive": {"per_minute": 600, "burst": 20},
+}
+API_MAX_RETRIES = 5
+API_BACKOFF_BASE = 2
+API_BACKOFF_MAX = 60
+
+DRIVE_UPLOAD_CONCURRENCY = 4
+DRIVE_RESUMABLE_THRESHOLD = 5 * 1024 * 1024
+DRIVE_BATCH_SIZE = 100
+
+SHEET_WRITE_BATCH_SIZE = 500
+DOC_WRITE_MODE = "planned"
+DOC_BATCH_MAX_BYTES = 4 * 1024 * 1024
+DOC_IMAGE_READY_TIMEOUT = 60
+DOC_IMAGE_MAX_RETRIES = 2
+ENABLE_INCREMENTAL_REPORT = True
 
 GOOGLE_WORKSHEET_NAME = "Questionnaire"
 QUESTIONNAIRE_END_MARKER = "QUESTIONNAIRE_END_MARKER"
@@ -79,7 +131,60 @@ GOOGLE_TOKEN_PICKLE = TOKEN_DIR + "token.pickle"
 # AI 相關設定
 #   - LLM_NAME: 使用的 LLM 名稱，目前僅支援 "gemini"
 #   - GEMINI_MODEL_NAME: Gemini 模型名稱
+#   - ENABLE_LLM_CACHE: 是否使用本機 LLM 回覆快取（相同模型、提示與輸入時不重新呼叫 LLM），設為 False 可略過快取
+#   - LLM_CACHE_PATH: 快取資料庫（SQLite）檔案路徑
+#   - LLM_CACHE_MAX_ENTRIES: 快取筆數上限，超出時淘汰最久未使用的紀錄
+#   - LLM_CACHE_TTL_DAYS: 快取有效天數，逾期的紀錄會重新呼叫 LLM
+#   - LLM_MAX_CONCURRENCY: 同時進行中的 LLM 請求上限（設為 1 時依序呼叫）
+#   - LLM_REQUESTS_PER_MINUTE: 每分鐘最多送出的 LLM 請求數（<= 0 表示不限制），遇到限流時同樣會自動降速與重試
+#   - LLM_BATCH_TOKEN_BUDGET: 潤飾客戶現況備註時，同一主題的多筆備註合併為一個請求的 token 預算（估計值，含回覆；設為 0 時逐筆請求）
+#   - LLM_BATCH_MAX_ITEMS: 每個批次請求最多包含的備註筆數
+#   - LLM_BATCH_OUTPUT_TOKENS: 估算批次大小時，每筆備註預留的回覆 token 數
+#   - QUESTION_ASPECT_INDEX_PATH: 問卷問題 → 徑向圖標籤（aspect）索引檔案，可用 python -m utils.question_aspect_index 預先建立
 # ========================================================================
 
 LLM_NAME = "gemini" # 目前只有使用 gemini 的版本
-GEMINI_MODEL_NAME = "gemini-1.5-flash-002"
\ No newline at end of file
+GEMINI_MODEL_NAME = "gemini-1.5-flash-002"
+
+ENABLE_LLM_CACHE = True
+LLM_CACHE_PATH = "cache/llm_cache.sqlite3"
+LLM_CACHE_MAX_ENTRIES = 20000
+LLM_CACHE_TTL_DAYS = 30
+
+LLM_MAX_CONCURRENCY = 8
+LLM_REQUESTS_PER_MINUTE = 60
+
+LLM_BATCH_TOKEN_BUDGET = 4000
+LLM_BATCH_MAX_ITEMS = 20
+LLM_BATCH_OUTPUT_TOKENS = 150
+
+QUESTION_ASPECT_INDEX_PATH = "cache/question_aspects.json"
+
+# ========================================================================
+# 圖表相關設定
+#   - CHART_DEBUG_DIR: 圖表於記憶體中生成並直接上傳，不寫入磁碟；設定資料夾路徑（例如 "./images"）時，
+#                      會另存一份最終圖表 PNG 以便檢查，留空則不輸出
+#   - ENABLE_CHART_CACHE: 是否使用本機圖表快取（相同類型、數值、標籤與樣式的圖表不重新繪製），
+#                         上傳時資料夾中已有相同內容（MD5）的圖片也會直接沿用，不重新上傳
+#   - CHART_CACHE_DIR: 圖表快取資料夾（快取的 PNG 與 manifest.json）
+#   - CHART_CACHE_MAX_ENTRIES: 快取圖表數量上限，超出時淘汰最久未使用的圖表
+#   - CHART_LAYOUT: 主題圖表的排版方式，"separate"（儀表圖與徑向圖分別上傳、插入）或
+#                   "combined"（兩張圖左右合併為一張，上傳、權限設定與文件插入次數減半）
+#   - DOC_IMAGE_HEIGHTS_PT: 各類圖表插入 Google Doc 時的顯示高度（pt）
+#   - ENABLE_PNG_OPTIMIZATION: 上傳前是否將圖表縮放至顯示所需的像素尺寸、轉為調色盤色彩並壓縮 PNG
+#   - CHART_OUTPUT_DPI: 縮放時每英吋（72 pt）對應的像素數，例如 130 pt 高的圖表於 192 DPI 輸出為 347 像素高
+#   - PNG_PALETTE_COLORS: 調色盤色彩數上限（2~256）
+#   - CHART_RENDER_WORKERS: 並行繪製圖表的程序數上限（設為 1 時於主程序依序繪製）
+#   - GAUGE_CHART_BACKEND: 儀表圖繪製方式，"matplotlib"（直接繪製，不需瀏覽器）或 "pyecharts"（原本的 pyecharts + Selenium 截圖，需安裝 Chrome）
+# ========================================================================
+CHART_DEBUG_DIR = ""
+ENABLE_CHART_CACHE = True
+CHART_CACHE_DIR = "cache/charts"
+CHART_CACHE_MAX_ENTRIES = 500
+CHART_LAYOUT = "separate"
+DOC_IMAGE_HEIGHTS_PT = {'gauge': 130, 'radial': 130, 'combined': 130, 'total': 200}
+ENABLE_PNG_OPTIMIZATION = True
+CHART_OUTPUT_DPI = 192
+PNG_PALETTE_COLORS = 256
+CHART_RENDER_WORKERS = 4
+GAUGE_CHART_BACKEND = "matplotlib"
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from settings import *
+from utils.remove_image_whitespace import IMAGE_TRIM_MARGIN
+
+# 圖表樣式版本：修改圖表外觀（顏色、尺寸、字型等）時遞增，讓既有快取失效
+CHART_STYLE_VERSION = 1
+
+# 圖表快取統計（本次執行）
+CHART_CACHE_STATS = {'hits': 0, 'misses': 0, 'evictions': 0, 'reused_uploads': 0}
+
+_lock = threading.Lock()
+_manifest = None
+
+def chart_key(kind: str, *inputs) -> str:
+    """
+    以圖表類型、輸入數值、標籤與樣式設定計算快取鍵值（SHA-256），任一項改變即視為不同圖表。
+
+    :param kind: 圖表類型（"gauge"、"radial" 或 "combined"）
+    :param inputs: 繪圖輸入（數值、類別標籤等）
+    :return: 十六進位的雜湊字串
+    """
+    style = [CHART_STYLE_VERSION, IMAGE_TRIM_MARGIN, ENABLE_PNG_OPTIMIZATION, CHART_OUTPUT_DPI, PNG_PALETTE_COLORS]
+    if kind in ("gauge", "combined"):
+        style.append(GAUGE_CHART_BACKEND)
+    payload = json.dumps([kind, list(inputs), style], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _manifest_path() -> str:
+    return os.path.join(CHART_CACHE_DIR, "manifest.json")
+
+def _chart_path(key: str) -> str:
+    return os.path.join(CHART_CACHE_DIR, f"{key}.png")
+
+def _load() -> dict:
+    """
+    讀取（必要時建立）快取目錄的 manifest，並移除圖檔已遺失的紀錄。
+
+    :return: {鍵值: {'md5': 圖檔 MD5, 'drive_file_id': Drive 檔案 ID, 'created_at': 建立時間, 'accessed_at': 最後存取時間}}
+    """
+    global _manifest
+
+    if _manifest is None:
+        os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+        manifest = {}
+        if os.path.exists(_manifest_path()):
+            with open(_manifest_path(), "r", encoding="utf-8") as manifest_file:
+                manifest = json.load(manifest_file)
+        _manifest = {key: entry for key, entry in manifest.items() if os.path.exists(_chart_path(key))}
+
+    return _manifest
+
+def _evict() -> None:
+    """
+    依最後存取時間（LRU）刪除超出 CHART_CACHE_MAX_ENTRIES 的紀錄與圖檔。
+    """
+    excess = len(_manifest) - CHART_CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+
+    for key in sorted(_manifest, key=lambda key: _manifest[key]['accessed_at'])[:excess]:
+        del _manifest[key]
+        if os.path.exists(_chart_path(key)):
+            os.remove(_chart_path(key))
+    CHART_CACHE_STATS['evictions'] += excess
+
+def chart_cache_get(key: str):
+    """
+    讀取快取的圖表 PNG。
+
+    :param key: chart_key 計算的鍵值
+    :return: (PNG 位元組, 上次上傳的 Drive 檔案 ID 或 None)；未命中或快取停用時回傳 None
+    """
+    if not ENABLE_CHART_CACHE:
+        return None
+
+    with _lock:
+        entry = _load().get(key)
+        if entry is None:
+            CHART_CACHE_STATS['misses'] += 1
+            return None
+
+        with open(_chart_path(key), "rb") as chart_file:
+            content = chart_file.read()
+        entry['accessed_at'] = time.time()
+        CHART_CACHE_STATS['hits'] += 1
+        return content, entry.get('drive_file_id')
+
+def chart_cache_set(key: str, content: bytes) -> None:
+    """
+    寫入圖表 PNG 至快取，超出數量上限時淘汰最久未使用的紀錄。
+
+    :param key: chart_key 計算的鍵值
+    :param content: PNG 位元組
+    """
+    if not ENABLE_CHART_CACHE:
+        return
+
+    with _lock:
+        manifest = _load()
+        with open(_chart_path(key), "wb") as chart_file:
+            chart_file.write(content)
+        now = time.time()
+        manifest[key] = {'md5': hashlib.md5(content).hexdigest(), 'drive_file_id': None, 'created_at': now, 'accessed_at': now}
+        _evict()
+
+def chart_cache_set_drive_file(key: str, file_id: str) -> None:
+    """
+    記錄圖表上傳後的 Drive 檔案 ID，下次執行時優先沿用。
+
+    :param key: chart_key 計算的鍵值
+    :param file_id: Drive 檔案 ID
+    """
+    if not ENABLE_CHART_CACHE:
+        return
+
+    with _lock:
+        entry = _load().get(key)
+        if entry is not None:
+            entry['drive_file_id'] = file_id
+
+def save_chart_cache() -> None:
+    """
+    將 manifest 寫回快取目錄（先寫入暫存檔再取代，避免中斷時留下不完整的檔案）。
+    """
+    if not ENABLE_CHART_CACHE or _manifest is None:
+        return
+
+    with _lock:
+        temp_path = _manifest_path() + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(_manifest, manifest_file, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(temp_path, _manifest_path())
+
+def display_chart_cache_stats() -> None:
+    """
+    輸出本次執行的圖表快取命中與 Drive 重複上傳略過統計。
+    """
+    if not ENABLE_CHART_CACHE:
+        return
+
+    total = CHART_CACHE_STATS['hits'] + CHART_CACHE_STATS['misses']
+    if total == 0:
+        return
+
+    print(f"\n  ❏ 圖表快取：命中 {CHART_CACHE_STATS['hits']}/{total} 張"
+          f"（{CHART_CACHE_STATS['hits'] / total * 100:.1f}%），沿用 Drive 既有檔案 {CHART_CACHE_STATS['reused_uploads']} 張，"
+          f"淘汰 {CHART_CACHE_STATS['evictions']} 筆")
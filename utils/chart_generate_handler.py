@@ -1,88 +1,327 @@
+import hashlib
+import io
 import os
+import threading
 import time
-from googleapiclient.http import MediaFileUpload
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import google_auth_httplib2
+import httplib2
+from PIL import Image
+from googleapiclient.http import MediaIoBaseUpload
 from googleapiclient.errors import HttpError
 from settings import *
-from utils.llm_handler import llm
-from utils.chart_generator_gauge import create_gauge_chart
-from utils.chart_generator_radial import create_radial_chart
-from utils.remove_image_whitespace import remove_image_whitespace
+from utils.rate_limiter import execute, is_retryable_error
+from utils.question_aspect_index import get_question_aspects
+from utils.chart_cache import chart_cache_get, chart_cache_set, chart_cache_set_drive_file, chart_key, save_chart_cache, CHART_CACHE_STATS
+from utils.chart_generator_gauge import build_pyecharts_gauge, render_gauge_matplotlib
+from utils.chart_generator_radial import render_radial_chart
+from utils.chart_image import chart_ready, combine_side_by_side, display_png_optimize_stats, optimize_chart_png, reset_png_optimize_stats
+from utils.remove_image_whitespace import trim_image
 
 
-def upload_image(service, path, folder_id):
+_thread_local = threading.local()
+
+def thread_http(service):
+    """
+    取得目前執行緒專用的已授權 http 連線（httplib2 連線不可跨執行緒共用）。
+
+    :param service: Google API 服務對象
+    :return: AuthorizedHttp；服務沒有憑證資訊時回傳 None（使用服務本身的連線）
     """
-    上傳圖片到指定的 Google Drive 資料夾並回傳可共享的圖片連結。
+    credentials = getattr(getattr(service, '_http', None), 'credentials', None)
+    if credentials is None:
+        return None
+    if getattr(_thread_local, 'credentials', None) is not credentials:
+        _thread_local.http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+        _thread_local.credentials = credentials
+    return _thread_local.http
+
+
+def upload_file(service, content: bytes, name: str, folder_id):
+    """
+    上傳單張 PNG（小檔案使用一次完成的簡單上傳，超過 DRIVE_RESUMABLE_THRESHOLD 才使用可續傳上傳）。
 
     :param service: Google Drive API 服務對象
-    :param path: 圖片檔案路徑
+    :param content: PNG 位元組
+    :param name: 上傳後的檔名
     :param folder_id: 目標資料夾 ID
-    :return: 圖片共享連結，若失敗則回傳 None
+    :return: 檔案 ID，若失敗則回傳 None
     """
-    # 清除圖片多餘的空白
-    remove_image_whitespace(path)
-
     try:
         file_metadata = {
-            'name': os.path.basename(path),
+            'name': name,
             'parents': [folder_id]
         }
-        media = MediaFileUpload(path, resumable=True)
-        
+        media = MediaIoBaseUpload(io.BytesIO(content), mimetype='image/png', resumable=len(content) > DRIVE_RESUMABLE_THRESHOLD)
+        md5 = hashlib.md5(content).hexdigest()
+
+        def find_uploaded():
+            # 建立檔案不是冪等的請求：結果不明（5xx、逾時）時先確認檔案是否已建立，避免重試後產生重複的檔案
+            quoted_name = name.replace("'", "\\'")
+            response = execute("drive", service.files().list(
+                q=f"'{folder_id}' in parents and name = '{quoted_name}' and trashed = false",
+                fields="files(id, md5Checksum)"
+            ), http=thread_http(service))
+            return next(({'id': file['id']} for file in response.get('files', []) if file.get('md5Checksum') == md5), None)
+
         # 上傳圖片並取得文件 ID
-        file = service.files().create(body=file_metadata, media_body=media, fields='id').execute()
+        file = execute("drive", service.files().create(body=file_metadata, media_body=media, fields='id'),
+                       http=thread_http(service), recover=find_uploaded)
         file_id = file.get('id')
-        print(f"\n    ▪ 圖片成功上傳，File ID: {file_id}")
-        
-        # 設定圖片為公開可讀
+        print(f"\n    ▪ 圖片成功上傳（{name}），File ID: {file_id}")
+        return file_id
+    except Exception as error:
+        # 每張圖片的錯誤獨立處理（含連線逾時等非 HttpError 的錯誤），不影響其他圖片
+        print(f"\n  \033[31m[ERROR] 圖片上傳過程中出現錯誤（{name}）: {error}\033[0m")
+        return None
+
+
+def list_folder_files(service, folder_id) -> dict:
+    """
+    列出資料夾中的檔案與其 MD5，用於略過內容相同的重複上傳。
+
+    :param service: Google Drive API 服務對象
+    :param folder_id: 資料夾 ID
+    :return: {MD5: [檔案 ID, ...]}；查詢失敗時回傳空字典（全部重新上傳）
+    """
+    files, page_token = {}, None
+    try:
+        while True:
+            response = execute("drive", service.files().list(
+                q=f"'{folder_id}' in parents and trashed = false",
+                fields="nextPageToken, files(id, md5Checksum)",
+                pageSize=1000,
+                pageToken=page_token
+            ))
+            for file in response.get('files', []):
+                if file.get('md5Checksum'):
+                    files.setdefault(file['md5Checksum'], []).append(file['id'])
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return files
+    except HttpError as error:
+        print(f"\n  \033[33m[WARNING] 無法查詢 Drive 資料夾中的既有圖片，將全部重新上傳: {error}\033[0m")
+        return {}
+
+
+def upload_files(service, uploads: list, folder_id, preferred_ids: list = None, max_workers: int = DRIVE_UPLOAD_CONCURRENCY) -> list:
+    """
+    並行上傳多張 PNG；啟用 ENABLE_CHART_CACHE 時，資料夾中已有相同內容（MD5）的檔案直接沿用，不重新上傳。
+
+    :param service: Google Drive API 服務對象
+    :param uploads: (PNG 位元組, 檔名) 列表
+    :param folder_id: 目標資料夾 ID
+    :param preferred_ids: 與 uploads 對應、上次上傳的檔案 ID（內容相同時優先沿用），可為 None
+    :param max_workers: 同時上傳的數量上限
+    :return: 與 uploads 順序相同的檔案 ID 列表（失敗者為 None）
+    """
+    preferred_ids = preferred_ids or [None] * len(uploads)
+    existing = list_folder_files(service, folder_id) if uploads and ENABLE_CHART_CACHE else {}
+
+    file_ids = [None] * len(uploads)
+    jobs = {}
+    for i, ((content, name), preferred_id) in enumerate(zip(uploads, preferred_ids)):
+        md5 = hashlib.md5(content).hexdigest()
+        matches = existing.get(md5)
+        if matches:
+            file_ids[i] = preferred_id if preferred_id in matches else matches[0]
+            CHART_CACHE_STATS['reused_uploads'] += 1
+            print(f"\n    ▪ 資料夾中已有相同圖片（{name}），沿用 File ID: {file_ids[i]}")
+        else:
+            # 同一次執行中內容相同的圖片只上傳一次
+            jobs.setdefault(md5, (content, name, []))[2].append(i)
+
+    jobs = list(jobs.values())
+    if max_workers <= 1 or len(jobs) <= 1:
+        uploaded = [upload_file(service, content, name, folder_id) for content, name, _ in jobs]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            uploaded = list(executor.map(lambda job: upload_file(service, job[0], job[1], folder_id), jobs))
+
+    for (_, _, indices), file_id in zip(jobs, uploaded):
+        for i in indices:
+            file_ids[i] = file_id
+    return file_ids
+
+
+def share_files(service, file_ids: list) -> dict:
+    """
+    以 Drive 批次請求將多個檔案設為公開可讀（每批最多 DRIVE_BATCH_SIZE 個）；
+    批次中受限流而失敗的項目改以單筆請求重試。
+
+    :param service: Google Drive API 服務對象
+    :param file_ids: 檔案 ID 列表
+    :return: {檔案 ID: 是否成功}
+    """
+    permission = {'role': 'reader', 'type': 'anyone'}
+    results = {}
+    retry = []
+
+    def callback(request_id, response, exception):
+        file_id = file_ids[int(request_id)]
+        if exception is None:
+            results[file_id] = True
+        elif is_retryable_error(exception):
+            retry.append(file_id)
+        else:
+            results[file_id] = False
+            print(f"\n  \033[31m[ERROR] 圖片分享連結取得失敗（File ID: {file_id}）: {exception}\033[0m")
+
+    for offset in range(0, len(file_ids), DRIVE_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=callback)
+        for i in range(offset, min(offset + DRIVE_BATCH_SIZE, len(file_ids))):
+            batch.add(service.permissions().create(fileId=file_ids[i], body=permission, fields="id"), request_id=str(i))
+        try:
+            execute("drive", batch)
+        except HttpError as error:
+            print(f"\n  \033[31m[ERROR] 批次設定圖片權限失敗: {error}\033[0m")
+
+    for file_id in retry:
         try:
-            permission = {'role': 'reader', 'type': 'anyone'}
-            service.permissions().create(fileId=file_id, body=permission, fields="id").execute()
+            execute("drive", service.permissions().create(fileId=file_id, body=permission, fields="id"))
+            results[file_id] = True
+        except HttpError as error:
+            results[file_id] = False
+            print(f"\n  \033[31m[ERROR] 圖片分享連結取得失敗（File ID: {file_id}）: {error}\033[0m")
+
+    return results
+
+
+def share_links(service, file_ids: list) -> list:
+    """
+    以批次請求將檔案設為公開，並依輸入順序回傳可共享的圖片連結。
+
+    :param service: Google Drive API 服務對象
+    :param file_ids: 檔案 ID 列表（上傳失敗者為 None）
+    :return: 與 file_ids 順序相同的圖片共享連結列表（失敗者為 None）
+    """
+    shared = share_files(service, list(dict.fromkeys(file_id for file_id in file_ids if file_id)))
+
+    links = []
+    for file_id in file_ids:
+        if file_id and shared.get(file_id):
             shared_link = f"https://drive.google.com/uc?export=view&id={file_id}"
             print(f"\n    ▪ 圖片已設為公開，分享連結: {shared_link}")
-            return shared_link
-        except HttpError as error:
-            print(f"\n  \033[31m[ERROR] 圖片分享連結取得失敗: {error}\033[0m")
-            return None
-    except HttpError as error:
-        print(f"\n  \033[31m[ERROR] 圖片上傳過程中出現錯誤: {error}\033[0m")
-        return None
+            links.append(shared_link)
+        else:
+            links.append(None)
+    return links
+
+
+def init_render_worker() -> None:
+    """
+    繪圖子程序的初始化：使用不需顯示裝置的 Agg 後端。
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def render_chart(job: tuple) -> Image.Image:
+    """
+    繪製單張圖表（可在子程序中執行）。
+
+    :param job: ("gauge", 成熟度) 或 ("radial", 數值列表, 類別列表)
+    :return: 已裁剪空白的圖表圖片
+    """
+    kind, args = job[0], job[1:]
+    if kind == "gauge":
+        return trim_image(render_gauge_matplotlib(*args))
+    return render_radial_chart(*args)
+
+
+def render_charts(jobs: list, max_workers: int = CHART_RENDER_WORKERS) -> list:
+    """
+    以程序池並行繪製多張圖表，並依輸入順序回傳結果。
+
+    :param jobs: render_chart 的工作列表
+    :param max_workers: 同時繪圖的程序數上限（不超過 CPU 核心數；為 1 時於目前程序依序繪製）
+    :return: 與 jobs 順序相同的圖表圖片列表
+    """
+    max_workers = min(max_workers, len(jobs), os.cpu_count() or 1)
+    if max_workers <= 1:
+        return [render_chart(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_render_worker) as executor:
+        return list(executor.map(render_chart, jobs))
+
+
+def render_chart_images(jobs: list) -> list:
+    """
+    繪製多張圖表：pyecharts 儀表圖共用瀏覽器，於目前程序一次截圖；其餘圖表以程序池並行繪製。
+    合併圖（"combined"）先拆成儀表圖與徑向圖分別繪製，再左右並排成一張。
+
+    :param jobs: render_chart 的工作列表，或 ("combined", 成熟度, 數值列表, 類別列表)
+    :return: 與 jobs 順序相同的已裁剪圖表圖片列表
+    """
+    flat = []
+    for job in jobs:
+        if job[0] == "combined":
+            flat.extend([("gauge", job[1]), ("radial", job[2], job[3])])
+        else:
+            flat.append(job)
+
+    images = [None] * len(flat)
+    browser = [i for i, job in enumerate(flat) if job[0] == "gauge" and GAUGE_CHART_BACKEND == "pyecharts"]
+    pool = [i for i, job in enumerate(flat) if i not in set(browser)]
+
+    if browser:
+        from utils.snapshot_service import snapshot_charts
+
+        snapshots = snapshot_charts([build_pyecharts_gauge(*flat[i][1:]) for i in browser])
+        for i, image in zip(browser, snapshots):
+            images[i] = trim_image(image)
+    for i, image in zip(pool, render_charts([flat[i] for i in pool])):
+        images[i] = image
+
+    results, rendered = [], iter(images)
+    for job in jobs:
+        if job[0] == "combined":
+            results.append(combine_side_by_side([next(rendered), next(rendered)]))
+        else:
+            results.append(next(rendered))
+    return results
 
 
 def generate_charts(service, data):
     """
     根據數據生成圖表，並上傳至 Google Drive，再將圖片連結儲存到數據字典中。
 
-    :param service: Google Drive API 服務對象
+    圖表的 PNG 另存於數據字典的 chart_images（[(圖表類型, PNG 位元組)]），供本地報告使用；
+    service 為 None 時只繪製圖表、不上傳（chart_path 為空）。
+
+    :param service: Google Drive API 服務對象，或 None
     :param data: 包含整體與各主題數據的字典
     :return: 更新後包含圖表連結的數據字典
     """
     print("\n╔═════════════════════════════ 報表圖片繪製進行中 ════════════════════════════╗")
+    reset_png_optimize_stats()
 
     # 取得當前時間並格式化日期字串
     formatted_date = time.strftime("%Y%m%d%H%M", time.localtime())
 
-    # 生成整體儀表圖
-    total_maturity = round(data['total_score'] / data['total_num'] * 100, 1)
-    gauge_path = create_gauge_chart("0", total_maturity, formatted_date)
-    shared_link = upload_image(service, gauge_path, GOOGLE_DRIVE_FOLDER_ID)
-    data['chart_path'] = [shared_link] if shared_link else []
-    data['chart_cat'] = ["gauge"]
-
-    # 為每個主題生成圖表
+    # 需要繪製的主題（遇到結尾標記即停止）
+    topics = []
     for i, topic in enumerate(data['topics']):
         if topic['not_applicable']:
             continue
         if topic['topic'] == QUESTIONNAIRE_END_MARKER:
             break
+        topics.append((i, topic))
+
+    # 徑向圖的類別標籤（只需要繪製的主題）：優先讀取 aspect 索引，索引中沒有的問題才呼叫 LLM
+    aspects = get_question_aspects([
+        question['question']
+        for _, topic in topics
+        for question in topic['questions'] if not question['not_applicable']
+    ])
 
-        # 生成主題儀表圖
+    # 建立所有圖表的繪製工作：整體儀表圖，以及每個主題的儀表圖與徑向圖
+    # （CHART_LAYOUT 為 "combined" 時，主題的兩張圖表合併為一張，上傳與插入次數減半）
+    total_maturity = round(data['total_score'] / data['total_num'] * 100, 1)
+    charts = [("0", "gauge", ("gauge", total_maturity), data)]
+    for i, topic in topics:
         topic_maturity = round(topic['topic_score'] / topic['topic_num'] * 100, 1)
-        gauge_path = create_gauge_chart(f"{i+1}", topic_maturity, formatted_date)
-        shared_link = upload_image(service, gauge_path, GOOGLE_DRIVE_FOLDER_ID)
-        topic['chart_path'] = [shared_link] if shared_link else []
-        topic['chart_cat'] = ["gauge"]
 
-        # 為該主題中的問題生成徑向圖
         maturities = []
         categories = []
         for question in topic['questions']:
@@ -90,13 +329,58 @@ def generate_charts(service, data):
                 continue
             question_maturity = round(question['score'] / question['num'] * 100, 1)
             maturities.append(question_maturity)
-            category_title = llm(LLM_NAME, "extract_question_aspects", "target sentences", question['question'])
-            categories.append(category_title)
+            categories.append(aspects[question['question']])
+
+        if CHART_LAYOUT == "combined":
+            charts.append((f"{i+1}", "combined", ("combined", topic_maturity, maturities, categories), topic))
+        else:
+            charts.append((f"{i+1}", "gauge", ("gauge", topic_maturity), topic))
+            charts.append((f"{i+1}", "radial", ("radial", maturities, categories), topic))
+
+    # 相同類型、數值、標籤與樣式的圖表直接使用快取，只繪製未命中的圖表（並行繪製）
+    # 文件中的顯示高度決定輸出尺寸，因此也列入快取鍵值（整體儀表圖以 'total' 的高度顯示）
+    heights = [DOC_IMAGE_HEIGHTS_PT["total" if target is data else kind] for _, kind, _, target in charts]
+    keys = [chart_key(*job, height_pt) for (_, _, job, _), height_pt in zip(charts, heights)]
+    cached = [chart_cache_get(key) for key in keys]
+    contents = [hit[0] if hit else None for hit in cached]
+    missing = [n for n, content in enumerate(contents) if content is None]
+    for n, image in zip(missing, render_chart_images([charts[n][2] for n in missing])):
+        # 縮放至文件顯示所需的尺寸並壓縮
+        contents[n] = optimize_chart_png(image, heights[n])
+        chart_cache_set(keys[n], contents[n])
+    display_png_optimize_stats()
+
+    labels = {"gauge": "儀表圖", "radial": "徑向條形圖", "combined": "儀表圖與徑向條形圖"}
+    for (name, kind, _, _), content, hit in zip(charts, contents, cached):
+        chart_ready(content, f"{formatted_date}_{kind}_{name}.png", f"Topic {name} {labels[kind]}" + ("（快取）" if hit else ""))
+
+    if service is None:
+        save_chart_cache()
+        links = [None] * len(charts)
+    else:
+        # 並行上傳（資料夾中已有相同內容者沿用既有檔案），再以批次請求設為公開
+        file_ids = upload_files(
+            service,
+            [(content, f"{formatted_date}_{kind}_{name}.png") for (name, kind, _, _), content in zip(charts, contents)],
+            GOOGLE_DRIVE_FOLDER_ID,
+            preferred_ids=[hit[1] if hit else None for hit in cached]
+        )
+        for key, file_id in zip(keys, file_ids):
+            if file_id:
+                chart_cache_set_drive_file(key, file_id)
+        save_chart_cache()
+        links = share_links(service, file_ids)
 
-        radial_path = create_radial_chart(f"{i+1}", maturities, categories, formatted_date)
-        shared_link = upload_image(service, radial_path, GOOGLE_DRIVE_FOLDER_ID)
-        topic['chart_path'].append(shared_link)
-        topic['chart_cat'].append("radial")
+    # 依固定順序將圖片連結寫入數據字典（上傳失敗的圖表不列入連結，本地報告仍使用 PNG）
+    for _, _, _, target in charts:
+        target['chart_path'] = []
+        target['chart_cat'] = []
+        target['chart_images'] = []
+    for (_, kind, _, target), link, content in zip(charts, links, contents):
+        target['chart_images'].append((kind, content))
+        if link:
+            target['chart_path'].append(link)
+            target['chart_cat'].append(kind)
 
     print("\n╚═════════════════════════════ 報表圖片繪製已完成 ════════════════════════════╝")
     return data
\ No newline at end of file
@@ -3,28 +3,112 @@ Reference:
     This implementation is inspired by techniques described in the following article:
     "https://blog.csdn.net/weixin_42152811/article/details/115899467"
 """
-import os
-from pyecharts import options as opts
-from pyecharts.charts import Gauge
-from pyecharts.render import make_snapshot
-from snapshot_selenium import snapshot
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib import font_manager
+from matplotlib.patches import Polygon, Wedge
+from PIL import Image
 import warnings
+from settings import *
+from utils.chart_image import figure_to_image
 
 # 忽略字形缺失的警告
 warnings.filterwarnings("ignore", category=UserWarning, message=".*Glyph.*missing from font.*")
 
-def create_gauge_chart(name: str, maturity: float, formatted_date: str) -> str:
+# 儀表圖樣式（與 pyecharts 版本相同）：0~100、刻度分為 10 段、起訖角度 225° → -45°（順時針）
+GAUGE_START_ANGLE = 225
+GAUGE_END_ANGLE = -45
+GAUGE_SPLIT_NUMBER = 10
+GAUGE_COLOR_BANDS = [(0.3, '#cb1090'), (0.7, '#eab107'), (1, '#0b6dd7')]
+
+# 顯示「成熟度」所需的中文字型候選（依序使用系統中第一個存在的字型）
+GAUGE_CJK_FONTS = ["Noto Sans CJK TC", "Noto Sans TC", "Microsoft JhengHei", "PingFang TC", "Heiti TC", "Noto Sans CJK JP", "WenQuanYi Zen Hei", "SimHei"]
+
+def gauge_font_family() -> list:
+    """
+    取得儀表圖文字使用的字型列表：系統中存在的中文字型優先，其餘字元以預設字型顯示。
+
+    :return: 字型名稱列表
+    """
+    available = {font.name for font in font_manager.fontManager.ttflist}
+    return [font for font in GAUGE_CJK_FONTS if font in available] + ["sans-serif"]
+
+def render_gauge_matplotlib(maturity: float) -> Image.Image:
+    """
+    以 matplotlib 繪製與 pyecharts 版本相同外觀的儀表圖（色帶、刻度、指針與百分比標籤）。
+
+    座標以 pyecharts 預設畫布（900 x 500，半徑 75%）的像素為單位，輸出解析度與截圖相同（pixel ratio 2）。
+
+    :param maturity: 成熟度數值（介於 0 到 100）
+    :return: 儀表圖圖片
+    """
+    radius = 187.5        # 500 / 2 * 75%
+    line_width = 20       # 色帶寬度
+    pt = 72 / 100         # 1 個畫布像素（1/100 英吋）對應的 point 數
+    extent = radius + 10
+    family = gauge_font_family()
+
+    fig = plt.figure(figsize=(2 * extent / 100, 2 * extent / 100))
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.set_xlim(-extent, extent)
+    ax.set_ylim(-extent, extent)
+    ax.set_aspect('equal')
+    ax.axis('off')
+
+    def angle(fraction):
+        return GAUGE_START_ANGLE + (GAUGE_END_ANGLE - GAUGE_START_ANGLE) * fraction
+
+    def point(fraction, r):
+        theta = np.deg2rad(angle(fraction))
+        return r * np.cos(theta), r * np.sin(theta)
+
+    # 色帶：0% ~ 30%、30% ~ 70%、70% ~ 100%
+    start = 0
+    for end, color in GAUGE_COLOR_BANDS:
+        ax.add_patch(Wedge((0, 0), radius, angle(end), angle(start), width=line_width, facecolor=color, edgecolor='none'))
+        start = end
+
+    # 主刻度、次刻度與刻度標籤（位於色帶內側）
+    inner = radius - line_width - 10
+    for i in range(GAUGE_SPLIT_NUMBER * 5 + 1):
+        fraction = i / (GAUGE_SPLIT_NUMBER * 5)
+        length, width = (10, 3) if i % 5 == 0 else (6, 1)
+        (x0, y0), (x1, y1) = point(fraction, inner), point(fraction, inner - length)
+        ax.plot([x0, x1], [y0, y1], color='#63677a', linewidth=width * pt, solid_capstyle='butt')
+        if i % 5 == 0:
+            x, y = point(fraction, inner - 10 - 25)
+            ax.text(x, y, f"{round(fraction * 100)}", fontsize=20 * pt, color='#464646', family=family, ha='center', va='center')
+
+    # 指針：長度為半徑的 60%，底部寬 10
+    theta = np.deg2rad(angle(min(max(maturity, 0), 100) / 100))
+    direction = np.array([np.cos(theta), np.sin(theta)])
+    normal = np.array([-direction[1], direction[0]])
+    tip = direction * radius * 0.6
+    tail = -direction * 8
+    ax.add_patch(Polygon([tip, normal * 5, tail, -normal * 5], closed=True, facecolor='#5470c6', edgecolor='none'))
+
+    # 標題與數值（位於中心下方 20% 與 40% 半徑處）
+    ax.text(0, -radius * 0.2, "成熟度", fontsize=30 * pt, color='#464646', family=family, ha='center', va='center')
+    ax.text(0, -radius * 0.4, f"{maturity:g}%", fontsize=30 * pt, color='#464646', family=family, fontweight='bold', ha='center', va='center')
+
+    image = figure_to_image(fig, dpi=200)
+    plt.close(fig)
+    return image
+
+def build_pyecharts_gauge(maturity: float):
     """
-    建立一個基本的儀表圖並將其儲存為 PNG 檔案
+    建立 pyecharts 儀表圖（尚未渲染）。
 
-    :param name: 主題名稱或編號
     :param maturity: 成熟度數值（介於 0 到 100）
-    :param formatted_date: 格式化的日期字串，用於檔名生成
-    :return: 產生的 PNG 圖片檔案路徑
+    :return: pyecharts Gauge
     """
+    from pyecharts import options as opts
+    from pyecharts.charts import Gauge
+
     # 建立儀表圖
     gauge = (
-        Gauge()
+        # 關閉動畫，頁面載入後即為最終畫面，截圖前不需等待
+        Gauge(init_opts=opts.InitOpts(animation_opts=opts.AnimationOpts(animation=False)))
         .add(
             series_name='',  # 系列名稱（此處不顯示名稱）
             data_pair=[('成熟度', maturity)],  # 圖表數據：標籤 'Maturity' 與其對應數值
@@ -63,18 +147,15 @@ def create_gauge_chart(name: str, maturity: float, formatted_date: str) -> str:
             legend_opts=opts.LegendOpts(is_show=True)  # 顯示圖例
         )
     )
+    return gauge
 
-    # 定義中間暫存的 HTML 檔案與最終輸出的 PNG 路徑
-    html_file = "./images/gauge_chart.html"
-    output_png = f"./images/{formatted_date}_gauge_{name}.png"
+def render_gauge_pyecharts(maturity: float) -> Image.Image:
+    """
+    以 pyecharts 建立儀表圖，並透過共用的 headless Chrome 截圖。
 
-    # 將儀表圖渲染至 HTML 檔案，接著轉成 PNG
-    gauge.render(html_file)
-    make_snapshot(snapshot, html_file, output_png)
+    :param maturity: 成熟度數值（介於 0 到 100）
+    :return: 儀表圖圖片
+    """
+    from utils.snapshot_service import snapshot_chart
 
-    # 清理暫存的 HTML 檔案
-    if os.path.exists(html_file):
-        os.remove(html_file)
-    
-    print(f"\n  ❏ Topic {name} 儀表圖已儲存: {output_png}")
-    return output_png
\ No newline at end of file
+    return snapshot_chart(build_pyecharts_gauge(maturity))
@@ -3,20 +3,19 @@ import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 import warnings
 from PIL import Image
-from utils.remove_image_whitespace import remove_image_whitespace
+from utils.chart_image import figure_to_image
+from utils.remove_image_whitespace import trim_image
 
 # 忽略字形缺失的警告
 warnings.filterwarnings("ignore", category=UserWarning, message=".*Glyph.*missing from font.*")
 
-def create_radial_chart(name: str, values: list, categories: list, formatted_date: str) -> str:
+def render_radial_chart(values: list, categories: list) -> Image.Image:
     """
-    生成徑向條形圖，並將主圖與圖例合併成一張圖片儲存下來。
+    繪製徑向條形圖（主圖與圖例裁剪後上下合併），不輸出任何訊息，可在子程序中執行。
 
-    :param name: 主題名稱或編號，用於檔名標識
     :param values: 每個類別的數值列表（百分比數據，範圍 0~100）
     :param categories: 類別名稱列表，長度需與 values 相同
-    :param formatted_date: 用於檔名的格式化日期字串
-    :return: 合併後徑向圖的檔案路徑
+    :return: 合併後的徑向圖圖片
     """
     # 驗證輸入參數：類別數量必須與數值數量相同
     assert len(categories) == len(values), "The number of categories must match the number of values."
@@ -52,11 +51,9 @@ def create_radial_chart(name: str, values: list, categories: list, formatted_dat
     ax.set_xticks([np.pi * i / 10 for i in range(11)])
     ax.set_xticklabels([f'{i}%' for i in range(0, 101, 10)], fontsize=15)
 
-    # 儲存主圖：徑向條形圖
-    main_chart_name = f"./images/{formatted_date}_radial_{name}_chart.png"
-    plt.savefig(main_chart_name, dpi=300, bbox_inches='tight', transparent=True)
+    # 渲染主圖：徑向條形圖
+    main_img = trim_image(figure_to_image(fig, dpi=300))
     plt.close(fig)
-    remove_image_whitespace(main_chart_name)
 
     # 建立單獨的圖例圖形
     legend_fig, legend_ax = plt.subplots(figsize=(10, 10))
@@ -65,15 +62,11 @@ def create_radial_chart(name: str, values: list, categories: list, formatted_dat
     legend_ax.legend(handles=legend_handles, labels=categories, loc='center', frameon=False, ncol=2, fontsize=20)
     legend_ax.axis('off')
 
-    # 儲存圖例圖
-    legend_chart_name = f"./images/{formatted_date}_radial_{name}_legend.png"
-    legend_fig.savefig(legend_chart_name, dpi=300, bbox_inches='tight', transparent=True)
+    # 渲染圖例圖
+    legend_img = trim_image(figure_to_image(legend_fig, dpi=300))
     plt.close(legend_fig)
-    remove_image_whitespace(legend_chart_name)
 
-    # 讀取主圖與圖例圖，並合併為一張圖片
-    main_img = Image.open(main_chart_name)
-    legend_img = Image.open(legend_chart_name)
+    # 將主圖與圖例圖合併為一張圖片
     total_width = max(main_img.width, legend_img.width)
     total_height = main_img.height + legend_img.height + 20  # 20 像素間距
     combined_img = Image.new('RGBA', (total_width, total_height), (255, 255, 255, 0))
@@ -81,10 +74,5 @@ def create_radial_chart(name: str, values: list, categories: list, formatted_dat
     # 將主圖置中貼上，然後將圖例貼在下方
     combined_img.paste(main_img, ((total_width - main_img.width) // 2, 0))
     combined_img.paste(legend_img, ((total_width - legend_img.width) // 2, main_img.height + 20))
-    
-    # 儲存合併後的圖片
-    combined_chart_name = f"./images/{formatted_date}_radial_{name}.png"
-    combined_img.save(combined_chart_name)
-    print(f"\n  ❏ Topic {name} 徑向條形圖已儲存: {combined_chart_name}")
-    
-    return combined_chart_name
+
+    return combined_img
@@ -0,0 +1,154 @@
+import base64
+import io
+import os
+
+from PIL import Image
+
+from settings import *
+
+# PNG 最佳化統計（本次執行）：處理張數、最佳化前後的位元組數
+PNG_OPTIMIZE_STATS = {'images': 0, 'before': 0, 'after': 0}
+
+def figure_to_image(fig, dpi: int = 300) -> Image.Image:
+    """
+    將 matplotlib 圖形渲染為記憶體中的 PIL 圖片（透明背景，裁去圖形外的空白），不寫入磁碟。
+
+    :param fig: matplotlib Figure
+    :param dpi: 解析度
+    :return: RGBA 圖片
+    """
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight', transparent=True)
+    buffer.seek(0)
+    image = Image.open(buffer)
+    image.load()
+    return image.convert('RGBA')
+
+def combine_side_by_side(images: list, gap_ratio: float = 0.25) -> Image.Image:
+    """
+    將多張圖片縮放至相同高度後左右並排（透明背景），用於把同一主題的多張圖表合併成一張。
+
+    :param images: 圖片列表
+    :param gap_ratio: 圖片間距相對於高度的比例
+    :return: 合併後的 RGBA 圖片
+    """
+    height = max(image.height for image in images)
+    scaled = [
+        image if image.height == height else image.resize((round(image.width * height / image.height), height), Image.LANCZOS)
+        for image in images
+    ]
+    gap = round(height * gap_ratio)
+    combined = Image.new('RGBA', (sum(image.width for image in scaled) + gap * (len(scaled) - 1), height), (255, 255, 255, 0))
+
+    x = 0
+    for image in scaled:
+        combined.paste(image, (x, 0))
+        x += image.width + gap
+    return combined
+
+def data_url_to_image(data_url: str) -> Image.Image:
+    """
+    將瀏覽器回傳的 data URL（data:image/png;base64,...）解碼為 PIL 圖片。
+
+    :param data_url: data URL 字串
+    :return: RGBA 圖片
+    """
+    header, _, data = data_url.partition(",")
+    if not data:
+        raise ValueError(f"無法解析的圖片資料: {header[:50]}")
+    data += "=" * (-len(data) % 4)
+    image = Image.open(io.BytesIO(base64.b64decode(data)))
+    image.load()
+    return image.convert('RGBA')
+
+def image_to_png_bytes(image: Image.Image) -> bytes:
+    """
+    將 PIL 圖片編碼為 PNG。
+
+    :param image: PIL 圖片
+    :return: PNG 位元組
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format='png')
+    return buffer.getvalue()
+
+def optimize_chart_png(image: Image.Image, height_pt: float) -> bytes:
+    """
+    將圖表縮放至 Google Doc 顯示所需的像素尺寸（依 CHART_OUTPUT_DPI，不放大），
+    轉為含透明度的調色盤色彩（PNG_PALETTE_COLORS 色）並以最佳化壓縮輸出 PNG。
+
+    ENABLE_PNG_OPTIMIZATION 為 False 時直接輸出原尺寸的 PNG。
+
+    :param image: 圖表圖片
+    :param height_pt: 文件中的顯示高度（pt）
+    :return: PNG 位元組
+    """
+    original = image_to_png_bytes(image)
+    if not ENABLE_PNG_OPTIMIZATION:
+        return original
+
+    height = round(height_pt / 72 * CHART_OUTPUT_DPI)
+    if image.height > height:
+        image = image.resize((max(1, round(image.width * height / image.height)), height), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.convert('RGBA').quantize(colors=PNG_PALETTE_COLORS, method=Image.Quantize.FASTOCTREE).save(buffer, format='png', optimize=True)
+    optimized = buffer.getvalue()
+
+    # 極小的圖片轉換後可能反而變大，此時保留原始 PNG
+    if len(optimized) >= len(original):
+        optimized = original
+
+    PNG_OPTIMIZE_STATS['images'] += 1
+    PNG_OPTIMIZE_STATS['before'] += len(original)
+    PNG_OPTIMIZE_STATS['after'] += len(optimized)
+    return optimized
+
+def reset_png_optimize_stats() -> None:
+    """
+    清除 PNG 最佳化統計（每次生成圖表前呼叫，統計只包含該次生成的圖表）。
+    """
+    PNG_OPTIMIZE_STATS.update(images=0, before=0, after=0)
+
+def display_png_optimize_stats() -> None:
+    """
+    輸出本次執行 PNG 最佳化節省的位元組數。
+    """
+    if PNG_OPTIMIZE_STATS['images'] == 0:
+        return
+
+    before, after = PNG_OPTIMIZE_STATS['before'], PNG_OPTIMIZE_STATS['after']
+    print(f"\n  ❏ PNG 最佳化：{PNG_OPTIMIZE_STATS['images']} 張圖表由 {before / 1024:.0f} KB 縮減為 {after / 1024:.0f} KB"
+          f"（節省 {before - after:,} bytes，{(before - after) / before * 100:.1f}%）")
+
+def save_debug_image(image, file_name: str) -> str:
+    """
+    CHART_DEBUG_DIR 有設定時，將圖表另存一份至該資料夾以便檢查；未設定時不寫入磁碟。
+
+    :param image: PIL 圖片或已編碼的 PNG 位元組
+    :param file_name: 檔名
+    :return: 儲存的檔案路徑，未儲存時回傳空字串
+    """
+    if not CHART_DEBUG_DIR:
+        return ""
+    os.makedirs(CHART_DEBUG_DIR, exist_ok=True)
+    path = os.path.join(CHART_DEBUG_DIR, file_name)
+    if isinstance(image, bytes):
+        with open(path, "wb") as image_file:
+            image_file.write(image)
+    else:
+        image.save(path)
+    return path
+
+def chart_ready(image, file_name: str, label: str):
+    """
+    圖表生成完成：有設定 CHART_DEBUG_DIR 時另存一份，並輸出進度訊息。
+
+    :param image: 圖表圖片（PIL 圖片或已編碼的 PNG 位元組）
+    :param file_name: 除錯輸出的檔名
+    :param label: 進度訊息中的圖表名稱，例如 "Topic 1 儀表圖"
+    :return: 原圖片
+    """
+    debug_path = save_debug_image(image, file_name)
+    print(f"\n  ❏ {label}已生成" + (f": {debug_path}" if debug_path else ""))
+    return image
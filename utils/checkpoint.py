@@ -0,0 +1,173 @@
+"""
+執行進度檢查點
+
+main() 的各階段（讀取試算表結構 → 讀取並處理問卷 → 生成圖表 → 輸出報告）完成後，將該階段的結果保存於
+CHECKPOINT_PATH；耗時較長的問卷處理階段另外在每個主題的備註潤飾與 AI 統整完成時保存該主題的結果（主題進度標記）。
+執行中斷後可以 --resume 從中斷的階段繼續，或以 --resume-from <階段> 指定開始的階段，
+之前的階段直接沿用檢查點中的結果，不再重新呼叫 API 與 LLM。
+
+檢查點檔案包含格式版本與主要設定（試算表、文件 ID 等）的雜湊，任一項不同時視為無效並重新執行。
+"""
+import os
+import pickle
+import threading
+
+from settings import *
+from utils.hashing import digest
+
+# 檢查點格式版本：修改各階段結果的資料格式時遞增，讓既有檢查點失效
+CHECKPOINT_VERSION = 1
+
+# 依執行順序排列的階段名稱
+PIPELINE_STAGES = ["layout", "sheet", "charts", "report"]
+
+STAGE_LABELS = {
+    'layout': "讀取試算表結構",
+    'sheet': "讀取並處理問卷",
+    'charts': "生成圖表",
+    'report': "輸出報告",
+}
+
+_lock = threading.Lock()
+_checkpoint = None
+_resume_index = 0
+
+def _config_digest() -> str:
+    """
+    :return: 影響各階段結果的主要設定的雜湊
+    """
+    return digest([GOOGLE_SHEET_ID, GOOGLE_WORKSHEET_NAME, GOOGLE_DOC_ID, GOOGLE_DRIVE_FOLDER_ID,
+                   ENABLE_AI_GENERATION, STAGE_ORDER, CHART_LAYOUT, "google_doc" in REPORT_OUTPUTS])
+
+def _new_checkpoint() -> dict:
+    """
+    :return: {'version': 格式版本, 'config': 設定雜湊, 'stages': {階段: 結果}, 'topics': {階段: {主題鍵值: 結果}}}
+    """
+    return {'version': CHECKPOINT_VERSION, 'config': _config_digest(), 'stages': {}, 'topics': {}}
+
+def _load() -> dict:
+    """
+    讀取檢查點檔案；檔案不存在、無法讀取或版本與設定不符時回傳空的檢查點。
+
+    :return: 檢查點內容
+    """
+    if not os.path.exists(CHECKPOINT_PATH):
+        return _new_checkpoint()
+
+    try:
+        with open(CHECKPOINT_PATH, "rb") as checkpoint_file:
+            checkpoint = pickle.load(checkpoint_file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as error:
+        print(f"\n  \033[33m[WARNING] 無法讀取檢查點（{CHECKPOINT_PATH}），將重新執行所有階段: {error}\033[0m")
+        return _new_checkpoint()
+
+    if checkpoint.get('version') != CHECKPOINT_VERSION or checkpoint.get('config') != _config_digest():
+        print(f"\n  \033[33m[WARNING] 檢查點的版本或設定（試算表、文件 ID 等）與目前不同，將重新執行所有階段\033[0m")
+        return _new_checkpoint()
+
+    return checkpoint
+
+def _save() -> None:
+    """
+    將檢查點寫回檔案（先寫入暫存檔再取代，避免中斷時留下不完整的檔案）。
+    """
+    directory = os.path.dirname(CHECKPOINT_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = CHECKPOINT_PATH + ".tmp"
+    with open(temp_path, "wb") as checkpoint_file:
+        pickle.dump(_checkpoint, checkpoint_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, CHECKPOINT_PATH)
+
+def start_pipeline(resume_from: str = None, resume: bool = False) -> bool:
+    """
+    決定本次執行的開始階段：未指定時重新執行所有階段並清除舊的檢查點；
+    resume 為 True 時從上次未完成的階段開始；resume_from 指定開始的階段。
+
+    :param resume_from: 開始的階段名稱（PIPELINE_STAGES 之一）或 None
+    :param resume: 是否從上次未完成的階段繼續
+    :return: 是否可以開始執行（指定的階段之前有尚未完成的階段時回傳 False）
+    """
+    global _checkpoint, _resume_index
+
+    if not ENABLE_CHECKPOINT:
+        if resume_from or resume:
+            print(f"\n\033[31m[ERROR] 檢查點已停用（ENABLE_CHECKPOINT = False），無法從中斷處繼續執行\033[0m")
+            return False
+        _checkpoint, _resume_index = None, 0
+        return True
+
+    if not resume_from and not resume:
+        _checkpoint, _resume_index = _new_checkpoint(), 0
+        return True
+
+    _checkpoint = _load()
+    completed = _checkpoint['stages']
+
+    if resume_from:
+        _resume_index = PIPELINE_STAGES.index(resume_from)
+    else:
+        _resume_index = next((i for i, stage in enumerate(PIPELINE_STAGES) if stage not in completed), len(PIPELINE_STAGES) - 1)
+
+    missing = [stage for stage in PIPELINE_STAGES[:_resume_index] if stage not in completed]
+    if missing:
+        print(f"\n\033[31m[ERROR] 檢查點中沒有「{STAGE_LABELS[missing[0]]}」（{missing[0]}）階段的結果，"
+              f"請改從該階段開始執行（--resume-from {missing[0]}）\033[0m")
+        return False
+
+    stage = PIPELINE_STAGES[_resume_index]
+    print(f"\n❏ 從「{STAGE_LABELS[stage]}」（{stage}）階段繼續執行，之前的階段沿用檢查點（{CHECKPOINT_PATH}）中的結果")
+    return True
+
+def run_stage(stage: str, func, *args):
+    """
+    執行一個階段並保存其結果；開始階段之前的階段不執行，直接回傳檢查點中的結果。
+
+    :param stage: 階段名稱（PIPELINE_STAGES 之一）
+    :param func: 執行該階段的函式
+    :param args: 函式參數
+    :return: 該階段的結果
+    """
+    if _checkpoint is None:
+        return func(*args)
+
+    if PIPELINE_STAGES.index(stage) < _resume_index:
+        print(f"\n  ▪ 略過「{STAGE_LABELS[stage]}」階段（沿用檢查點）")
+        return _checkpoint['stages'][stage]
+
+    result = func(*args)
+    with _lock:
+        _checkpoint['stages'][stage] = result
+        # 之後的階段依賴此階段的結果，舊的結果不再有效
+        for later in PIPELINE_STAGES[PIPELINE_STAGES.index(stage) + 1:]:
+            _checkpoint['stages'].pop(later, None)
+            _checkpoint['topics'].pop(later, None)
+        _save()
+    return result
+
+def topic_checkpoint(stage: str, key: str):
+    """
+    讀取主題進度標記中保存的結果。
+
+    :param stage: 階段名稱
+    :param key: 主題鍵值（應包含主題輸入資料的雜湊，輸入變更時即不再沿用）
+    :return: 保存的結果，沒有時回傳 None
+    """
+    if _checkpoint is None:
+        return None
+    with _lock:
+        return _checkpoint['topics'].get(stage, {}).get(key)
+
+def save_topic_checkpoint(stage: str, key: str, value) -> None:
+    """
+    保存單一主題的結果（主題進度標記），並立即寫入檢查點檔案。
+
+    :param stage: 階段名稱
+    :param key: 主題鍵值
+    :param value: 要保存的結果
+    """
+    if _checkpoint is None:
+        return
+    with _lock:
+        _checkpoint['topics'].setdefault(stage, {})[key] = value
+        _save()
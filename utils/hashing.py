@@ -0,0 +1,12 @@
+import hashlib
+import json
+
+def digest(value) -> str:
+    """
+    計算資料的雜湊（SHA-256 前 16 碼）。
+
+    :param value: 可轉為 JSON 的資料
+    :return: 十六進位的雜湊字串
+    """
+    payload = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
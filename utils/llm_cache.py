@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from settings import *
+
+# 快取命中統計（本次執行）
+LLM_CACHE_STATS = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+_lock = threading.Lock()
+_connection = None
+_num_entries = 0
+
+def cache_key(model_name: str, system_instruction: list, topic: str, content: str) -> str:
+    """
+    以模型名稱、系統提示、主題與內容計算快取鍵值（SHA-256），任一項改變即視為不同請求。
+
+    :param model_name: LLM 模型名稱
+    :param system_instruction: 系統提示文字列表
+    :param topic: 使用者輸入的主題
+    :param content: 使用者輸入的內容
+    :return: 十六進位的雜湊字串
+    """
+    payload = json.dumps([model_name, system_instruction, topic, content], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _connect() -> sqlite3.Connection:
+    """
+    開啟（必要時建立）快取資料庫，並先清除過期與超出數量上限的紀錄。
+    """
+    global _connection, _num_entries
+
+    if _connection is None:
+        cache_dir = os.path.dirname(LLM_CACHE_PATH)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        _connection = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False)
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        _connection.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed_at ON llm_cache (accessed_at)")
+        _connection.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - LLM_CACHE_TTL_DAYS * 86400,))
+        _num_entries = _connection.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        _evict()
+        _connection.commit()
+
+    return _connection
+
+def _evict() -> None:
+    """
+    依最後存取時間（LRU）刪除超出 LLM_CACHE_MAX_ENTRIES 的紀錄。
+    """
+    global _num_entries
+
+    excess = _num_entries - LLM_CACHE_MAX_ENTRIES
+    if excess > 0:
+        _connection.execute(
+            "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+            (excess,)
+        )
+        _num_entries -= excess
+        LLM_CACHE_STATS['evictions'] += excess
+
+def cache_get(key: str):
+    """
+    讀取快取的 LLM 回覆；過期的紀錄視為未命中並刪除。
+
+    :param key: cache_key 計算的鍵值
+    :return: 快取的回覆文字；未命中或快取停用時回傳 None
+    """
+    if not ENABLE_LLM_CACHE:
+        return None
+
+    global _num_entries
+
+    with _lock:
+        connection = _connect()
+        row = connection.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+
+        if row and now - row[1] > LLM_CACHE_TTL_DAYS * 86400:
+            connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            _num_entries -= 1
+            row = None
+
+        if row is None:
+            LLM_CACHE_STATS['misses'] += 1
+            connection.commit()
+            return None
+
+        connection.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        connection.commit()
+        LLM_CACHE_STATS['hits'] += 1
+        return row[0]
+
+def cache_set(key: str, response: str) -> None:
+    """
+    寫入 LLM 回覆至快取，超出數量上限時淘汰最久未使用的紀錄。
+
+    :param key: cache_key 計算的鍵值
+    :param response: LLM 回覆文字
+    """
+    if not ENABLE_LLM_CACHE:
+        return
+
+    global _num_entries
+
+    with _lock:
+        connection = _connect()
+        now = time.time()
+        exists = connection.execute("SELECT 1 FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        connection.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, response, now, now)
+        )
+        if not exists:
+            _num_entries += 1
+            _evict()
+        connection.commit()
+
+def display_llm_cache_stats() -> None:
+    """
+    輸出本次執行的 LLM 快取命中統計。
+    """
+    if not ENABLE_LLM_CACHE:
+        return
+
+    total = LLM_CACHE_STATS['hits'] + LLM_CACHE_STATS['misses']
+    if total == 0:
+        return
+
+    print(f"\n  ❏ LLM 快取：命中 {LLM_CACHE_STATS['hits']}/{total} 次"
+          f"（{LLM_CACHE_STATS['hits'] / total * 100:.1f}%），淘汰 {LLM_CACHE_STATS['evictions']} 筆")
@@ -1,40 +1,347 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import vertexai
-from vertexai.generative_models import GenerativeModel
+from vertexai.generative_models import GenerationConfig, GenerativeModel
 
 from settings import *
+from utils.llm_cache import cache_get, cache_key, cache_set
+from utils.rate_limiter import call_with_retry
+
+# 每個程序只初始化一次 Vertex AI，並為每組系統提示保留一個 GenerativeModel 重複使用。
+# 鎖只保護字典存取與一次性的初始化（不涉及網路請求），因此可在多執行緒中使用，
+# 在 asyncio 中也不會長時間阻塞事件迴圈（亦可搭配 asyncio.to_thread 呼叫 llm）。
+_registry_lock = threading.Lock()
+_vertex_initialized = False
+_models = {}
+
+# LLM 呼叫耗時統計：{任務名稱: {'calls': 次數, 'seconds': 總秒數, 'max': 最長秒數}}
+LLM_LATENCY_STATS = {}
+_stats_lock = threading.Lock()
+
+def get_gemini_model(system_instruction: list) -> GenerativeModel:
+    """
+    從模型池取得對應系統提示的 GenerativeModel；首次使用時才初始化 Vertex AI 與建立模型。
+
+    :param system_instruction: 系統提示文字列表
+    :return: 可重複使用的 GenerativeModel
+    """
+    global _vertex_initialized
+
+    key = (GEMINI_MODEL_NAME, tuple(system_instruction))
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        if not _vertex_initialized:
+            vertexai.init(project=GOOGLE_PROJECT_ID, location=GOOGLE_LOCATION)
+            _vertex_initialized = True
+
+        model = _models.get(key)
+        if model is None:
+            model = GenerativeModel(
+                model_name=GEMINI_MODEL_NAME,
+                system_instruction=list(system_instruction),
+            )
+            _models[key] = model
+
+    return model
+
+def record_latency(task: str, seconds: float) -> None:
+    """
+    記錄一次 LLM 呼叫的耗時。
+
+    :param task: 任務名稱
+    :param seconds: 耗時（秒）
+    """
+    with _stats_lock:
+        stats = LLM_LATENCY_STATS.setdefault(task, {'calls': 0, 'seconds': 0.0, 'max': 0.0})
+        stats['calls'] += 1
+        stats['seconds'] += seconds
+        stats['max'] = max(stats['max'], seconds)
+
+def gemini_system_instruction(task: str) -> list:
+    """
+    單一請求使用的系統提示。
+
+    :param task: 任務名稱（PROMPTS 的鍵值）
+    :return: 系統提示文字列表
+    """
+    return [
+        "不要回傳任何與回覆無關的說明文字",
+        "不要列點，要以文章形式回覆",
+        "只回傳文字段落，不要回傳json或markdown格式",
+        f"Task: {PROMPTS[task]}"
+    ]
 
-def gemini(task, topic, content):
+def gemini(task, topic, content, refresh=False):
 
     if content == "":
         return ""
 
-    vertexai.init(project=GOOGLE_PROJECT_ID, location=GOOGLE_LOCATION)
+    system_instruction = gemini_system_instruction(task)
 
-    model = GenerativeModel(
-        model_name=GEMINI_MODEL_NAME,
-        system_instruction=[
-            "不要回傳任何與回覆無關的說明文字",
-            "不要列點，要以文章形式回覆",
-            "只回傳文字段落，不要回傳json或markdown格式",
-            f"Task: {PROMPTS[task]}"
-        ],
-    )
+    # 相同的模型、提示與輸入直接使用快取的回覆（refresh 時略過快取，重新呼叫模型並更新快取）
+    if not refresh:
+        cached = cache_get(cache_key(GEMINI_MODEL_NAME, system_instruction, topic, content))
+        if cached is not None:
+            return cached
+
+    return gemini_generate(task, topic, content)
+
+def gemini_generate(task, topic, content):
+    """
+    不查詢快取，直接向 Gemini 送出單一請求，並將回覆寫入快取。
+
+    :param task: 任務名稱（PROMPTS 的鍵值）
+    :param topic: 使用者輸入的主題
+    :param content: 使用者輸入的內容
+    :return: 回覆文字
+    """
+    system_instruction = gemini_system_instruction(task)
+    model = get_gemini_model(system_instruction)
 
     prompt = f"""
     User input: {topic}\n {content}
     Answer:
     """
 
-    # Send text to Gemini
-    response = model.generate_content(prompt)
+    # Send text to Gemini（經由共用的 vertex 速率限制與重試機制，快取命中不計）
+    start = time.perf_counter()
+    response = call_with_retry("vertex", model.generate_content, prompt)
+    record_latency(task, time.perf_counter() - start)
     result = response.text.strip()
+    cache_set(cache_key(GEMINI_MODEL_NAME, system_instruction, topic, content), result)
 
     # print(f"\n  ➤ Gemini Response: {response.text}")
     return result
 
-def llm(llm, task, topic, content):
+def llm(llm, task, topic, content, refresh=False):
     if llm == "gemini":
-        return gemini(task, topic, content)
+        return gemini(task, topic, content, refresh)
     else:
         print(f"\n  \033[31m[ERROR] 不支援的 LLM 名稱 - {llm}\033[0m")
-        return ""
\ No newline at end of file
+        return ""
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗估文字的 token 數：中日韓等非 ASCII 字元約 1 字 1 token，ASCII 約 4 字元 1 token。
+
+    :param text: 文字
+    :return: 估計的 token 數
+    """
+    non_ascii = sum(1 for char in text if ord(char) > 127)
+    return non_ascii + (len(text) - non_ascii) // 4 + 1
+
+def pack_batches(entries: list, token_budget: int = LLM_BATCH_TOKEN_BUDGET, max_items: int = LLM_BATCH_MAX_ITEMS) -> list:
+    """
+    依 token 預算將 (item, note) 依序分批；每筆的成本為輸入長度加上預估的回覆長度。
+
+    :param entries: (索引, item, note) 列表
+    :param token_budget: 每批的 token 預算
+    :param max_items: 每批最多筆數
+    :return: 批次列表，每批為 entries 的子列表
+    """
+    batches, batch, used = [], [], 0
+    for entry in entries:
+        cost = estimate_tokens(entry[1]) + estimate_tokens(entry[2]) + LLM_BATCH_OUTPUT_TOKENS
+        if batch and (used + cost > token_budget or len(batch) >= max_items):
+            batches.append(batch)
+            batch, used = [], 0
+        batch.append(entry)
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+def gemini_refine_notes_batch(batch: list) -> dict:
+    """
+    將同一批的多個備註包成一個 JSON 請求送出，並驗證回覆。
+
+    :param batch: (索引, item, note) 列表
+    :return: {索引: 潤飾後文字}，只包含通過驗證的項目
+    """
+    task = "refine_client_status_notes"
+    system_instruction = [
+        "不要回傳任何與回覆無關的說明文字",
+        "不要列點，要以文章形式回覆",
+        f"Task: {PROMPTS[task]}",
+        "輸入為 JSON 陣列，每個元素包含 id、item（項目名稱）與 note（現況記錄）；"
+        "請逐一獨立處理每個元素，以相同的 id 回傳 JSON 陣列，refined_note 為該元素潤飾後的文字段落"
+    ]
+    generation_config = GenerationConfig(
+        response_mime_type="application/json",
+        response_schema={
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "id": {"type": "INTEGER"},
+                    "refined_note": {"type": "STRING"}
+                },
+                "required": ["id", "refined_note"]
+            }
+        }
+    )
+    prompt = json.dumps(
+        [{"id": i, "item": item, "note": note} for i, (_, item, note) in enumerate(batch)],
+        ensure_ascii=False
+    )
+
+    model = get_gemini_model(system_instruction)
+    start = time.perf_counter()
+    try:
+        response = call_with_retry("vertex", model.generate_content, prompt, generation_config=generation_config)
+        answers = json.loads(response.text)
+    except Exception as error:
+        print(f"\n  \033[33m[WARNING] 批次潤飾回覆無法解析，改為逐筆處理: {error}\033[0m")
+        return {}
+    finally:
+        record_latency(f"{task} (batch)", time.perf_counter() - start)
+
+    results = {}
+    if not isinstance(answers, list):
+        return results
+    for answer in answers:
+        if not isinstance(answer, dict):
+            continue
+        i, text = answer.get('id'), answer.get('refined_note')
+        if isinstance(i, int) and 0 <= i < len(batch) and isinstance(text, str) and text.strip():
+            results[batch[i][0]] = text.strip()
+    return results
+
+def gemini_refine_notes(groups: list, on_group=None) -> list:
+    """
+    批次潤飾客戶現況備註：
+
+      - 每筆先查詢單筆請求的快取，命中者不再送出
+      - 未命中者在同一組內依 LLM_BATCH_TOKEN_BUDGET 分批，每批以一個 JSON 請求送出（各批並行）
+      - 回覆缺漏或驗證失敗的項目改以單筆請求處理
+      - 批次結果以單筆請求的快取鍵值寫入快取，之後單筆或批次皆可命中
+
+    :param groups: 每組為 [(item, note), ...]，同一組（例如同一主題）的項目才會合併在同一個請求
+    :param on_group: 某一組的項目全部完成時呼叫 on_group(組索引, 該組的潤飾結果)，可用於保存進度
+    :return: 與 groups 結構相同的潤飾結果列表
+    """
+    task = "refine_client_status_notes"
+    system_instruction = gemini_system_instruction(task)
+    flat = [(item, note) for group in groups for item, note in group]
+    keys = [cache_key(GEMINI_MODEL_NAME, system_instruction, item, note) for item, note in flat]
+
+    results = [""] * len(flat)
+    bounds, group_of, remaining = [], [], []
+    batches = []
+    offset = 0
+    for g, group in enumerate(groups):
+        bounds.append((offset, offset + len(group)))
+        group_of += [g] * len(group)
+        pending = []
+        for i, (item, note) in enumerate(group, start=offset):
+            if note == "":
+                continue
+            cached = cache_get(keys[i])
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append((i, item, note))
+        offset += len(group)
+        remaining.append(len(pending))
+
+        if LLM_BATCH_TOKEN_BUDGET > 0:
+            batches.extend(pack_batches(pending))
+        else:
+            batches.extend([entry] for entry in pending)
+
+    def finish(i: int, result: str) -> None:
+        # 記錄單筆結果，該組全部完成時通知呼叫端
+        results[i] = result
+        g = group_of[i]
+        remaining[g] -= 1
+        if remaining[g] == 0 and on_group:
+            on_group(g, results[bounds[g][0]:bounds[g][1]])
+
+    if on_group:
+        for g, count in enumerate(remaining):
+            if count == 0:
+                on_group(g, results[bounds[g][0]:bounds[g][1]])
+
+    # 多筆的批次以 JSON 請求處理，單筆或驗證失敗者以一般請求處理
+    multi = [batch for batch in batches if len(batch) > 1]
+    fallback = [batch[0] for batch in batches if len(batch) == 1]
+    for batch, answers in zip(multi, llm_imap(gemini_refine_notes_batch, [(batch,) for batch in multi])):
+        for i, _, _ in batch:
+            if i in answers:
+                cache_set(keys[i], answers[i])
+                finish(i, answers[i])
+            else:
+                fallback.append((i, flat[i][0], flat[i][1]))
+
+    for (i, item, note), result in zip(fallback, llm_imap(gemini_generate, [(task, item, note) for i, item, note in fallback])):
+        finish(i, result)
+
+    return [results[start:end] for start, end in bounds]
+
+def refine_client_status_notes(llm, groups: list, on_group=None) -> list:
+    """
+    以批次請求潤飾多筆客戶現況備註（結果與逐筆呼叫 llm(..., "refine_client_status_notes", item, note) 相同格式）。
+
+    :param llm: LLM 名稱
+    :param groups: 每組為 [(item, note), ...]，同一組的項目才會合併在同一個請求
+    :param on_group: 某一組的項目全部完成時呼叫 on_group(組索引, 該組的潤飾結果)
+    :return: 與 groups 結構相同的潤飾結果列表
+    """
+    if llm == "gemini":
+        return gemini_refine_notes(groups, on_group)
+    else:
+        print(f"\n  \033[31m[ERROR] 不支援的 LLM 名稱 - {llm}\033[0m")
+        refined = [["" for _ in group] for group in groups]
+        if on_group:
+            for g, results in enumerate(refined):
+                on_group(g, results)
+        return refined
+
+def llm_map(func, args_list: list, max_workers: int = LLM_MAX_CONCURRENCY) -> list:
+    """
+    以有上限的執行緒池並行執行多個彼此獨立的 LLM 工作，並依輸入順序回傳結果。
+
+    每個工作內的 LLM 呼叫仍受 LLM_REQUESTS_PER_MINUTE 限制；max_workers 為同時進行中的工作上限，
+    設為 1 時依序執行（與未並行時相同）。
+
+    :param func: 要執行的函式
+    :param args_list: 每個工作的參數 tuple 列表
+    :param max_workers: 同時進行中的工作上限
+    :return: 與 args_list 順序相同的結果列表
+    """
+    return list(llm_imap(func, args_list, max_workers))
+
+def llm_imap(func, args_list: list, max_workers: int = LLM_MAX_CONCURRENCY):
+    """
+    與 llm_map 相同，但依輸入順序逐一產生結果：前面的工作完成後即可取得其結果，不需等待全部工作完成。
+
+    :param func: 要執行的函式
+    :param args_list: 每個工作的參數 tuple 列表
+    :param max_workers: 同時進行中的工作上限
+    :return: 依 args_list 順序產生結果的產生器
+    """
+    if max_workers <= 1 or len(args_list) <= 1:
+        for args in args_list:
+            yield func(*args)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(lambda args: func(*args), args_list)
+
+def display_llm_stats() -> None:
+    """
+    輸出本次執行各任務的 LLM 呼叫次數與耗時，以及模型池中建立的模型數量。
+    """
+    if not LLM_LATENCY_STATS:
+        return
+
+    print(f"\n  ❏ LLM 呼叫統計（模型池共建立 {len(_models)} 個模型）：")
+    for task, stats in LLM_LATENCY_STATS.items():
+        average = stats['seconds'] / stats['calls']
+        print(f"\n    ▪ {task}: {stats['calls']} 次，平均 {average:.2f} 秒，最長 {stats['max']:.2f} 秒，共 {stats['seconds']:.1f} 秒")
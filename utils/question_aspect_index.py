@@ -0,0 +1,115 @@
+"""
+問卷問題的圖表標籤（aspect）索引
+
+徑向條形圖以 LLM 從問題文字中擷取的簡短 aspect 作為類別標籤。由於問題文字來自固定的
+WAF 問卷模板，結果幾乎不會改變，因此將結果以正規化後的問題文字為鍵值保存於
+QUESTION_ASPECT_INDEX_PATH，圖表生成時直接讀取，只有索引中沒有的問題才呼叫 LLM。
+
+預先建立索引（於專案根目錄執行，會讀取 settings.py 中設定的問卷）：
+    python -m utils.question_aspect_index            # 只補齊索引中缺少的問題
+    python -m utils.question_aspect_index --refresh  # 重新擷取所有問題
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import unicodedata
+
+from settings import *
+from utils.llm_handler import llm, llm_map
+
+_lock = threading.Lock()
+
+def normalize_question(question: str) -> str:
+    """
+    正規化問題文字作為索引鍵值：統一全半形（NFKC）、合併空白並忽略大小寫。
+
+    :param question: 問題文字
+    :return: 正規化後的文字
+    """
+    question = unicodedata.normalize('NFKC', question)
+    return re.sub(r"\s+", " ", question).strip().casefold()
+
+def load_aspect_index() -> dict:
+    """
+    讀取 aspect 索引檔案。
+
+    :return: {正規化問題文字: {'question': 原始問題文字, 'aspect': aspect}}；檔案不存在時回傳空字典
+    """
+    if not os.path.exists(QUESTION_ASPECT_INDEX_PATH):
+        return {}
+    with open(QUESTION_ASPECT_INDEX_PATH, "r", encoding="utf-8") as index_file:
+        return json.load(index_file)
+
+def save_aspect_index(index: dict) -> None:
+    """
+    寫入 aspect 索引檔案（依鍵值排序，方便比對版本差異）。
+
+    :param index: load_aspect_index 格式的索引
+    """
+    index_dir = os.path.dirname(QUESTION_ASPECT_INDEX_PATH)
+    if index_dir:
+        os.makedirs(index_dir, exist_ok=True)
+    with open(QUESTION_ASPECT_INDEX_PATH, "w", encoding="utf-8") as index_file:
+        json.dump(index, index_file, ensure_ascii=False, indent=2, sort_keys=True)
+
+def get_question_aspects(questions: list, refresh: bool = False) -> dict:
+    """
+    取得各問題的 aspect：先查索引，索引中沒有的問題才以 LLM 擷取（並行處理），並寫回索引。
+
+    :param questions: 問題文字列表
+    :param refresh: 是否忽略索引與 LLM 回覆快取，重新擷取所有問題
+    :return: {問題文字: aspect}
+    """
+    with _lock:
+        index = load_aspect_index()
+
+        # 正規化後相同的問題只擷取一次
+        unique = {}
+        for question in questions:
+            unique.setdefault(normalize_question(question), question)
+        missing = [question for key, question in unique.items() if refresh or key not in index]
+
+        if missing:
+            print(f"\n  ❏ 擷取 {len(missing)} 個問題的 aspect（索引中已有 {len(unique) - len(missing)} 個）")
+            # refresh 時略過 LLM 回覆快取，確實重新擷取
+            aspects = llm_map(llm, [(LLM_NAME, "extract_question_aspects", "target sentences", question, refresh) for question in missing])
+            for question, aspect in zip(missing, aspects):
+                if aspect:
+                    index[normalize_question(question)] = {'question': question, 'aspect': aspect}
+            save_aspect_index(index)
+
+    aspects = {}
+    for question in questions:
+        entry = index.get(normalize_question(question))
+        aspects[question] = entry['aspect'] if entry else ""
+    return aspects
+
+def warm_aspect_index(refresh: bool = False) -> None:
+    """
+    讀取問卷中的所有問題並預先建立 aspect 索引。
+
+    :param refresh: 是否重新擷取所有問題
+    """
+    from google_api.google_auth import authenticate_services
+    from google_api.google_sheets import clean_sheet_data, fetch_sheet_data, fetch_sheet_layout, parse_questionnaire
+
+    sheets_service, _, _ = authenticate_services()
+    merges, header = fetch_sheet_layout(sheets_service)
+    columns, sheet_columns = fetch_sheet_data(sheets_service, header)
+    data, _ = parse_questionnaire(clean_sheet_data(columns), merges, sheet_columns)
+
+    questions = [
+        question['question']
+        for topic in data['topics'] if topic['topic'] != QUESTIONNAIRE_END_MARKER
+        for question in topic['questions']
+    ]
+    get_question_aspects(questions, refresh)
+    print(f"\n  ❏ aspect 索引已更新：{QUESTION_ASPECT_INDEX_PATH}（共 {len(load_aspect_index())} 個問題）")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="預先建立問卷問題的圖表標籤（aspect）索引")
+    parser.add_argument("--refresh", action="store_true", help="忽略既有索引，重新擷取所有問題")
+    args = parser.parse_args()
+    warm_aspect_index(args.refresh)
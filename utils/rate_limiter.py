@@ -0,0 +1,184 @@
+import random
+import socket
+import threading
+import time
+
+import httplib2
+import requests
+from googleapiclient.errors import HttpError
+
+from settings import *
+
+class RateLimiter:
+    """
+    執行緒安全、可自我調整的 token bucket 速率限制器：
+
+      - 每分鐘補充 rate_per_minute 個 token，最多累積 burst 個
+      - acquire() 取得一個 token；token 不足時預約下一個 token 並等待至可用為止
+      - 遇到限流（throttled）時速率減半，之後每次成功請求逐步調回，最多回到設定的上限
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        """
+        :param rate_per_minute: 每分鐘允許的請求數（<= 0 表示不限制）
+        :param burst: 閒置時最多可累積、連續送出的請求數
+        """
+        self.max_rate_per_minute = rate_per_minute
+        self.rate_per_minute = rate_per_minute
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        取得一個 token，必要時等待。
+
+        :return: 實際等待的秒數
+        """
+        if self.rate_per_minute <= 0:
+            return 0.0
+
+        with self.lock:
+            now = time.monotonic()
+            rate = self.rate_per_minute / 60
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * rate)
+            self.updated_at = now
+
+            # 先扣除 token（可能成為負數，代表已預約的等待時間）
+            self.tokens -= 1
+            wait = -self.tokens / rate if self.tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def throttled(self) -> None:
+        """
+        回報一次限流：速率減半（不低於每分鐘 1 次），並清空累積的 token。
+        """
+        if self.max_rate_per_minute <= 0:
+            return
+        with self.lock:
+            self.rate_per_minute = max(1.0, self.rate_per_minute / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self) -> None:
+        """
+        回報一次成功請求：速率每次增加上限的 5%，直到回到設定的上限。
+        """
+        if self.rate_per_minute >= self.max_rate_per_minute:
+            return
+        with self.lock:
+            self.rate_per_minute = min(self.max_rate_per_minute, self.rate_per_minute + self.max_rate_per_minute * 0.05)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(api: str) -> RateLimiter:
+    """
+    取得指定 API 共用的速率限制器（"sheets", "docs", "drive" 依 API_RATE_LIMITS 設定，"vertex" 依 LLM 設定）。
+
+    :param api: API 名稱
+    :return: 該 API 的 RateLimiter
+    """
+    with _limiters_lock:
+        if api not in _limiters:
+            if api == "vertex":
+                _limiters[api] = RateLimiter(LLM_REQUESTS_PER_MINUTE, burst=LLM_MAX_CONCURRENCY)
+            else:
+                limit = API_RATE_LIMITS[api]
+                _limiters[api] = RateLimiter(limit['per_minute'], burst=limit['burst'])
+        return _limiters[api]
+
+# 連線層的暫時性錯誤：逾時、連線中斷或被拒、DNS 查詢失敗
+# （httplib2 與 requests 的連線例外不繼承內建的 ConnectionError，需另外列出）
+TRANSPORT_ERRORS = (
+    TimeoutError, socket.timeout, ConnectionError, httplib2.ServerNotFoundError,
+    requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+)
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    判斷錯誤是否為限流或暫時性錯誤（429、5xx、Drive 以 403 回傳的 rate limit 錯誤，以及 TRANSPORT_ERRORS）。
+
+    :param error: 例外
+    :return: 是否應重試
+    """
+    if isinstance(error, TRANSPORT_ERRORS):
+        return True
+
+    if isinstance(error, HttpError):
+        status = error.resp.status
+        if status == 403:
+            return b"ratelimitexceeded" in (error.content or b"").lower()
+        return status == 429 or status >= 500
+
+    # Vertex AI（google.api_core）例外以 code 屬性表示 HTTP 狀態碼
+    code = getattr(error, 'code', None)
+    return isinstance(code, int) and (code == 429 or code >= 500)
+
+def is_ambiguous_error(error: Exception) -> bool:
+    """
+    判斷請求是否可能已在伺服器端生效（5xx 或連線層錯誤）；429 與 403 rate limit 代表請求已被拒絕、未生效。
+
+    :param error: 例外（is_retryable_error 為 True 者）
+    :return: 請求結果是否不明
+    """
+    if isinstance(error, TRANSPORT_ERRORS):
+        return True
+    if isinstance(error, HttpError):
+        return error.resp.status >= 500
+    code = getattr(error, 'code', None)
+    return isinstance(code, int) and code >= 500
+
+def call_with_retry(api: str, func, *args, recover=None, **kwargs):
+    """
+    經由該 API 的速率限制器呼叫 func；遇到限流或暫時性錯誤時降低速率，
+    並以指數退避加上隨機抖動（jitter）重試，最多 API_MAX_RETRIES 次。
+
+    非冪等的請求（例如 Drive files().create）重試可能重複建立資料，需提供 recover：
+    結果不明的錯誤（is_ambiguous_error）後先呼叫 recover() 確認請求是否已生效，
+    回傳值不為 None 時直接作為結果回傳，為 None 時才重試。
+
+    :param api: API 名稱（"sheets", "docs", "drive", "vertex"）
+    :param func: 要呼叫的函式
+    :param recover: 結果不明時確認請求是否已生效的函式，可為 None（請求可安全重試）
+    :return: func 的回傳值
+    """
+    limiter = get_rate_limiter(api)
+    for attempt in range(API_MAX_RETRIES + 1):
+        limiter.acquire()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as error:
+            if attempt == API_MAX_RETRIES or not is_retryable_error(error):
+                raise
+            limiter.throttled()
+            backoff = min(API_BACKOFF_MAX, API_BACKOFF_BASE * 2 ** attempt)
+            wait = random.uniform(backoff / 2, backoff)
+            print(f"\n  \033[33m[WARNING] {api} API 請求受限或暫時失敗，{wait:.1f} 秒後重試（第 {attempt + 1} 次）: {error}\033[0m")
+            time.sleep(wait)
+
+            if recover is not None and is_ambiguous_error(error):
+                recovered = recover()
+                if recovered is not None:
+                    print(f"\n    ▪ {api} API 請求已於伺服器端完成，不再重試")
+                    return recovered
+        else:
+            limiter.succeeded()
+            return result
+
+def execute(api: str, request, http=None, recover=None):
+    """
+    以速率限制與重試機制執行 Google API 請求（googleapiclient 的 HttpRequest 或 BatchHttpRequest）。
+
+    :param api: API 名稱（"sheets", "docs", "drive"）
+    :param request: 尚未執行的請求對象
+    :param http: 執行請求使用的 http 連線（多執行緒時每個執行緒需使用各自的連線），預設使用服務本身的連線
+    :param recover: 非冪等請求在結果不明時確認是否已生效的函式（見 call_with_retry）
+    :return: 請求回應
+    """
+    if http is None:
+        return call_with_retry(api, request.execute, recover=recover)
+    return call_with_retry(api, request.execute, recover=recover, http=http)
@@ -3,52 +3,53 @@ Reference:
     This implementation is inspired by techniques described in the following article:
     "https://www.yisu.com/jc/693336.html"
 """
-from PIL import Image
-import numpy as np
+from PIL import Image, ImageChops
 from settings import *
 
-def remove_image_whitespace(file_path: str) -> None:
+# 裁剪範圍外保留的邊距（像素）
+IMAGE_TRIM_MARGIN = 5
+
+def content_bbox(image: Image.Image):
     """
-    移除圖片中多餘的空白邊界，並以裁剪後的圖像覆蓋原始檔案。
+    計算圖片中非背景區域的最小範圍。
 
-    此函式基於圖片的 alpha 通道資訊來判斷非透明區域，計算出圖片的
-    最小裁剪範圍，並在該範圍外各留出 5 像素的邊距後進行裁切。
+      - 有 alpha 通道的圖片：以 alpha > 0 的像素為內容
+      - 沒有 alpha 通道的圖片：以與左上角像素顏色不同的像素為內容（視左上角為背景色）
 
-    :param file_path: 圖片檔案的路徑
+    :param image: PIL 圖片
+    :return: (left, upper, right, lower)，right 與 lower 不含；整張圖皆為背景時回傳 None
     """
+    if image.mode == 'P' and 'transparency' in image.info:
+        image = image.convert('RGBA')
+
+    if 'A' in image.getbands():
+        return image.getchannel('A').getbbox()
 
-    image = Image.open(file_path)
-    image_array = np.array(image)
-    row = image_array.shape[0]
-    col = image_array.shape[1]
-    # print(row,col)
-    # 先计算所有图片的裁剪范围，然后再统一裁剪并输出图片
-    x_left = row
-    x_top = col
-    x_right = 0
-    x_bottom = 0
-    # 上下左右范围
+    background = Image.new(image.mode, image.size, image.getpixel((0, 0)))
+    return ImageChops.difference(image, background).getbbox()
+
+def trim_image(image: Image.Image) -> Image.Image:
     """
-    Image.crop(left, up, right, below)
-    left：与左边界的距离
-    up：与上边界的距离
-    right：还是与左边界的距离
-    below：还是与上边界的距离
-    简而言之就是，左上右下。
+    移除圖片中多餘的空白邊界，並在內容範圍外留出 IMAGE_TRIM_MARGIN 像素的邊距（不超出原圖範圍）。
+
+    已裁剪過（裁剪範圍即為整張圖）或整張皆為背景的圖片直接回傳原圖。
+
+    :param image: PIL 圖片
+    :return: 裁剪後的圖片
     """
-    for r in range(row):
-        for c in range(col):
-            if image_array[r][c][3] > 0: #外框有个黑色边框，增加条件判断
-                if x_top > r:
-                    x_top = r  # 获取最小x_top
-                if x_bottom < r:
-                    x_bottom = r  # 获取最大x_bottom
-                if x_left > c:
-                    x_left = c  # 获取最小x_left
-                if x_right < c:
-                    x_right = c  # 获取最大x_right
-    cropped = image.crop((x_left - 5, x_top - 5, x_right + 5, x_bottom + 5))  # (left, upper, right, lower)
-
-    # 保存图片
-    cropped.save(file_path)
-    # print("\n    ▪ 圖片多餘空白裁剪成功")
\ No newline at end of file
+    bbox = content_bbox(image)
+    if bbox is None:
+        return image
+
+    # 與原本逐像素掃描的裁剪範圍相同：左、上各留 5 像素，右、下以最後一個內容像素再加 5 為界（不含）
+    left, upper, right, lower = bbox
+    box = (
+        max(0, left - IMAGE_TRIM_MARGIN),
+        max(0, upper - IMAGE_TRIM_MARGIN),
+        min(image.width, right - 1 + IMAGE_TRIM_MARGIN),
+        min(image.height, lower - 1 + IMAGE_TRIM_MARGIN),
+    )
+    if box == (0, 0, image.width, image.height):
+        return image
+
+    return image.crop(box)  # (left, upper, right, lower)
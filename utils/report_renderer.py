@@ -0,0 +1,352 @@
+"""
+本地報告輸出
+
+將 load_and_process_sheet_data + generate_charts 處理後的數據字典輸出為本地的 Markdown、HTML 或 DOCX 檔案，
+區段版面與 Google Doc 報告相同（整體成熟度、各主題、各問題與改善建議統整），圖表直接嵌入本地的 PNG，
+不需呼叫任何 API，可作為快速預覽或離線使用。
+
+新增輸出格式時，繼承 ReportRenderer 並實作 heading、paragraph、bullets、images 與 save，再登錄於 REPORT_RENDERERS。
+"""
+import base64
+import html
+import io
+import os
+import time
+from abc import ABC, abstractmethod
+
+from settings import *
+from google_api.google_docs_sections import maturity, question_content, report_questions, report_topics
+
+
+class ReportRenderer(ABC):
+    """
+    本地報告輸出的基底類別：render() 依報告版面呼叫各輸出方法，子類別決定實際的檔案格式。
+    """
+    extension = ""
+
+    @abstractmethod
+    def heading(self, text: str, level: int) -> None:
+        """
+        :param text: 標題文字
+        :param level: 標題層級（1~6，對應 Google Doc 的 HEADING_1~HEADING_6）
+        """
+
+    @abstractmethod
+    def paragraph(self, text: str) -> None:
+        """
+        :param text: 段落文字
+        """
+
+    @abstractmethod
+    def bullets(self, items: list) -> None:
+        """
+        :param items: [(文字, 縮排層級（0 起算）, 連結或 None)]
+        """
+
+    @abstractmethod
+    def images(self, images: list) -> None:
+        """
+        :param images: [(PNG 位元組, 顯示高度（pt）)]，同一列並排顯示
+        """
+
+    @abstractmethod
+    def save(self, path: str) -> None:
+        """
+        :param path: 輸出檔案路徑
+        """
+
+    def charts(self, target: dict, total: bool = False) -> None:
+        """
+        嵌入 generate_charts 保留的圖表 PNG（沒有圖表時略過）。
+
+        :param target: 數據字典或主題資料
+        :param total: 是否為整體圖表（使用整體圖表的顯示高度）
+        """
+        images = [(content, DOC_IMAGE_HEIGHTS_PT["total" if total else kind]) for kind, content in target.get('chart_images', [])]
+        if images:
+            self.images(images)
+
+    def render(self, data: dict) -> None:
+        """
+        依 Google Doc 報告的區段版面輸出整份報告。
+
+        :param data: 包含報告各項數據的字典
+        """
+        self.heading(f"Well-Architected Framework 整體成熟度: {maturity(data['total_score'], data['total_num'])}", 1)
+        self.charts(data, total=True)
+
+        for topic_cnt, topic in report_topics(data):
+            self.heading(f"Topic {topic_cnt}", 6)
+            self.heading(f"{topic['topic']} ☁️", 1)
+            self.paragraph(f"主題成熟度：{maturity(topic['topic_score'], topic['topic_num'])}")
+            self.charts(topic)
+
+            for question in report_questions(topic):
+                content = question_content(question)
+                self.heading(question['question'], 2)
+
+                for title, group in content['groups']:
+                    self.heading(title, 3)
+                    if group:
+                        items = []
+                        for item in group:
+                            items.append((item['item'], 0, None))
+                            if item['refined_note']:
+                                items.append((item['refined_note'], 1, None))
+                        self.bullets(items)
+                    else:
+                        self.paragraph("(無)")
+
+                self.heading("建議發展階段", 3)
+                self.paragraph(content['stage'])
+                self.heading("現況成熟度", 3)
+                self.paragraph(content['maturity'])
+                self.heading("現況總整理", 3)
+                self.paragraph(content['condition'])
+                self.heading("最佳實務建議", 3)
+                self.paragraph(content['improvement'])
+
+                self.heading("最佳實務參考", 3)
+                if content['best_practices']:
+                    self.bullets([(text, 0, url) for text, url in content['best_practices']])
+                else:
+                    self.paragraph("(無)")
+
+        self.heading("Well-Architected 改善建議統整", 1)
+        for i, stage in enumerate(STAGE_ORDER):
+            self.heading(stage, 3)
+            self.paragraph(data['suggestions'][i] if data['suggestions'][i] else "(無)")
+
+
+class MarkdownRenderer(ReportRenderer):
+    """
+    輸出 Markdown，圖表另存於與報告同名的 _files 資料夾。
+    """
+    extension = "md"
+
+    def __init__(self):
+        # 文字行，或圖表 PNG 列表（儲存時寫出圖檔並轉為圖片連結）
+        self.lines = []
+
+    def heading(self, text: str, level: int) -> None:
+        self.lines += [f"{'#' * level} {text}", ""]
+
+    def paragraph(self, text: str) -> None:
+        self.lines += [text, ""]
+
+    def bullets(self, items: list) -> None:
+        for text, level, url in items:
+            self.lines.append(f"{'  ' * level}- " + (f"[{text}]({url})" if url else text))
+        self.lines.append("")
+
+    def images(self, images: list) -> None:
+        self.lines += [[content for content, _ in images], ""]
+
+    def save(self, path: str) -> None:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        image_dir = os.path.join(os.path.dirname(path), f"{stem}_files")
+
+        lines = []
+        image_cnt = 0
+        for line in self.lines:
+            if isinstance(line, list):
+                os.makedirs(image_dir, exist_ok=True)
+                links = []
+                for content in line:
+                    image_cnt += 1
+                    with open(os.path.join(image_dir, f"chart_{image_cnt}.png"), "wb") as image_file:
+                        image_file.write(content)
+                    links.append(f"![chart]({stem}_files/chart_{image_cnt}.png)")
+                line = " ".join(links)
+            lines.append(line)
+
+        with open(path, "w", encoding="utf-8") as report_file:
+            report_file.write("\n".join(lines))
+
+
+class HtmlRenderer(ReportRenderer):
+    """
+    輸出單一 HTML 檔案，圖表以 base64 內嵌，不需另附圖檔。
+    """
+    extension = "html"
+
+    def __init__(self):
+        self.parts = []
+
+    def heading(self, text: str, level: int) -> None:
+        self.parts.append(f"<h{level}>{html.escape(text)}</h{level}>")
+
+    def paragraph(self, text: str) -> None:
+        self.parts.append(f"<p>{html.escape(text)}</p>")
+
+    def bullets(self, items: list) -> None:
+        # 依縮排層級於上一個項目中開啟巢狀清單，或關閉至對應層級
+        depth = -1
+        for text, level, url in items:
+            if level > depth:
+                self.parts.append("<ul>" * (level - depth))
+            else:
+                self.parts.append("</li>" + "</ul></li>" * (depth - level))
+            depth = level
+            content = html.escape(text)
+            if url:
+                content = f'<a href="{html.escape(url)}">{content}</a>'
+            self.parts.append(f"<li>{content}")
+        self.parts.append("</li></ul>" * (depth + 1))
+
+    def images(self, images: list) -> None:
+        tags = [
+            f'<img src="data:image/png;base64,{base64.b64encode(content).decode("ascii")}" style="height:{height}pt">'
+            for content, height in images
+        ]
+        self.parts.append(f"<p>{''.join(tags)}</p>")
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as report_file:
+            report_file.write(
+                '<!DOCTYPE html>\n<html lang="zh-Hant">\n<head>\n<meta charset="utf-8">\n'
+                '<title>Well-Architected Framework Report</title>\n</head>\n<body>\n'
+                + "\n".join(self.parts)
+                + "\n</body>\n</html>\n"
+            )
+
+
+class DocxRenderer(ReportRenderer):
+    """
+    輸出 Word（.docx）檔案（需安裝 python-docx），標題與項目符號使用 Word 內建樣式。
+    """
+    extension = "docx"
+
+    def __init__(self):
+        # python-docx 只有輸出 DOCX 時才需要
+        import docx
+        self.docx = docx
+        self.document = docx.Document()
+        # 以樣式名稱指定段落樣式時，python-docx 每次都會掃描全部樣式，因此事先查好樣式 ID
+        self.style_ids = {}
+
+    def add_paragraph(self, text: str, style: str = None):
+        """
+        新增段落，並直接以樣式 ID 指定段落樣式。
+
+        :param text: 段落文字
+        :param style: 樣式名稱（例如 "Heading 1"），None 時使用預設樣式
+        :return: 段落
+        """
+        paragraph = self.document.add_paragraph(text)
+        if style:
+            if style not in self.style_ids:
+                self.style_ids[style] = self.document.styles[style].style_id
+            paragraph._p.style = self.style_ids[style]
+        return paragraph
+
+    def heading(self, text: str, level: int) -> None:
+        self.add_paragraph(text, f"Heading {level}")
+
+    def paragraph(self, text: str) -> None:
+        self.add_paragraph(text)
+
+    def bullets(self, items: list) -> None:
+        for text, level, url in items:
+            paragraph = self.add_paragraph("", "List Bullet" if level == 0 else f"List Bullet {min(level + 1, 3)}")
+            if url:
+                self.hyperlink(paragraph, text, url)
+            else:
+                paragraph.add_run(text)
+
+    def hyperlink(self, paragraph, text: str, url: str) -> None:
+        """
+        於段落中加入超連結（python-docx 沒有提供超連結 API，直接建立 w:hyperlink 元素）。
+
+        :param paragraph: 段落
+        :param text: 顯示文字
+        :param url: 連結
+        """
+        from docx.oxml import OxmlElement
+        from docx.oxml.ns import qn
+        from docx.opc.constants import RELATIONSHIP_TYPE
+
+        relationship_id = paragraph.part.relate_to(url, RELATIONSHIP_TYPE.HYPERLINK, is_external=True)
+        hyperlink = OxmlElement("w:hyperlink")
+        hyperlink.set(qn("r:id"), relationship_id)
+
+        run = OxmlElement("w:r")
+        properties = OxmlElement("w:rPr")
+        style = OxmlElement("w:rStyle")
+        style.set(qn("w:val"), "Hyperlink")
+        properties.append(style)
+        underline = OxmlElement("w:u")
+        underline.set(qn("w:val"), "single")
+        properties.append(underline)
+        color = OxmlElement("w:color")
+        color.set(qn("w:val"), "0563C1")
+        properties.append(color)
+        run.append(properties)
+        run_text = OxmlElement("w:t")
+        run_text.text = text
+        run.append(run_text)
+        hyperlink.append(run)
+        paragraph._p.append(hyperlink)
+
+    def images(self, images: list) -> None:
+        run = self.add_paragraph("").add_run()
+        for content, height in images:
+            run.add_picture(io.BytesIO(content), height=self.docx.shared.Pt(height))
+
+    def save(self, path: str) -> None:
+        self.document.save(path)
+
+
+# 輸出格式 → 輸出類別
+REPORT_RENDERERS = {
+    'md': MarkdownRenderer,
+    'html': HtmlRenderer,
+    'docx': DocxRenderer,
+}
+
+def render_report(data: dict, fmt: str, path: str) -> str:
+    """
+    將報告輸出為指定格式的本地檔案。
+
+    :param data: 包含報告各項數據的字典
+    :param fmt: 輸出格式（"md"、"html" 或 "docx"）
+    :param path: 輸出檔案路徑
+    :return: 輸出檔案路徑
+    """
+    renderer = REPORT_RENDERERS[fmt]()
+    renderer.render(data)
+    renderer.save(path)
+    return path
+
+def render_local_reports(data: dict) -> list:
+    """
+    依 REPORT_OUTPUTS 將報告輸出至 REPORT_OUTPUT_DIR（"google_doc" 以外的格式）。
+
+    :param data: 包含報告各項數據的字典
+    :return: 輸出的檔案路徑列表
+    """
+    formats = [fmt for fmt in REPORT_OUTPUTS if fmt != "google_doc"]
+    if not formats:
+        return []
+
+    print(f"\n❏ 輸出本地報告...")
+    os.makedirs(REPORT_OUTPUT_DIR, exist_ok=True)
+    formatted_date = time.strftime("%Y%m%d%H%M", time.localtime())
+
+    paths = []
+    for fmt in formats:
+        if fmt not in REPORT_RENDERERS:
+            print(f"\n  \033[33m[WARNING] 不支援的報告輸出格式：{fmt}（可用格式：google_doc、{'、'.join(REPORT_RENDERERS)}）\033[0m")
+            continue
+
+        path = os.path.join(REPORT_OUTPUT_DIR, f"{formatted_date}_waf_report.{REPORT_RENDERERS[fmt].extension}")
+        start = time.perf_counter()
+        try:
+            render_report(data, fmt, path)
+        except ImportError as error:
+            print(f"\n  \033[31m[ERROR] 無法輸出 {fmt} 報告，請先安裝所需套件（pip install -r requirements.txt）: {error}\033[0m")
+            continue
+        print(f"\n  ▪ {fmt} 報告已輸出：{path}（{time.perf_counter() - start:.2f} 秒）")
+        paths.append(path)
+
+    return paths
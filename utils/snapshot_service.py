@@ -0,0 +1,112 @@
+"""
+pyecharts 圖表截圖服務
+
+整個程序共用一個 headless Chrome（首次截圖時才啟動，程式結束時自動關閉），
+每次截圖從唯一的暫存 HTML 檔載入，並可在同一個頁面中一次擷取多張圖表，
+避免每張圖表都重新啟動瀏覽器，也避免同時執行時互相覆蓋暫存檔。
+"""
+import atexit
+import os
+import tempfile
+import threading
+import time
+
+from PIL import Image
+
+from utils.chart_image import data_url_to_image
+
+# 依頁面中圖表的順序，回傳每張圖表的 data URL
+SNAPSHOT_ALL_JS = """
+    var eles = document.querySelectorAll('div[_echarts_instance_]');
+    return Array.prototype.map.call(eles, function (ele) {
+        return echarts.getInstanceByDom(ele).getDataURL({
+            type: 'png',
+            pixelRatio: %s,
+            excludeComponents: ['toolbox']
+        });
+    });
+"""
+
+COUNT_CHARTS_JS = "return typeof echarts === 'undefined' ? -1 : document.querySelectorAll('div[_echarts_instance_]').length;"
+
+_driver = None
+_driver_lock = threading.Lock()
+
+def get_driver():
+    """
+    取得共用的 headless Chrome；首次呼叫時啟動並註冊程式結束時關閉。
+
+    呼叫端需持有 _driver_lock（WebDriver 不可同時被多個執行緒使用）。
+
+    :return: selenium WebDriver
+    """
+    global _driver
+    if _driver is None:
+        from snapshot_selenium.snapshot import get_chrome_driver
+
+        _driver = get_chrome_driver()
+        atexit.register(shutdown)
+    return _driver
+
+def shutdown() -> None:
+    """
+    關閉共用的瀏覽器（可重複呼叫；之後再截圖時會重新啟動）。
+    """
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            try:
+                _driver.quit()
+            except Exception:
+                pass
+            _driver = None
+
+def snapshot_charts(charts: list, pixel_ratio: int = 2, timeout: float = 10) -> list:
+    """
+    將多張 pyecharts 圖表放在同一個頁面中渲染，載入一次後依序擷取每張圖表。
+
+    圖表應關閉動畫（AnimationOpts(animation=False)），載入完成即為最終畫面，不需額外等待。
+
+    :param charts: pyecharts 圖表列表
+    :param pixel_ratio: 截圖的像素倍率
+    :param timeout: 等待所有圖表初始化完成的秒數上限
+    :return: 與 charts 順序相同的 RGBA 圖片列表
+    """
+    from pyecharts.charts import Page
+
+    if not charts:
+        return []
+
+    page = Page(layout=Page.SimplePageLayout)
+    page.add(*charts)
+
+    html_fd, html_file = tempfile.mkstemp(suffix=".html")
+    os.close(html_fd)
+    try:
+        page.render(html_file)
+        with _driver_lock:
+            driver = get_driver()
+            driver.get("file://" + os.path.abspath(html_file))
+
+            deadline = time.monotonic() + timeout
+            while driver.execute_script(COUNT_CHARTS_JS) < len(charts):
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"圖表未在 {timeout} 秒內完成載入")
+                time.sleep(0.05)
+
+            data_urls = driver.execute_script(SNAPSHOT_ALL_JS % pixel_ratio)
+    finally:
+        if os.path.exists(html_file):
+            os.remove(html_file)
+
+    return [data_url_to_image(data_url) for data_url in data_urls]
+
+def snapshot_chart(chart, pixel_ratio: int = 2) -> Image.Image:
+    """
+    擷取單張 pyecharts 圖表。
+
+    :param chart: pyecharts 圖表
+    :param pixel_ratio: 截圖的像素倍率
+    :return: RGBA 圖片
+    """
+    return snapshot_charts([chart], pixel_ratio)[0]